@@ -1,26 +1,148 @@
 #Author: Daniel Dam
 #Date: 7/28/21
 #Description: This file creates the game of Quoridor. Quoridor is a two player game in which the goal is for a player
-#to move their pawn from their baseline to the other player's baseline.
+#to move their pawn from their baseline to the other player's baseline. The board size, the number of fences and a
+#four player mode (each pawn starts in the middle of one side and must reach the opposite side) can be chosen when a
+#game is created.
 
+import os
+import random
+from collections import deque
+
+DEFAULT_SIZE = 9 #squares per side of the standard board
+DEFAULT_FENCES = {2: 10, 4: 5} #fences per player of the standard game, by number of players
+ACTION_KINDS = "pvh" #kind of action of every block of action numbers (see BoardTopology.action_to_index)
+
+
+class BoardTopology:
+    """
+    Everything about a board configuration that never changes during a game, computed once per configuration (see
+    get_topology) and shared by every game that uses it. Games only store what differs between them (pawns, fences,
+    inventories, turn) and refer to these tables for the rest. The tables are public attributes:
+    size, players, fences -- the configuration
+    square_index -- maps every (x,y) coordinate to its index in QuoridorGame._squares_list, which is stored row by row
+    coordinates -- coordinate of every square index
+    ortho_moves -- possible moves of every square index on an empty board, in the order top, left, right, bottom
+    empty_squares -- the Square of every square index on an empty board
+    fence_edges -- pair of adjacent coordinates that every fence slot separates, keyed by ("v" or "h", (x,y))
+    start_positions, goals -- start coordinate and tuple of goal squares of every player
+    zobrist_pawn, zobrist_fence, zobrist_inventory, zobrist_turn -- keys for Zobrist hashing
+    action_offsets, action_count -- numbering of actions (see action_to_index)
+    """
+    def __init__(self, size=DEFAULT_SIZE, players=2, fences=None):
+        """
+        Raises ValueError for a board smaller than 3x3 or a number of players other than 2 or 4.
+        p1: size -- squares per side of the board
+        p2: players -- 2 or 4
+        p3: fences -- fences per player, DEFAULT_FENCES by default
+        """
+        if size < 3:
+            raise ValueError("the board must be at least 3 squares wide")
+        if players not in DEFAULT_FENCES:
+            raise ValueError("a game has 2 or 4 players")
+        if fences is None:
+            fences = DEFAULT_FENCES[players]
+        self.size = size
+        self.players = players
+        self.fences = fences
+        self.square_index = {(x, y): y * size + x for y in range(size) for x in range(size)}
+        self.coordinates = tuple((x, y) for y in range(size) for x in range(size))
+        self.ortho_moves = tuple(tuple(move for move in ((x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1))
+                                       if -1 < move[0] < size and -1 < move[1] < size)
+                                 for x, y in self.coordinates)
+        self.empty_squares = tuple(map(Square, self.coordinates, self.ortho_moves))
+
+        #A "v" fence separates a square from the square to its left and an "h" fence separates it from the square
+        #above, so there are no "v" slots in the first column and no "h" slots in the first row. Fences are one block
+        #long, so a slot only conflicts with itself and a slot is taken exactly when its edge is already cut.
+        self.fence_edges = {}
+        for v_or_h, dx, dy in (("v", 1, 0), ("h", 0, 1)):
+            for index, (x, y) in enumerate(self.coordinates):
+                if x >= dx and y >= dy:
+                    self.fence_edges[v_or_h, (x, y)] = (self.coordinates[index - dy * size - dx], self.coordinates[index])
+
+        #Player 1 starts at the top and player 2 at the bottom, players 3 and 4 on the left and right
+        middle, last = size // 2, size - 1
+        sides = {1: ((middle, 0), tuple((x, last) for x in range(size))),
+                 2: ((middle, last), tuple((x, 0) for x in range(size))),
+                 3: ((0, middle), tuple((last, y) for y in range(size))),
+                 4: ((last, middle), tuple((0, y) for y in range(size)))}
+        self.start_positions = {player: sides[player][0] for player in range(1, players + 1)}
+        self.goals = {player: sides[player][1] for player in range(1, players + 1)}
+
+        #The hash of a position is the XOR of the keys of every pawn square, every fence, every fence inventory and
+        #the turn key of the player to move (0 for player 1). The fixed seed keeps hashes the same between runs and
+        #processes.
+        squares = size * size
+        zobrist_random = random.Random(20210728)
+        self.zobrist_pawn = {player: [zobrist_random.getrandbits(64) for _ in range(squares)]
+                             for player in range(1, players + 1)}
+        self.zobrist_fence = {v_or_h: [zobrist_random.getrandbits(64) for _ in range(squares)] for v_or_h in ("v", "h")}
+        self.zobrist_inventory = {player: [zobrist_random.getrandbits(64) for _ in range(fences + 1)]
+                                  for player in range(1, players + 1)}
+        self.zobrist_turn = (0, 0) + tuple(zobrist_random.getrandbits(64) for _ in range(2, players + 1))
+
+        #Actions are numbered from 0 for pawn moves, then "v" fences, then "h" fences (square index y*size+x)
+        self.action_offsets = {"p": 0, "v": squares, "h": 2 * squares}
+        self.action_count = 3 * squares
+
+    def __reduce__(self):
+        """Pickles a topology as its configuration, so that an unpickled game uses the shared topology of its process."""
+        return get_topology, (self.size, self.players, self.fences)
+
+    def action_to_index(self, action):
+        """
+        Returns the number (0 to action_count - 1) of an action such as ("p", (x,y)), ("v", (x,y)) or ("h", (x,y)).
+        p1: action tuple
+        """
+        kind, position = action
+        return self.action_offsets[kind] + position[1] * self.size + position[0]
+
+    def index_to_action(self, index):
+        """
+        Returns the action tuple of an action number made by action_to_index.
+        p1: integer between 0 and action_count - 1
+        """
+        kind, square = divmod(index, self.size * self.size)
+        return ACTION_KINDS[kind], (square % self.size, square // self.size)
+
+
+_topologies = {} #BoardTopology of every configuration that has been used, keyed by (size, players, fences)
+
+
+def get_topology(size=DEFAULT_SIZE, players=2, fences=None):
+    """
+    Returns the shared BoardTopology of a configuration, making it the first time it is asked for.
+    p1: size -- squares per side of the board
+    p2: players -- 2 or 4
+    p3: fences -- fences per player, DEFAULT_FENCES by default
+    """
+    if fences is None:
+        fences = DEFAULT_FENCES.get(players)
+    key = (size, players, fences)
+    topology = _topologies.get(key)
+    if topology is None:
+        topology = _topologies[key] = BoardTopology(size, players, fences)
+    return topology
 
 
 class Square:
     """
-    Represents a square in a game of Quoridor with an (x,y) coordinate and a list of coordinates
+    Represents a square in a game of Quoridor with an (x,y) coordinate and a tuple of coordinates
     that represent the other squares that a pawn has access to.
     """
+    __slots__ = ("_square_coordinate", "_ortho_moves_list", "_pawn")
+
     def __init__(self, coordinate, ortho_move_list):
         """
-        Initiates a square in a game of Quoridor. Each square has a coordinate (x,y) and a list of possible moves. It
+        Initiates a square in a game of Quoridor. Each square has a coordinate (x,y) and a tuple of possible moves. It
         also can determine if a pawn is on it.
         :p1: coordinate -- represents a square's place on the board
-        :p2: ortho_move_list -- list of possible moves. Updated as fences are placed.
+        :p2: ortho_move_list -- tuple of possible moves. Replaced by a new tuple as fences are placed, so squares can
+        share the tuples of ORTHO_MOVES until a fence changes them.
         """
         self._square_coordinate = coordinate
         self._ortho_moves_list = ortho_move_list
-        self._hfences = []
-        self._vfences = []
         self._pawn = None
 
     def remove_pawn(self):
@@ -40,56 +162,160 @@ class Square:
         return self._square_coordinate
 
     def get_ortho_moves(self):
-        """Returns a list of possible moves for that square."""
+        """Returns a tuple of possible moves for that square."""
         return self._ortho_moves_list
 
     def remove_ortho_moves(self, coordinate):
         """
-        Removes a coordinate from the list of possible moves. This method is used when a fence is blocking a position.
+        Removes a coordinate from the possible moves. This method is used when a fence is blocking a position.
         """
-        self._ortho_moves_list.remove(coordinate)
+        self._ortho_moves_list = tuple(move for move in self._ortho_moves_list if move != coordinate)
 
     def set_fences(self, v_or_h, coordinate):
         """
         Adds a fence around a square.
-        Updates the list of possible moves of the fence coordinate removing the coordinate that is being blocked.
-        Updates the list of possible moves of the coordinate that is being blocked. (When a fence is placed, two
+        Updates the possible moves of the fence coordinate removing the coordinate that is being blocked.
+        Updates the possible moves of the coordinate that is being blocked. (When a fence is placed, two
         squares are blocked from one another, so both squares must be updated).
         """
-        if v_or_h == "h":
-            self._hfences.append(coordinate)
-            self.remove_ortho_moves(coordinate)
-        if v_or_h == "v":
-            self._vfences.append(coordinate)
+        if v_or_h == "h" or v_or_h == "v":
             self.remove_ortho_moves(coordinate)
 
-
-class QuoridorGame:
+    def add_ortho_move(self, coordinate, shared_moves=None):
+        """
+        Adds a coordinate back to the possible moves, keeping the order of ORTHO_MOVES (top, left, right, bottom).
+        This method is used when a fence is removed. A square without fences goes back to the shared tuple.
+        p1: coordinate that is no longer blocked
+        p2: shared_moves -- the square's moves on an empty board (BoardTopology.ortho_moves), ORTHO_MOVES by default
+        """
+        moves = [move for move in self._ortho_moves_list if (move[1], move[0]) < (coordinate[1], coordinate[0])]
+        moves.append(coordinate)
+        moves.extend(move for move in self._ortho_moves_list if (move[1], move[0]) > (coordinate[1], coordinate[0]))
+        shared = shared_moves if shared_moves is not None else ORTHO_MOVES[SQUARE_INDEX[self._square_coordinate]]
+        self._ortho_moves_list = shared if len(moves) == len(shared) else tuple(moves)
+
+
+#The standard two player board. Its tables are also module constants, used by the tools that only play on that board
+#(bitboard.py, batch.py, dataset.py, gamerecord.py, perft.py). Squares of EMPTY_SQUARES are shared by every game until
+#a pawn or a fence changes them (see QuoridorGame.own_square), so squares returned by get_squares or find_square must
+#only be read from outside the game, and only until the next change: the game swaps a square for a copy of its own
+#when it changes it and back for the shared one once it is empty again.
+DEFAULT_TOPOLOGY = get_topology()
+SQUARE_INDEX = DEFAULT_TOPOLOGY.square_index
+COORDINATES = DEFAULT_TOPOLOGY.coordinates
+ORTHO_MOVES = DEFAULT_TOPOLOGY.ortho_moves
+P1_BASELINE = DEFAULT_TOPOLOGY.goals[2]
+P2_BASELINE = DEFAULT_TOPOLOGY.goals[1]
+FENCE_EDGES = DEFAULT_TOPOLOGY.fence_edges
+EMPTY_SQUARES = DEFAULT_TOPOLOGY.empty_squares
+ZOBRIST_PAWN = DEFAULT_TOPOLOGY.zobrist_pawn
+ZOBRIST_FENCE = DEFAULT_TOPOLOGY.zobrist_fence
+ZOBRIST_INVENTORY = DEFAULT_TOPOLOGY.zobrist_inventory
+ZOBRIST_TURN = DEFAULT_TOPOLOGY.zobrist_turn[2]
+
+#Actions of the standard board are numbered 0-80 for pawn moves, 81-161 for "v" fences and 162-242 for "h" fences
+#(square index y*9+x). Other boards number them the same way with their own size (BoardTopology.action_to_index).
+ACTION_OFFSETS = DEFAULT_TOPOLOGY.action_offsets
+
+
+def action_to_index(action):
     """
-    Class that creates a game of Quoridor. Takes no parameters.
+    Returns the number (0-242) of an action such as ("p", (x,y)), ("v", (x,y)) or ("h", (x,y)) on the standard board.
+    p1: action tuple
     """
+    kind, position = action
+    return ACTION_OFFSETS[kind] + position[1] * 9 + position[0]
 
-    def __init__(self):
-        """Initializes board with pawns placed in their correct positions."""
 
+def index_to_action(index):
+    """
+    Returns the action tuple of an action number made by action_to_index.
+    p1: integer between 0 and 242
+    """
+    square = index % 81
+    return ACTION_KINDS[index // 81], (square % 9, square // 9)
 
 
+class QuoridorGame:
+    """
+    Class that creates a game of Quoridor. By default it is the standard two player game on a 9x9 board with 10 fences
+    per player.
+    """
+    __slots__ = ("_topology", "_squares_list", "_positions", "_turn", "_game_won", "_fence_inventories", "_vFences",
+                 "_hFences", "_paths", "_legal_moves", "_history", "_hash", "_subscribers", "_change_seq")
+
+    def __init__(self, size=DEFAULT_SIZE, players=2, fences=None):
+        """
+        Initializes board with pawns placed in their correct positions.
+        p1: size -- squares per side of the board
+        p2: players -- 2 or 4. Players move in the order 1, 2, 3, 4.
+        p3: fences -- fences per player, 10 for two players and 5 for four players by default
+        """
+        self._topology = topology = get_topology(size, players, fences) #tables shared by every game of this kind
         self._squares_list = [] #all the squares on the "board"
-        self._board = self._squares_list
         self.create_squares() #creates all the squares on the board
         self.place_pawns_in_start_position() #places pawns in their correct starting position
-        self._p1_position = (4,0)
-        self._p2_position = (4,8)
+        self._positions = [topology.start_positions[player] for player in range(1, players + 1)] #position by player - 1
         self._turn = 1
         self._game_won = False
-        self._p1_fence_inventory = 10
-        self._p2_fence_inventory = 10
+        self._fence_inventories = [topology.fences] * players #fences left by player - 1
         self._vFences = []
         self._hFences = []
-        self._p1_baseline = [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (7, 0), (8, 0)]
-        self._p2_baseline = [(0, 8), (1, 8), (2, 8), (3, 8), (4, 8), (5, 8), (6, 8), (7, 8), (8, 8)]
-        self._first_row = [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (6, 0), (7, 0), (8, 0)]
-        self._first_column = [(0, 0), (0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8)]
+        self._paths = [None] * players #cached shortest path of every player to their goal, found on first use
+        self._legal_moves = None #cached legal moves of the player to move, cleared when the game changes
+        self._history = [] #actions made with apply, with what is needed to undo them
+        self._hash = self.compute_hash() #Zobrist hash, kept up to date by every change to the game
+        self._subscribers = None #callbacks of the change feed (see subscribe), None while there are none
+        self._change_seq = 0 #number of the last change sent to subscribers
+
+    def __getstate__(self):
+        """
+        Returns the state of the game for pickle and copy. Only the squares this game owns are part of it (see
+        own_square), as a dict by square index; the undo history and the subscribers of the change feed are left out,
+        so a copy starts with nothing to undo.
+        """
+        state = {name: getattr(self, name) for name in self.__slots__ if name not in ("_history", "_subscribers")}
+        empty_squares = self._topology.empty_squares
+        state["_squares_list"] = {index: square for index, square in enumerate(self._squares_list)
+                                  if square is not empty_squares[index]}
+        return state
+
+    def __setstate__(self, state):
+        """Restores a game from __getstate__, pointing the squares it doesn't own at the shared empty squares."""
+        for name, value in state.items():
+            setattr(self, name, value)
+        squares = list(self._topology.empty_squares)
+        for index, square in self._squares_list.items():
+            squares[index] = square
+        self._squares_list = squares
+        self._history = []
+        self._subscribers = None
+
+    def __deepcopy__(self, memo):
+        """Returns a copy of the game for copy.deepcopy: its own squares and lists, and the shared topology."""
+        game = QuoridorGame.__new__(QuoridorGame)
+        memo[id(self)] = game
+        empty_squares = self._topology.empty_squares
+        squares = list(self._squares_list)
+        for index, square in enumerate(squares):
+            if square is not empty_squares[index]:
+                squares[index] = square_copy = Square(square.get_square_coordinate(), square.get_ortho_moves())
+                square_copy.set_pawn(square.get_pawn())
+        game._topology = self._topology
+        game._squares_list = squares
+        game._positions = list(self._positions)
+        game._turn = self._turn
+        game._game_won = self._game_won
+        game._fence_inventories = list(self._fence_inventories)
+        game._vFences = list(self._vFences)
+        game._hFences = list(self._hFences)
+        game._paths = list(self._paths)
+        game._legal_moves = self._legal_moves
+        game._history = []
+        game._hash = self._hash
+        game._subscribers = None
+        game._change_seq = self._change_seq
+        return game
 
     def get_vFences(self):
         return self._vFences
@@ -97,49 +323,103 @@ class QuoridorGame:
     def get_hFences(self):
         return self._hFences
 
+    def get_topology(self):
+        """Returns the BoardTopology of the game's configuration."""
+        return self._topology
+
+    def get_size(self):
+        """Returns the number of squares per side of the board."""
+        return self._topology.size
+
+    def get_player_count(self):
+        """Returns the number of players (2 or 4)."""
+        return self._topology.players
+
+    def get_zobrist_hash(self):
+        """Returns the 64 bit Zobrist hash of the position (pawns, fences, fence inventories and turn)."""
+        return self._hash
+
+    def compute_hash(self):
+        """Returns the Zobrist hash of the position computed from scratch. Used to set up and check the kept hash."""
+        topology = self._topology
+        zobrist_hash = topology.zobrist_turn[self._turn]
+        for player, position in enumerate(self._positions, 1):
+            zobrist_hash ^= topology.zobrist_pawn[player][topology.square_index[position]]
+            zobrist_hash ^= topology.zobrist_inventory[player][self._fence_inventories[player - 1]]
+        for fence in self._vFences:
+            zobrist_hash ^= topology.zobrist_fence["v"][topology.square_index[fence]]
+        for fence in self._hFences:
+            zobrist_hash ^= topology.zobrist_fence["h"][topology.square_index[fence]]
+        return zobrist_hash
+
     def get_game_won(self):
         return self._game_won
 
+    def get_winner(self):
+        """Returns the player who won the game, or None if the game is not won."""
+        if self._game_won:
+            goals = self._topology.goals
+            for player, position in enumerate(self._positions, 1):
+                if position in goals[player]:
+                    return player
+        return None
+
     def get_player_turn(self):
         return self._turn
 
     def create_squares(self):
         """
-        Creates instances of Squares with coordinates between (0,0) and (8,8).
-        The Square objects are saved in list attribute in the QuoridorGame class.
+        Fills the list of squares with the shared empty squares of the game's topology, with coordinates between
+        (0,0) and (size-1,size-1). A square is only copied for this game when a pawn or a fence changes it (see
+        own_square).
         Takes no parameters.
-        Returns: Square objects
-        """
-        for y in range(9):
-            for x in range(9):
-                coordinate = (x, y)
-                ortho_move_list = [
-                    (x, y - 1),  # top mid
-                    (x - 1, y),  # mid left
-                    (x + 1, y),  # mid right
-                    (x, y + 1),  # bot mid
-                ]
-                #get rid of possible moves that are not on the board
-                corrected_ortho_move_list = [coordinate for coordinate in ortho_move_list if -1 < coordinate[0] < 9 and -1 < coordinate[1] < 9]
-                self._squares_list.append(Square(coordinate, corrected_ortho_move_list))
+        """
+        self._squares_list[:] = self._topology.empty_squares
+
+    def own_square(self, coordinate):
+        """
+        Returns the Square of a coordinate after making sure it belongs to this game only, copying the shared empty
+        square if needed. Used before a square is changed. The copy replaces the shared square in the list of squares,
+        so Square objects taken from the game earlier no longer show it.
+        p1: tuple representing a coordinate on the board (x,y)
+        """
+        index = self._topology.square_index[coordinate]
+        square = self._squares_list[index]
+        if square is self._topology.empty_squares[index]:
+            square = Square(square.get_square_coordinate(), square.get_ortho_moves())
+            self._squares_list[index] = square
+        return square
+
+    def release_square(self, coordinate):
+        """
+        Puts the shared empty square back in place of this game's own square once it has no pawn and no fence.
+        p1: tuple representing a coordinate on the board (x,y)
+        """
+        topology = self._topology
+        index = topology.square_index[coordinate]
+        square = self._squares_list[index]
+        if square.get_pawn() is None and square.get_ortho_moves() is topology.ortho_moves[index]:
+            self._squares_list[index] = topology.empty_squares[index]
 
     def get_squares(self):
-        """Returns the list of squares."""
+        """
+        Returns the list of squares. Its Square objects are swapped out as pawns and fences change them (see
+        own_square), so the list is a view of the board at the time of the call: get it again after a change.
+        """
         return self._squares_list
 
     def place_pawns_in_start_position(self):
         """Places pawns in the correct starting position at the beginning of the game."""
-        p1_start_position = (4,0)
-        p2_start_position = (4,8)
-        self.find_square(p1_start_position).set_pawn(1)
-        self.find_square(p2_start_position).set_pawn(2)
+        for player, start_position in self._topology.start_positions.items():
+            self.own_square(start_position).set_pawn(player)
 
     def basic_checks(self, player, position):
         """
         Returns False if the game is won, the wrong player is moving, or the input position is not on the board.
-        p1: integer representing player that is moving (1 or 2)
+        p1: integer representing player that is moving (1 to the number of players)
         p2: position -- tuple representing the coordinate that the player wants to move-to
         """
+        last = self._topology.size - 1
         # Can't move if the game is done.
         if self._game_won is True:
             return False
@@ -150,191 +430,158 @@ class QuoridorGame:
         elif position[0] == None or position[1] == None:
             return False
         # postion must be on board
-        elif position[0] < 0 or position[0] > 8 or position[1] < 0 or position[1] > 8:
+        elif position[0] < 0 or position[0] > last or position[1] < 0 or position[1] > last:
             return False
 
     def get_position(self, player):
         """
         Returns position of a player.
-        p1: player (1 or 2)
-        returns: tuple representing player 1 or player 2 position
+        p1: player (1 to the number of players)
+        returns: tuple representing the player's position
         """
-        if player == 1:
-            return self._p1_position
-        else:
-            return self._p2_position
+        return self._positions[player - 1]
 
     def get_other_player_position(self, player):
         """
-        Given a player as a parameter, the function returns the opponent's position.
+        Given a player as a parameter, the function returns the opponent's position. With four players it is the
+        position of the player who moves next.
         """
-        if player == 1:
-            return self._p2_position
-        else:
-            return self._p1_position
+        return self._positions[player % self._topology.players]
 
     def set_pawn_position(self, player, new_position):
         """
         Places pawn in correct position and updates current and former positions.
-        p1: player (1 or 2)
+        p1: player (1 to the number of players)
         p2: position that pawn is moving to
         """
         current_position = self.get_position(player)
-        old_square = self.find_square(current_position)
+        old_square = self.own_square(current_position)
         old_square.remove_pawn()
-        new_square = self.find_square(new_position)
+        self.release_square(current_position)
+        new_square = self.own_square(new_position)
         new_square.set_pawn(player)
-        if player == 1:
-            self._p1_position = new_position
+        square_index, zobrist_pawn = self._topology.square_index, self._topology.zobrist_pawn[player]
+        self._hash ^= zobrist_pawn[square_index[current_position]] ^ zobrist_pawn[square_index[new_position]]
+        #A pawn that moves along its cached shortest path keeps the rest of the path, otherwise it is found again later
+        path = self.get_cached_path(player)
+        if path is not None and new_position in path:
+            path = path[path.index(new_position):]
         else:
-            self._p2_position = new_position
+            path = None
+        self._positions[player - 1] = new_position
+        self._paths[player - 1] = path
 
     def find_square(self, coordinate):
         """
-        Returns the Square object of a given coordinate parameter.
+        Returns the Square object of a given coordinate parameter, or None if the coordinate is not on the board. The
+        square may be swapped out by the next change to the game (see own_square).
         p1: tuple representing a coordinate on the board (x,y)
         """
-        for square in self._squares_list:
-            if coordinate == square.get_square_coordinate():
-                return square
+        index = self._topology.square_index.get(coordinate)
+        if index is not None:
+            return self._squares_list[index]
 
     def is_winner(self, player):
         """
         Returns boolean if input player is a winner.
-        p1: player (1 or 2)
+        p1: player (1 to the number of players)
         """
-        if player < 1 or player > 2:
+        if player < 1 or player > self._topology.players:
             return "Please enter a correct player"
-        if player == 1:
-            if self._p1_position in self._p2_baseline:
-                self._game_won = True
-                return True
-        if player == 2:
-            if self._p2_position in self._p1_baseline:
-                self._game_won = True
-                return True
+        if self._positions[player - 1] in self._topology.goals[player]:
+            self._game_won = True
+            return True
         return False
 
     def set_fence_inventory(self, player):
         """
         Decreases the amount of fences available to a player. Method is used after other methods that have placed a
         fence on the board.
-        p1: player (1 or 2)
+        p1: player (1 to the number of players)
         """
-        if player == 1:
-            self._p1_fence_inventory -= 1
-        else:
-            self._p2_fence_inventory -= 1
+        inventory = self.get_fence_inventory(player)
+        zobrist_inventory = self._topology.zobrist_inventory[player]
+        self._hash ^= zobrist_inventory[inventory] ^ zobrist_inventory[inventory - 1]
+        self._fence_inventories[player - 1] -= 1
 
     def fence_inventory(self, player):
         """
         Returns a boolean whether a player has a fence available to use.
-        p1: player (1 or 2)
+        p1: player (1 to the number of players)
         """
-        if player == 1:
-            if self._p1_fence_inventory > 0:
-                return True
-            else:
-                return False
-        elif player == 2:
-            if self._p2_fence_inventory > 0:
-                return True
-            else:
-                return False
+        if self._fence_inventories[player - 1] > 0:
+            return True
+        else:
+            return False
 
     def get_fence_inventory(self, player):
         """
         Returns inventory of a player's fence
-        p1: player (1 or 2)
+        p1: player (1 to the number of players)
         """
-        if player == 1:
-            return self._p1_fence_inventory
-        else:
-            return self._p2_fence_inventory
+        return self._fence_inventories[player - 1]
 
     def set_player_turn(self, player):
         """
-        Switches whose turn it is. If player 1 is entered, then player 2 is set next to player and vice versa.
-        p1: player (1 or 2)
+        Switches whose turn it is to the player after the input player: 1 to 2 and 2 to 1 with two players, 1 to 2 to
+        3 to 4 and back to 1 with four players.
+        p1: player (1 to the number of players)
         """
-        if player == 1:
-            self._turn = 2
-        else:
-            self._turn = 1
+        turn = self._turn
+        self._turn = player % self._topology.players + 1
+        zobrist_turn = self._topology.zobrist_turn
+        self._hash ^= zobrist_turn[turn] ^ zobrist_turn[self._turn]
 
     def is_vadjacent(self, player):
         """
-        Returns an updated list of possible moves if two pawns are vertically adjacent to one another.
-        Preconditions scenario 1: Jump is blocked
+        Returns an updated tuple of possible moves if the pawn is vertically adjacent to other pawns.
+        Preconditions scenario 1: Jump is blocked (by a fence, the edge of the board or a pawn behind the other pawn)
         Postconditions scenario 1: Return combination of the two's pawn's possible moves
         Preconditions scenario 2: Jump is not blocked
         Postconditions scenario 2: Return the pawn's current possible moves along with the jump-to coordinate
-        p1: player that is moving (1 or 2)
+        p1: player that is moving (1 to the number of players)
         """
         current_coordinates = self.get_position(player)
         current_square = self.find_square(current_coordinates)
-        current_basic_moves = current_square.get_ortho_moves()
-        other_player_position = self.get_other_player_position(player)
-        other_player_square = self.find_square(other_player_position)
-        other_player_possible_moves = other_player_square.get_ortho_moves()
-        x_difference = current_coordinates[0] - other_player_position[0]
-        y_difference = current_coordinates[1] - other_player_position[1]
-
-        if x_difference == 0 and y_difference == 1:
-            #If jump is blocked, then return the combination of the two pawn's possible moves
-            if (current_coordinates[0], current_coordinates[1] - 2) not in other_player_possible_moves:
-                updated_moves = current_basic_moves + other_player_possible_moves
-                return updated_moves
-            else:
-                #If jump is not blocked, then return the current pawn's moves with the jump move.
-                updated_moves = current_basic_moves + [(current_coordinates[0], current_coordinates[1] - 2)]
-                return updated_moves
-
-        if x_difference == 0 and y_difference == -1:
-            if (current_coordinates[0], current_coordinates[1] + 2) not in other_player_possible_moves:
-                updated_moves = [current_basic_moves] + other_player_possible_moves
-                return updated_moves
-            else:
-                updated_moves = current_basic_moves + [(current_coordinates[0], current_coordinates[1] + 2)]
-                return updated_moves
-        return current_basic_moves
+        updated_moves = current_square.get_ortho_moves()
+        for other_player_position in self._positions:
+            x_difference = current_coordinates[0] - other_player_position[0]
+            y_difference = current_coordinates[1] - other_player_position[1]
+            if x_difference == 0 and (y_difference == 1 or y_difference == -1):
+                other_player_possible_moves = self.find_square(other_player_position).get_ortho_moves()
+                jump = (current_coordinates[0], current_coordinates[1] - 2 * y_difference)
+                #If jump is blocked, then add the other pawn's possible moves
+                if jump not in other_player_possible_moves or jump in self._positions:
+                    updated_moves = updated_moves + other_player_possible_moves
+                else:
+                    #If jump is not blocked, then add the jump move.
+                    updated_moves = updated_moves + (jump,)
+        return updated_moves
 
 
     def is_hadjacent(self, player):
         """
-        Returns an updated list of possible moves if two pawns are horizontally adjacent to one another.
-        Preconditions scenario 1: Jump is blocked
+        Returns an updated tuple of possible moves if the pawn is horizontally adjacent to other pawns.
+        Preconditions scenario 1: Jump is blocked (by a fence, the edge of the board or a pawn behind the other pawn)
         Postconditions scenario 1: Return combination of the two's pawn's possible moves
         Preconditions scenario 2: Jump is not blocked
         Postconditions scenario 2: Return the pawn's current possible moves along with the jump-to coordinate
-        p1: player that is moving (1 or 2)
+        p1: player that is moving (1 to the number of players)
         """
         current_coordinates = self.get_position(player)
         current_square = self.find_square(current_coordinates)
-        current_basic_moves = current_square.get_ortho_moves()
-        other_player_position = self.get_other_player_position(player)
-        other_player_square = self.find_square(other_player_position)
-        other_player_possible_moves = other_player_square.get_ortho_moves()
-
-        x_difference = current_coordinates[0] - other_player_position[0]
-        y_difference = current_coordinates[1] - other_player_position[1]
-        if x_difference == 1 and y_difference == 0:
-            if (current_coordinates[0] - 2, current_coordinates[1]) not in other_player_possible_moves:
-                updated_moves = current_basic_moves + other_player_possible_moves
-                return updated_moves
-            else:
-                updated_moves = current_basic_moves + [(current_coordinates[0] - 2, current_coordinates[1])]
-                return updated_moves
-
-        if x_difference == -1 and y_difference == 0:
-            if (current_coordinates[0] + 2, current_coordinates[1]) not in other_player_possible_moves:
-                updated_moves = [current_basic_moves] + other_player_possible_moves
-                return updated_moves
-            else:
-                updated_moves = current_basic_moves + [(current_coordinates[0] + 2, current_coordinates[1])]
-                return updated_moves
-
-        return current_basic_moves
+        updated_moves = current_square.get_ortho_moves()
+        for other_player_position in self._positions:
+            x_difference = current_coordinates[0] - other_player_position[0]
+            y_difference = current_coordinates[1] - other_player_position[1]
+            if y_difference == 0 and (x_difference == 1 or x_difference == -1):
+                other_player_possible_moves = self.find_square(other_player_position).get_ortho_moves()
+                jump = (current_coordinates[0] - 2 * x_difference, current_coordinates[1])
+                if jump not in other_player_possible_moves or jump in self._positions:
+                    updated_moves = updated_moves + other_player_possible_moves
+                else:
+                    updated_moves = updated_moves + (jump,)
+        return updated_moves
 
     def basic_possible_moves(self, player, move_to_position):
         """
@@ -342,23 +589,15 @@ class QuoridorGame:
         Methods used: is_vadjacent, is_hadajacent, find_square, get_ortho_moves, get_position
         p1: coordinates of desired move-to position
         """
-        current_coordinates = self.get_position(player)
-        current_square = self.find_square(current_coordinates)
-        current_basic_moves = current_square.get_ortho_moves()
-        other_player_position = self.get_other_player_position(player)
-        other_player_square = self.find_square(other_player_position)
-        other_player_possible_moves = other_player_square.get_ortho_moves()
-        is_vadjacent = self.is_vadjacent(player)
-        is_hadjacent = self.is_hadjacent(player)
-
-        #Can't move pawn to it's current space or the other pawn's space.
-        if move_to_position == self._p1_position or move_to_position == self._p2_position:
+        #Can't move pawn to it's current space or another pawn's space.
+        if move_to_position in self._positions:
             return False
-
         #If new position is in the list of current basic moves for the square that the pawn is currently on, return True
+        current_basic_moves = self.find_square(self.get_position(player)).get_ortho_moves()
         if move_to_position in current_basic_moves:
             return True
-        elif move_to_position in is_vadjacent or move_to_position in is_hadjacent:
+        #Only look for jumps once the simple orthogonal moves have been ruled out
+        elif move_to_position in self.is_vadjacent(player) or move_to_position in self.is_hadjacent(player):
             return True
         else:
             return False
@@ -377,9 +616,13 @@ class QuoridorGame:
 
         #Check to see if basic move to position is valid. If it is, set the pawn to new position and switch turns.
         if self.basic_possible_moves(player, move_to_position) is True:
+            from_position = self._positions[player - 1]
             self.set_pawn_position(player, move_to_position)
             self.set_player_turn(player)
             self.is_winner(player)
+            self._legal_moves = None
+            if self._subscribers:
+                self.publish_change({"action": "move", "player": player, "pawn": (from_position, move_to_position)})
             return True
         else:
             return False
@@ -389,7 +632,7 @@ class QuoridorGame:
         """
         Returns False if placement of the fence is incorrect. Uses basic_checks method to determine if input parameters
         are correct.
-        p1: player (input as number 1 or 2)
+        p1: player (input as number 1 to the number of players)
         p2: coordinate of the position where the fence wants to be placed (tuple, (x,y))
         p3: "v" or "h" (for a vertically placed fence or horizontally placed fence)
         """
@@ -397,14 +640,15 @@ class QuoridorGame:
             return False
 
         #position can't be in the first column if "v" and position can't be in first row if "h"
-        if (position in self._first_column and vertical_or_horizontal == "v") or (position in self._first_row and vertical_or_horizontal == "h"):
+        edge = self._topology.fence_edges.get((vertical_or_horizontal, position))
+        if edge is None:
             return False
 
         #Inventory must be greater than 0 to place a fence
         if self.fence_inventory(player) is False:
             return False
-        #Cant place fence where there is already one
-        if (vertical_or_horizontal == "v" and position in self._vFences) or (vertical_or_horizontal == "h" and position in self._hFences):
+        #Cant place fence where there is already one (its edge is already cut)
+        if edge[0] not in self._squares_list[self._topology.square_index[position]].get_ortho_moves():
             return False
 
 
@@ -412,7 +656,7 @@ class QuoridorGame:
         """
         Method that places a fence after using other methods to determine if fence placement is correct.
         The fence is placed on the top right corner of the square and extends down for "v" or to the right for "h".
-        p1: 1 or 2 for the player.
+        p1: 1 to the number of players for the player.
         p2: "v" or "h" for vertical or horizontal placement
         p3: tuple (x,y) coordinate of where the fence wants to be placed
         """
@@ -420,33 +664,392 @@ class QuoridorGame:
         #check valid parameters
         if self.fence_checks(player, position, vertical_or_horizontal) is False:
             return False
+        if vertical_or_horizontal != "v" and vertical_or_horizontal != "h":
+            return False
+
+        #A fence can't take away every path of any player to their goal
+        paths = self.paths_after_fence(self.fence_edge(vertical_or_horizontal, position))
+        if paths is None:
+            return False
+        self._paths = paths
 
         #find the square of corresponding coordinates
-        square = self.find_square(position)
+        square = self.own_square(position)
 
         #If fence placement is possible, update the list of fences and possible position in those blocked positions
+        self._hash ^= self._topology.zobrist_fence[vertical_or_horizontal][self._topology.square_index[position]]
         if vertical_or_horizontal == "v":
             self._vFences += [position]
             square.set_fences("v", (position[0]-1, position[1]))
-            adjacent = self.find_square((position[0] - 1, position[1]))
+            adjacent = self.own_square((position[0] - 1, position[1]))
             adjacent.set_fences("v", position)
             self.set_fence_inventory(player)
             self.set_player_turn(player)
+            self._legal_moves = None
+            if self._subscribers:
+                self.publish_change({"action": "fence", "player": player, "fence": (vertical_or_horizontal, position)})
             return True
 
         elif vertical_or_horizontal == "h":
             self._hFences += [position]
             square.set_fences("h", (position[0], position[1]-1))
-            adjacent = self.find_square((position[0], position[1]-1))
+            adjacent = self.own_square((position[0], position[1]-1))
             adjacent.set_fences("h", position)
             self.set_fence_inventory(player)
             self.set_player_turn(player)
+            self._legal_moves = None
+            if self._subscribers:
+                self.publish_change({"action": "fence", "player": player, "fence": (vertical_or_horizontal, position)})
             return True
         else:
             return False
 
 
+    def get_goal(self, player):
+        """
+        Returns the tuple of squares that a player must reach to win (the side of the board opposite their start).
+        p1: player (1 to the number of players)
+        """
+        return self._topology.goals[player]
+
+    def get_cached_path(self, player):
+        """Returns the cached shortest path of a player, or None if it has not been found yet."""
+        return self._paths[player - 1]
+
+    def find_path(self, player, blocked_edge=None):
+        """
+        Returns a shortest path of a player to their goal as a list of coordinates that starts with the pawn's
+        position, or None if there is no path. Pawns never block a path. Uses a breadth first search.
+        p1: player (1 to the number of players)
+        p2: optional pair of adjacent coordinates that is treated as if a fence was between them
+        """
+        start = self.get_position(player)
+        goal = self.get_goal(player)
+        if blocked_edge is not None:
+            blocked_from, blocked_to = blocked_edge
+        else:
+            blocked_from = blocked_to = None
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            coordinate = queue.popleft()
+            if coordinate in goal:
+                path = []
+                while coordinate is not None:
+                    path.append(coordinate)
+                    coordinate = parents[coordinate]
+                path.reverse()
+                return path
+            for move in self.find_square(coordinate).get_ortho_moves():
+                if move in parents:
+                    continue
+                if (coordinate == blocked_from and move == blocked_to) or (coordinate == blocked_to and move == blocked_from):
+                    continue
+                parents[move] = coordinate
+                queue.append(move)
+        return None
+
+    def get_shortest_path(self, player):
+        """
+        Returns a shortest path of a player to their goal (see find_path). The path is cached until a pawn move or a
+        fence makes it invalid.
+        p1: player (1 to the number of players)
+        """
+        path = self.get_cached_path(player)
+        if path is None:
+            path = self.find_path(player)
+            self._paths[player - 1] = path
+        return path
+
+    def fence_edge(self, vertical_or_horizontal, position):
+        """
+        Returns the pair of adjacent coordinates that a fence separates (see BoardTopology). A "v" fence separates a
+        square from the square to its left and an "h" fence separates a square from the square above it.
+        p1: "v" or "h"
+        p2: tuple (x,y) coordinate of a fence slot
+        """
+        return self._topology.fence_edges[vertical_or_horizontal, position]
+
+    def paths_after_fence(self, edge):
+        """
+        Returns the shortest paths of every player, in order, after a fence cuts edge, or None if the fence would leave
+        a player without a path to their goal. Only a player whose cached path crosses the edge is searched again.
+        p1: pair of adjacent coordinates separated by the fence
+        """
+        paths = []
+        for player in range(1, self._topology.players + 1):
+            path = self.get_shortest_path(player)
+            if path_uses_edge(path, edge):
+                path = self.find_path(player, edge)
+                if path is None:
+                    return None
+            paths.append(path)
+        return paths
+
+    def possible_pawn_moves(self, player):
+        """
+        Returns the list of coordinates that a player's pawn can move to, using the same rules as
+        basic_possible_moves (orthogonal moves, jumps and the moves allowed when a jump is blocked).
+        p1: player (1 to the number of players)
+        """
+        moves = []
+        for move in self.find_square(self.get_position(player)).get_ortho_moves() + self.is_vadjacent(player) + self.is_hadjacent(player):
+            if move not in self._positions and move not in moves:
+                moves.append(move)
+        return moves
+
+    def iter_legal_fences(self, player):
+        """
+        Generates every fence the player to move can place as ("v" or "h", (x,y)) without changing the game.
+        A fence is legal if it passes fence_checks and leaves every pawn a path to its goal.
+        p1: player (1 to the number of players)
+        """
+        if not self.fence_inventory(player):
+            return
+        squares = self._squares_list
+        square_index = self._topology.square_index
+        for slot, edge in self._topology.fence_edges.items():
+            #Skip slots that are taken (their edge is already cut)
+            if edge[0] not in squares[square_index[edge[1]]].get_ortho_moves():
+                continue
+            if self.paths_after_fence(edge) is not None:
+                yield slot
+
+    def iter_legal_moves(self, player):
+        """
+        Generates every legal action of a player without changing the game. Pawn moves come first as ("p", (x,y)),
+        followed by fences as ("v", (x,y)) or ("h", (x,y)). Nothing is generated if the game is won or it is not the
+        player's turn. The game must not be changed while the generator is in use.
+        p1: player (1 to the number of players)
+        """
+        if self._legal_moves is not None and self._turn == player:
+            yield from self._legal_moves
+            return
+        if self._game_won is True or self._turn != player:
+            return
+        for move in self.possible_pawn_moves(player):
+            yield "p", move
+        yield from self.iter_legal_fences(player)
+
+    def legal_moves(self, player):
+        """
+        Returns a tuple of every legal action of a player (see iter_legal_moves). The result is computed once per
+        position and cached until the next pawn move or fence.
+        p1: player (1 to the number of players)
+        """
+        if self._game_won is True or self._turn != player:
+            return ()
+        if self._legal_moves is None:
+            self._legal_moves = tuple(self.iter_legal_moves(player))
+        return self._legal_moves
 
+    def apply(self, action):
+        """
+        Makes an action for the player to move and remembers it so that it can be reverted with undo.
+        Returns True if the action was legal and was made, False otherwise.
+        p1: action as returned by legal_moves -- ("p", (x,y)) moves the pawn, ("v", (x,y)) or ("h", (x,y)) places a
+        fence
+        """
+        kind, position = action
+        player = self._turn
+        previous_position = self.get_position(player)
+        record = (kind, position, player, previous_position, self._game_won, tuple(self._paths), self._legal_moves,
+                  self._hash)
+        if kind == "p":
+            made = self.move_pawn(player, position)
+        else:
+            made = self.place_fence(player, kind, position)
+        if made:
+            self._history.append(record)
+        return made
 
+    def undo(self):
+        """
+        Reverts the last action made with apply: pawn position, turn, winner, fence inventory, fence lists and the
+        possible moves of the squares next to a fence are restored, along with the cached paths, legal moves and hash.
+        Returns the action that was reverted, or None if there is nothing to undo.
+        """
+        if not self._history:
+            return None
+        kind, position, player, previous_position, game_won, paths, legal_moves, zobrist_hash = self._history.pop()
+        if kind == "p":
+            change = {"action": "undo", "player": player, "pawn": (position, previous_position)}
+            self.set_pawn_position(player, previous_position)
+        else:
+            change = {"action": "undo", "player": player, "fence": (kind, position)}
+            self.remove_fence(kind, position)
+            self._fence_inventories[player - 1] += 1
+        self._turn = player
+        self._game_won = game_won
+        self._paths = list(paths)
+        self._legal_moves = legal_moves
+        self._hash = zobrist_hash
+        if self._subscribers:
+            self.publish_change(change)
+        return kind, position
+
+    def add_fence(self, vertical_or_horizontal, position):
+        """
+        Puts a fence in a slot without any checks: records it and cuts its edge. The hash, inventories and cached paths
+        are left to the caller.
+        p1: "v" or "h"
+        p2: tuple (x,y) coordinate of a free fence slot
+        """
+        blocked, position = self.fence_edge(vertical_or_horizontal, position)
+        if vertical_or_horizontal == "v":
+            self._vFences.append(position)
+        else:
+            self._hFences.append(position)
+        self.own_square(position).remove_ortho_moves(blocked)
+        self.own_square(blocked).remove_ortho_moves(position)
+
+    def remove_fence(self, vertical_or_horizontal, position):
+        """
+        Takes a fence off the board without any checks: forgets it and opens its edge again. The hash, inventories and
+        cached paths are left to the caller.
+        p1: "v" or "h"
+        p2: tuple (x,y) coordinate of a placed fence
+        """
+        blocked, position = self.fence_edge(vertical_or_horizontal, position)
+        if vertical_or_horizontal == "v":
+            self._vFences.remove(position)
+        else:
+            self._hFences.remove(position)
+        square_index, ortho_moves = self._topology.square_index, self._topology.ortho_moves
+        self.own_square(position).add_ortho_move(blocked, ortho_moves[square_index[position]])
+        self.own_square(blocked).add_ortho_move(position, ortho_moves[square_index[blocked]])
+        self.release_square(position)
+        self.release_square(blocked)
+
+    def subscribe(self, callback):
+        """
+        Starts sending changes to callback: after every successful move_pawn, place_fence and undo it is called with a
+        change event, a dict that must not be modified:
+        "seq" -- number of the change, counting from 1 for each game (see get_change_seq)
+        "action" -- "move", "fence" or "undo"
+        "player" -- player who made the action (or whose action was undone)
+        "pawn" -- (from, to) coordinates of a pawn that moved
+        "fence" -- ("v" or "h", (x,y)) of a fence that was placed, or taken back by an undo
+        "inventory" -- fences left of the player, after a fence change
+        "turn" -- player to move after the change
+        "winner" -- player who won, only once the game is won
+        A game without subscribers doesn't make any events. Returns callback.
+        p1: function of one argument
+        """
+        if self._subscribers is None:
+            self._subscribers = []
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stops sending changes to a callback given to subscribe."""
+        if self._subscribers is not None and callback in self._subscribers:
+            self._subscribers.remove(callback)
+            if not self._subscribers:
+                self._subscribers = None
+
+    def get_change_seq(self):
+        """Returns the number of the last change event sent to subscribers (0 before the first)."""
+        return self._change_seq
+
+    def publish_change(self, change):
+        """Completes a change event made by an action (see subscribe) and sends it to every subscriber."""
+        self._change_seq += 1
+        change["seq"] = self._change_seq
+        change["turn"] = self._turn
+        if "fence" in change:
+            change["inventory"] = self._fence_inventories[change["player"] - 1]
+        if self._game_won:
+            change["winner"] = self.get_winner()
+        for callback in tuple(self._subscribers):
+            callback(change)
+
+    def get_snapshot(self):
+        """
+        Returns the whole state of the game as a dict of plain values (JSON can encode it): "seq" (the last change
+        event sent, see subscribe), "size", "players", "fences" (fences per player at the start), "positions",
+        "v_fences" and "h_fences" in the order they were placed, "inventories", "turn" and "winner" (None if the game
+        is not won). from_snapshot rebuilds the game, and apply_change then keeps it up to date.
+        """
+        topology = self._topology
+        return {"seq": self._change_seq, "size": topology.size, "players": topology.players,
+                "fences": topology.fences, "positions": list(self._positions), "v_fences": list(self._vFences),
+                "h_fences": list(self._hFences), "inventories": list(self._fence_inventories), "turn": self._turn,
+                "winner": self.get_winner()}
+
+    def restore_snapshot(self, snapshot):
+        """
+        Puts a new game in the state of a snapshot made by get_snapshot (see from_snapshot). The actions that led
+        there are not known, so they can't be undone.
+        """
+        for position in self._positions:
+            self.own_square(position).remove_pawn()
+            self.release_square(position)
+        self._positions = [tuple(position) for position in snapshot["positions"]]
+        for player, position in enumerate(self._positions, 1):
+            self.own_square(position).set_pawn(player)
+        for vertical_or_horizontal, fences in (("v", snapshot["v_fences"]), ("h", snapshot["h_fences"])):
+            for position in fences:
+                self.add_fence(vertical_or_horizontal, tuple(position))
+        self._fence_inventories = list(snapshot["inventories"])
+        self._turn = snapshot["turn"]
+        self._game_won = snapshot["winner"] is not None
+        self._paths = [None] * self._topology.players
+        self._legal_moves = None
+        self._change_seq = snapshot["seq"]
+        self._hash = self.compute_hash()
+
+    def apply_change(self, change):
+        """
+        Brings the game up to date with a change event of another game (see subscribe), without checking the rules.
+        Coordinates may be lists, as after a trip through JSON. Raises ValueError if the change doesn't follow the last
+        one applied (a change was missed).
+        p1: change event dict
+        """
+        if change["seq"] != self._change_seq + 1:
+            raise ValueError("expected change %d, got %d" % (self._change_seq + 1, change["seq"]))
+        player = change["player"]
+        if "pawn" in change:
+            self.set_pawn_position(player, tuple(change["pawn"][1]))
+        if "fence" in change:
+            vertical_or_horizontal, position = change["fence"][0], tuple(change["fence"][1])
+            if change["action"] == "undo":
+                self.remove_fence(vertical_or_horizontal, position)
+            else:
+                self.add_fence(vertical_or_horizontal, position)
+            self._fence_inventories[player - 1] = change["inventory"]
+            self._paths = [None] * self._topology.players
+        self._turn = change["turn"]
+        self._game_won = change.get("winner") is not None
+        self._legal_moves = None
+        self._change_seq = change["seq"]
+        self._hash = self.compute_hash()
+
+
+def from_snapshot(snapshot):
+    """
+    Returns a new QuoridorGame in the state of a snapshot made by QuoridorGame.get_snapshot, for example to follow a
+    game with its change events (QuoridorGame.subscribe and apply_change).
+    """
+    game = QuoridorGame(snapshot["size"], snapshot["players"], snapshot["fences"])
+    game.restore_snapshot(snapshot)
+    return game
+
+
+def path_uses_edge(path, edge):
+    """
+    Returns True if two consecutive coordinates of path are the two coordinates of edge.
+    p1: list of coordinates
+    p2: pair of adjacent coordinates
+    """
+    first, second = edge
+    if first not in path:
+        return False
+    index = path.index(first)
+    return (index + 1 < len(path) and path[index + 1] == second) or (index > 0 and path[index - 1] == second)
 
 
+#QUORIDOR_INSTRUMENT turns on the call counters and rejection reasons of instrument.py for the whole process
+if os.environ.get("QUORIDOR_INSTRUMENT"):
+    import instrument
+    instrument.enable_from_environment(os.environ["QUORIDOR_INSTRUMENT"])
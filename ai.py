@@ -0,0 +1,344 @@
+#Description: Computer opponent for Quoridor. AlphaBetaPlayer runs a negamax search with alpha-beta pruning and
+#iterative deepening on a QuoridorGame, using apply/undo to explore moves and stopping when its time budget is used up.
+#Search results are kept in a transposition table so positions reached through different move orders are searched once.
+#Positions in which neither player has a fence left are not searched: their exact result comes from an endgame
+#tablebase (see endgame.py).
+
+import random
+import time
+
+import Quoridor as q
+import endgame
+import transposition
+
+
+WIN_SCORE = 100000 #score of a won position, reduced by the number of plies it takes to get there
+DISTANCE_WEIGHT = 10 #value of being one step closer to the goal than the other player
+FENCE_WEIGHT = 3 #value of having one more fence than the other player
+PROVEN_SCORE = WIN_SCORE - 1000 #scores beyond this are wins or losses a number of plies away
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is used up."""
+
+
+def evaluate(game, player):
+    """
+    Returns the score of a position for a player: the difference of the shortest path distances to the goal plus the
+    difference of the fences left, weighted by DISTANCE_WEIGHT and FENCE_WEIGHT.
+    p1: QuoridorGame object
+    p2: player (1 or 2) the score is for
+    """
+    other = 3 - player
+    distance = len(game.get_shortest_path(player))
+    other_distance = len(game.get_shortest_path(other))
+    fences = game.get_fence_inventory(player) - game.get_fence_inventory(other)
+    return DISTANCE_WEIGHT * (other_distance - distance) + FENCE_WEIGHT * fences
+
+
+def score_to_table(score, ply):
+    """Returns a win or loss score counted from the current position rather than from the root, for storing."""
+    if score > PROVEN_SCORE:
+        return score + ply
+    if score < -PROVEN_SCORE:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """Returns a win or loss score read from the transposition table counted from the root again."""
+    if score > PROVEN_SCORE:
+        return score - ply
+    if score < -PROVEN_SCORE:
+        return score + ply
+    return score
+
+
+def endgame_score(result, ply):
+    """
+    Returns the search score of an exact endgame result for the player to move, counted from the root like the score
+    of a won position.
+    p1: result of endgame.EndgameTablebase.probe (plies to a win if positive, to a loss if negative, 0 for a draw)
+    p2: ply of the position below the root
+    """
+    if result > 0:
+        return WIN_SCORE - (ply + result)
+    if result < 0:
+        return -(WIN_SCORE - (ply - result))
+    return 0
+
+
+def order_moves(game, player, moves, first=None):
+    """
+    Returns the moves sorted so that the most promising ones are searched first: the given first move, then the
+    pawn move along the player's shortest path, then fences that cut the other player's shortest path, then other
+    pawn moves and finally the remaining fences.
+    p1: QuoridorGame object
+    p2: player (1 or 2) that is moving
+    p3: list of legal actions
+    p4: optional action to search first (the best move of the previous iteration)
+    """
+    path = game.get_shortest_path(player)
+    next_square = path[1] if len(path) > 1 else None
+    other_path = game.get_shortest_path(3 - player)
+    ranked = []
+    for action in moves:
+        kind, position = action
+        if action == first:
+            rank = 0
+        elif kind == "p":
+            rank = 1 if position == next_square else 3
+        elif q.path_uses_edge(other_path, game.fence_edge(kind, position)):
+            rank = 2
+        else:
+            rank = 4
+        ranked.append((rank, action))
+    ranked.sort(key=lambda item: item[0])
+    return [action for rank, action in ranked]
+
+
+class RandomPlayer:
+    """Computer player that picks a legal action uniformly at random."""
+    def __init__(self, seed=None):
+        """p1: seed -- seed of the random number generator"""
+        self._random = random.Random(seed)
+
+    def choose_move(self, game):
+        """Returns a random legal action of the player to move, or None if there is none."""
+        moves = game.legal_moves(game.get_player_turn())
+        if not moves:
+            return None
+        return self._random.choice(moves)
+
+
+class GreedyPlayer:
+    """
+    Computer player that never places fences and always moves its pawn to the square with the shortest path to its
+    goal. Ties are broken at random.
+    """
+    def __init__(self, seed=None):
+        """p1: seed -- seed of the random number generator"""
+        self._random = random.Random(seed)
+
+    def choose_move(self, game):
+        """Returns the pawn move of the player to move that leaves it closest to its goal."""
+        player = game.get_player_turn()
+        best_moves, best_distance = [], None
+        for action in game.legal_moves(player):
+            if action[0] != "p":
+                continue
+            game.apply(action)
+            distance = len(game.get_shortest_path(player))
+            game.undo()
+            if best_distance is None or distance < best_distance:
+                best_moves, best_distance = [action], distance
+            elif distance == best_distance:
+                best_moves.append(action)
+        if not best_moves:
+            return None
+        return self._random.choice(best_moves)
+
+
+class AlphaBetaPlayer:
+    """
+    Computer player that picks a move with an iterative deepening negamax alpha-beta search. Each call to choose_move
+    searches one ply deeper at a time until time_budget seconds have passed or max_depth is reached. Plays two player
+    games on a board of any size.
+    """
+    def __init__(self, time_budget=1.0, max_depth=20, table=None, tablebase=None):
+        """
+        p1: time_budget -- seconds that one call to choose_move may take
+        p2: max_depth -- deepest iteration that is searched
+        p3: table -- TranspositionTable to use, a new 16 MB table by default. Kept between moves.
+        p4: tablebase -- endgame.EndgameTablebase to use, a new one kept in memory by default. Kept between moves.
+        """
+        self._time_budget = time_budget
+        self._max_depth = max_depth
+        self._table = table if table is not None else transposition.TranspositionTable()
+        self._tablebase = tablebase if tablebase is not None else endgame.EndgameTablebase()
+        self._deadline = None
+        self._nodes = 0
+        self._search_info = {}
+
+    def get_search_info(self):
+        """
+        Returns statistics of the last search: the move, its score, the deepest completed depth, the number of nodes,
+        the time taken in seconds, the nodes per second, the transposition table counters and the exact endgame result
+        (None unless the position was an endgame, which is answered without a search).
+        """
+        return self._search_info
+
+    def format_search_info(self):
+        """Returns the statistics of the last search as a line of text."""
+        info = self._search_info
+        if info["endgame"] is not None:
+            return "move %s endgame result %+d plies time %.3fs" % (info["move"], info["endgame"], info["time"])
+        return "move %s score %d depth %d nodes %d time %.3fs %.0f nodes/s tt hit rate %.2f" % (
+            info["move"], info["score"], info["depth"], info["nodes"], info["time"], info["nodes_per_second"],
+            info["table"]["hit_rate"])
+
+    def choose_move(self, game, time_budget=None):
+        """
+        Returns the best action found for the player to move, or None if the player has no legal action. The game is
+        explored with apply/undo and is left unchanged.
+        p1: QuoridorGame object
+        p2: time_budget -- seconds this call may take instead of the player's time budget
+        """
+        player = game.get_player_turn()
+        moves = list(game.legal_moves(player))
+        start = time.perf_counter()
+        self._deadline = start + (time_budget if time_budget is not None else self._time_budget)
+        self._nodes = 0
+        self._table.new_search()
+        if not moves:
+            return None
+
+        proven = self._tablebase.best_move(game)
+        if proven is not None:
+            move, result = proven
+            self._search_info = {
+                "move": move,
+                "score": endgame_score(result, 0),
+                "depth": 0,
+                "nodes": 0,
+                "time": time.perf_counter() - start,
+                "nodes_per_second": 0.0,
+                "table": self._table.get_stats(),
+                "endgame": result,
+            }
+            return move
+
+        best_move, best_score, depth_reached = order_moves(game, player, moves)[0], -WIN_SCORE, 0
+        for depth in range(1, self._max_depth + 1):
+            try:
+                move, score = self.search_root(game, player, moves, depth, best_move)
+            except SearchTimeout:
+                break
+            best_move, best_score, depth_reached = move, score, depth
+            #A proven win or loss won't change with a deeper search
+            if abs(score) >= WIN_SCORE - self._max_depth:
+                break
+
+        elapsed = time.perf_counter() - start
+        self._search_info = {
+            "move": best_move,
+            "score": best_score,
+            "depth": depth_reached,
+            "nodes": self._nodes,
+            "time": elapsed,
+            "nodes_per_second": self._nodes / elapsed if elapsed > 0 else 0.0,
+            "table": self._table.get_stats(),
+            "endgame": None,
+        }
+        return best_move
+
+    def new_game(self):
+        """
+        Gets the player ready for another game. The transposition table starts a new search generation, so the entries
+        of earlier games are replaced first, and the endgame tablebase is kept, as its results are exact.
+        """
+        self._table.new_search()
+
+    def get_time_budget(self):
+        """Returns the seconds that one call to choose_move may take."""
+        return self._time_budget
+
+    def set_deadline(self, deadline):
+        """
+        Changes when the running search stops, as a time.perf_counter() value. Meant to be called from another thread
+        than the one searching: a deadline in the past makes choose_move return the best move of the deepest
+        iteration it completed.
+        """
+        self._deadline = deadline
+
+    def predict_move(self, game):
+        """
+        Returns the action the player to move is expected to make: the best move stored for the position by an earlier
+        search, or else the first move of order_moves. Returns None if the player has no legal action.
+        p1: QuoridorGame object
+        """
+        player = game.get_player_turn()
+        moves = game.legal_moves(player)
+        if not moves:
+            return None
+        entry = self._table.probe(game.get_zobrist_hash())
+        if entry is not None and entry[3] in moves:
+            return entry[3]
+        return order_moves(game, player, moves)[0]
+
+    def search_root(self, game, player, moves, depth, first):
+        """
+        Searches every root move to the given depth and returns the best move and its score. The best move of the
+        previous iteration is searched first.
+        """
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = None
+        for action in order_moves(game, player, moves, first):
+            game.apply(action)
+            try:
+                score = -self.negamax(game, 3 - player, depth - 1, -beta, -alpha, 1)
+            finally:
+                game.undo()
+            if best_move is None or score > alpha:
+                best_move, alpha = action, score
+        return best_move, alpha
+
+    def negamax(self, game, player, depth, alpha, beta, ply):
+        """
+        Returns the score of the position for the player to move, searched to the given depth with alpha-beta
+        pruning. Raises SearchTimeout when the time budget is used up.
+        """
+        self._nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        #The player who just moved has won
+        if game.get_game_won():
+            return -(WIN_SCORE - ply)
+        #Without fences the result is known exactly, however deep the rest of the game is. Tables are only solved
+        #for the root (choose_move), since solving one takes far longer than searching a node.
+        result = self._tablebase.probe(game, solve_missing=False)
+        if result is not None:
+            return endgame_score(result, ply)
+        if depth == 0:
+            return evaluate(game, player)
+
+        key = game.get_zobrist_hash()
+        original_alpha = alpha
+        table_move = None
+        entry = self._table.probe(key)
+        if entry is not None:
+            table_depth, table_score, bound, table_move = entry
+            if table_depth >= depth:
+                table_score = score_from_table(table_score, ply)
+                if bound == transposition.EXACT:
+                    return table_score
+                elif bound == transposition.LOWER_BOUND:
+                    alpha = max(alpha, table_score)
+                else:
+                    beta = min(beta, table_score)
+                if alpha >= beta:
+                    return table_score
+
+        best_score, best_move = -WIN_SCORE - 1, None
+        for action in order_moves(game, player, game.legal_moves(player), table_move):
+            game.apply(action)
+            try:
+                score = -self.negamax(game, 3 - player, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.undo()
+            if score > best_score:
+                best_score, best_move = score, action
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= original_alpha:
+            bound = transposition.UPPER_BOUND
+        elif best_score >= beta:
+            bound = transposition.LOWER_BOUND
+        else:
+            bound = transposition.EXACT
+        self._table.store(key, depth, score_to_table(best_score, ply), bound, best_move)
+        return best_score
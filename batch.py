@@ -0,0 +1,360 @@
+#Description: Batch engine that plays many games of Quoridor in lockstep with NumPy arrays, for reinforcement learning.
+#Every game is a row of the arrays: pawn squares, placed fences, which of the four steps out of every square are open,
+#fence inventories, turn and winner. Legality masks and step are computed for all games at once. Actions are the
+#action numbers of Quoridor.action_to_index (0-80 pawn moves, 81-161 "v" fences, 162-242 "h" fences) and the rules
+#are the same as QuoridorGame's, including the jump rules of is_vadjacent/is_hadjacent and the path rule for fences.
+#Needs numpy. "python batch.py" cross-checks random batches against QuoridorGame.
+
+import random
+
+import numpy as np
+
+import Quoridor as q
+
+
+ACTIONS = 243
+FENCE_SLOTS = 162 #81 "v" slots followed by 81 "h" slots, numbered like actions minus 81
+UP, LEFT, RIGHT, DOWN = range(4) #directions, in the order of Quoridor.ORTHO_MOVES
+OFF_BOARD = 81 #index of an extra, always empty square used for steps off the board
+
+#Square reached by a step in every direction from every square, OFF_BOARD when the step leaves the board
+NEIGHBOR = np.full((82, 4), OFF_BOARD, dtype=np.intp)
+for _index, (_x, _y) in enumerate(q.COORDINATES):
+    for _direction, (_dx, _dy) in enumerate(((0, -1), (-1, 0), (1, 0), (0, 1))):
+        if 0 <= _x + _dx < 9 and 0 <= _y + _dy < 9:
+            NEIGHBOR[_index, _direction] = _index + _dy * 9 + _dx
+EMPTY_OPEN = NEIGHBOR[:81] != OFF_BOARD #steps that are open on an empty board
+
+#The two (square, direction) steps that every fence slot closes, and which slots exist (no "v" fences in the first
+#column, no "h" fences in the first row). A "v" fence at square i closes i to the left and the square to its left to
+#the right; an "h" fence at i closes i upwards and the square above it downwards.
+SLOT_SQUARES = np.zeros((FENCE_SLOTS, 2), dtype=np.intp)
+SLOT_DIRECTIONS = np.zeros((FENCE_SLOTS, 2), dtype=np.intp)
+VALID_SLOTS = np.zeros(FENCE_SLOTS, dtype=bool)
+#Fence slot that closes every (square, direction) step, -1 for steps off the board
+STEP_SLOT = np.full((81, 4), -1, dtype=np.intp)
+for (_v_or_h, (_x, _y)), (_blocked, _position) in q.FENCE_EDGES.items():
+    _slot = q.action_to_index((_v_or_h, (_x, _y))) - 81
+    _index = q.SQUARE_INDEX[_position]
+    _other = q.SQUARE_INDEX[_blocked]
+    _toward, _back = (LEFT, RIGHT) if _v_or_h == "v" else (UP, DOWN)
+    SLOT_SQUARES[_slot] = (_index, _other)
+    SLOT_DIRECTIONS[_slot] = (_toward, _back)
+    VALID_SLOTS[_slot] = True
+    STEP_SLOT[_index, _toward] = STEP_SLOT[_other, _back] = _slot
+del _index, _x, _y, _direction, _dx, _dy, _v_or_h, _blocked, _position, _slot, _other, _toward, _back
+
+#Flood fills work on boards stored as 9 rows of 9 bits (bit x of row y is square (x,y)). SLOT_ROWS and SLOT_BITS give
+#the row and bit that every fence slot clears in the "right" (for "v" slots) or "down" (for "h" slots) step masks.
+ROW_BITS = np.uint16(1) << np.arange(9, dtype=np.uint16)
+SLOT_IS_V = np.arange(FENCE_SLOTS) < 81
+SLOT_ROWS = np.zeros(FENCE_SLOTS, dtype=np.intp)
+SLOT_BITS = np.zeros(FENCE_SLOTS, dtype=np.uint16)
+for _slot in np.flatnonzero(VALID_SLOTS):
+    _x, _y = q.COORDINATES[_slot % 81]
+    SLOT_ROWS[_slot], SLOT_BITS[_slot] = (_y, 1 << (_x - 1)) if _slot < 81 else (_y - 1, 1 << _x)
+del _slot, _x, _y
+
+#Goal row of player 1 (the last row) and player 2 (the first row)
+GOAL_ROWS = np.array((8, 0))
+START_SQUARES = (q.SQUARE_INDEX[(4, 0)], q.SQUARE_INDEX[(4, 8)])
+
+
+def step_rows(open_steps):
+    """
+    Returns (right, down): (K, 9) uint16 row masks of the squares whose step to the right / downwards is open.
+    p1: bool array (K, 81, 4) of open steps
+    """
+    grid = open_steps.reshape(len(open_steps), 9, 9, 4)
+    right = (grid[..., RIGHT] * ROW_BITS).sum(axis=2, dtype=np.uint16)
+    down = (grid[..., DOWN] * ROW_BITS).sum(axis=2, dtype=np.uint16)
+    return right, down
+
+
+def grow(reached, right, down):
+    """Returns the (K, 9) row masks of reached plus every square one open step away from it."""
+    grown = reached | ((reached & right) << 1) | ((reached >> 1) & right)
+    grown[:, 1:] |= reached[:, :-1] & down[:, :-1]
+    grown[:, :-1] |= reached[:, 1:] & down[:, :-1]
+    return grown
+
+
+def flood_fill(reached, right, down):
+    """
+    Returns the row masks of the squares that can be reached from the squares in reached, for many boards at once.
+    p1: (K, 9) uint16 row masks of the starting squares
+    p2, p3: step masks of every board (see step_rows)
+    """
+    while True:
+        grown = grow(reached, right, down)
+        if np.array_equal(grown, reached):
+            return reached
+        reached = grown
+
+
+def goal_distances(right, down, goal_row):
+    """
+    Returns a (K, 82) array of the number of steps from every square to the goal row (a large number where it can't
+    be reached, and for the OFF_BOARD column), for many boards at once. Pawns don't block.
+    p1, p2: step masks of every board (see step_rows)
+    p3: goal row, 0 or 8
+    """
+    boards = len(right)
+    distances = np.full((boards, 82), 1000, dtype=np.int16)
+    distances[:, goal_row * 9:goal_row * 9 + 9] = 0
+    reached = np.zeros((boards, 9), dtype=np.uint16)
+    reached[:, goal_row] = 0x1FF
+    for step in range(1, 82):
+        grown = grow(reached, right, down)
+        new = grown & ~reached
+        if not new.any():
+            break
+        distances[:, :81][((new[:, :, None] & ROW_BITS) != 0).reshape(boards, 81)] = step
+        reached = grown
+    return distances
+
+
+class BatchQuoridorGame:
+    """
+    N games of Quoridor stored as NumPy arrays and stepped together. Games that are won stay won until they are reset.
+    """
+    def __init__(self, games):
+        """p1: games -- number of games in the batch"""
+        self._games = games
+        self._rows = np.arange(games)
+        self._pawns = np.zeros((games, 2), dtype=np.intp) #square index of the pawns of player 1 and player 2
+        self._fences = np.zeros((games, FENCE_SLOTS), dtype=bool) #placed fences, "v" slots then "h" slots
+        self._open = np.zeros((games, 81, 4), dtype=bool) #steps out of every square that no fence or edge blocks
+        self._inventories = np.zeros((games, 2), dtype=np.int8)
+        self._turn = np.zeros(games, dtype=np.int8) #player to move, 1 or 2
+        self._winner = np.zeros(games, dtype=np.int8) #0 while the game is not won
+        self.reset()
+
+    def reset(self, games=None):
+        """
+        Puts games back in the starting position.
+        p1: games -- bool mask or index array of the games to reset, all of them by default
+        """
+        if games is None:
+            games = slice(None)
+        self._pawns[games] = START_SQUARES
+        self._fences[games] = False
+        self._open[games] = EMPTY_OPEN
+        self._inventories[games] = 10
+        self._turn[games] = 1
+        self._winner[games] = 0
+
+    def get_size(self):
+        """Returns the number of games in the batch."""
+        return self._games
+
+    def get_pawns(self):
+        """Returns a (N, 2) array of the square index (y*9+x) of the pawns of player 1 and player 2."""
+        return self._pawns
+
+    def get_fences(self):
+        """Returns a (N, 2, 9, 9) bool array of the placed "v" and "h" fences, indexed [game, kind, y, x]."""
+        return self._fences.reshape(self._games, 2, 9, 9)
+
+    def get_inventories(self):
+        """Returns a (N, 2) array of the fences left to player 1 and player 2."""
+        return self._inventories
+
+    def get_turn(self):
+        """Returns a (N,) array of the player to move (1 or 2)."""
+        return self._turn
+
+    def get_winner(self):
+        """Returns a (N,) array of the winner of every game, 0 while a game is not won."""
+        return self._winner
+
+    def pawn_mask(self):
+        """
+        Returns a (N, 81) bool array of the squares the player to move can move their pawn to, with the rules of
+        QuoridorGame.basic_possible_moves: orthogonal steps, then a jump over an adjacent pawn, or every step of the
+        adjacent pawn when the jump is blocked. As in QuoridorGame the jump ignores a fence between the two pawns.
+        """
+        rows = self._rows
+        mover = self._turn - 1
+        current = self._pawns[rows, mover]
+        other = self._pawns[rows, 1 - mover]
+        mask = np.zeros((self._games, 82), dtype=bool)
+        mask[rows[:, None], NEIGHBOR[current]] = self._open[rows, current]
+
+        #Pawns are adjacent when the other pawn is one step away on an empty board
+        adjacent = NEIGHBOR[current] == other[:, None]
+        games = adjacent.any(axis=1)
+        if games.any():
+            direction = adjacent[games].argmax(axis=1)
+            adjacent_rows = rows[games]
+            other_adjacent = other[games]
+            jump_open = self._open[adjacent_rows, other_adjacent, direction]
+            jumps = adjacent_rows[jump_open]
+            mask[jumps, NEIGHBOR[other_adjacent[jump_open], direction[jump_open]]] = True
+            blocked = ~jump_open
+            blocked_rows = adjacent_rows[blocked]
+            mask[blocked_rows[:, None], NEIGHBOR[other_adjacent[blocked]]] |= self._open[blocked_rows, other_adjacent[blocked]]
+
+        mask[rows, current] = False
+        mask[rows, other] = False
+        mask[self._winner != 0] = False
+        return mask[:, :81]
+
+    def fence_mask(self):
+        """
+        Returns a (N, 162) bool array of the fences the player to move can place ("v" slots then "h" slots): the slot
+        exists and is free, the player has a fence left and both pawns can still reach their goal. Only fences that
+        cut a shortest path of either player are checked with a flood fill; the others can't take away every path.
+        """
+        rows = self._rows
+        mover = self._turn - 1
+        mask = VALID_SLOTS & ~self._fences
+        mask &= ((self._inventories[rows, mover] > 0) & (self._winner == 0))[:, None]
+
+        #Mark the slots that close a step of one shortest path of each player
+        on_path = np.zeros((self._games, FENCE_SLOTS + 1), dtype=bool)
+        right, down = step_rows(self._open)
+        for player in (0, 1):
+            distances = goal_distances(right, down, GOAL_ROWS[player])
+            square = self._pawns[:, player].copy()
+            for _ in range(81):
+                left = distances[rows, square]
+                walking = left > 0
+                if not walking.any():
+                    break
+                steps = self._open[rows, square] & (distances[rows[:, None], NEIGHBOR[square]] == (left - 1)[:, None])
+                direction = steps.argmax(axis=1)
+                on_path[rows[walking], STEP_SLOT[square, direction][walking]] = True
+                square = np.where(walking, NEIGHBOR[square, direction], square)
+        games, slots = np.nonzero(mask & on_path[:, :FENCE_SLOTS])
+        if len(games):
+            mask[games, slots] = self.keeps_paths(games, slots, right, down)
+        return mask
+
+    def keeps_paths(self, games, slots, right=None, down=None):
+        """
+        Returns a bool array telling for every (game, fence slot) pair whether both pawns could still reach their goal
+        after the fence is placed.
+        p1: index array of games
+        p2: index array of fence slots (0-161), one per game
+        p3, p4: step masks of every game of the batch (see step_rows), computed if not given
+        """
+        if right is None:
+            right, down = step_rows(self._open)
+        pairs = np.arange(len(games))
+        right, down = right[games], down[games]
+        vertical = SLOT_IS_V[slots]
+        right[pairs[vertical], SLOT_ROWS[slots[vertical]]] &= ~SLOT_BITS[slots[vertical]]
+        down[pairs[~vertical], SLOT_ROWS[slots[~vertical]]] &= ~SLOT_BITS[slots[~vertical]]
+        keeps = np.ones(len(games), dtype=bool)
+        for player in (0, 1):
+            start = np.zeros((len(games), 9), dtype=np.uint16)
+            squares = self._pawns[games, player]
+            start[pairs, squares // 9] = ROW_BITS[squares % 9]
+            keeps &= flood_fill(start, right, down)[:, GOAL_ROWS[player]] != 0
+        return keeps
+
+    def legal_mask(self):
+        """Returns a (N, 243) bool array of the legal actions of the player to move in every game."""
+        return np.concatenate((self.pawn_mask(), self.fence_mask()), axis=1)
+
+    def step(self, actions):
+        """
+        Makes one action in every game for the player to move. Illegal actions (and any action in a won game) leave
+        the game unchanged, like QuoridorGame.move_pawn and place_fence returning False. Returns a (N,) bool array of
+        the actions that were made.
+        p1: actions -- (N,) integer array of action numbers; a negative number makes no action in that game
+        """
+        actions = np.asarray(actions, dtype=np.intp)
+        rows = self._rows
+        mover = self._turn - 1
+        playing = (self._winner == 0) & (actions >= 0) & (actions < ACTIONS)
+        made = np.zeros(self._games, dtype=bool)
+
+        pawn_games = rows[playing & (actions < 81)]
+        if len(pawn_games):
+            legal = self.pawn_mask()[pawn_games, actions[pawn_games]]
+            pawn_games = pawn_games[legal]
+            targets = actions[pawn_games]
+            self._pawns[pawn_games, mover[pawn_games]] = targets
+            won = targets // 9 == GOAL_ROWS[mover[pawn_games]]
+            self._winner[pawn_games[won]] = self._turn[pawn_games[won]]
+            made[pawn_games] = True
+
+        fence_games = rows[playing & (actions >= 81)]
+        if len(fence_games):
+            slots = actions[fence_games] - 81
+            legal = VALID_SLOTS[slots] & ~self._fences[fence_games, slots]
+            legal &= self._inventories[fence_games, mover[fence_games]] > 0
+            fence_games, slots = fence_games[legal], slots[legal]
+            legal = self.keeps_paths(fence_games, slots)
+            fence_games, slots = fence_games[legal], slots[legal]
+            self._fences[fence_games, slots] = True
+            for side in (0, 1):
+                self._open[fence_games, SLOT_SQUARES[slots, side], SLOT_DIRECTIONS[slots, side]] = False
+            self._inventories[fence_games, mover[fence_games]] -= 1
+            made[fence_games] = True
+
+        self._turn[made] = 3 - self._turn[made]
+        return made
+
+    def load_game(self, index, game):
+        """
+        Copies the position of a QuoridorGame into one game of the batch.
+        p1: index of the game in the batch
+        p2: QuoridorGame object
+        """
+        self.reset([index])
+        for player in (1, 2):
+            self._pawns[index, player - 1] = q.SQUARE_INDEX[game.get_position(player)]
+            self._inventories[index, player - 1] = game.get_fence_inventory(player)
+        for v_or_h, fences in (("v", game.get_vFences()), ("h", game.get_hFences())):
+            for fence in fences:
+                slot = q.action_to_index((v_or_h, fence)) - 81
+                self._fences[index, slot] = True
+                self._open[index, SLOT_SQUARES[slot], SLOT_DIRECTIONS[slot]] = False
+        self._turn[index] = game.get_player_turn()
+        self._winner[index] = 3 - game.get_player_turn() if game.get_game_won() else 0
+
+
+def cross_check(games=64, plies=200, seed=0):
+    """
+    Differential test between BatchQuoridorGame and QuoridorGame. Plays a batch of games with random actions (half of
+    them legal, half drawn from all 243 action numbers so that most are illegal) and mirrors every action on one
+    QuoridorGame per game. Won games are restarted. Raises AssertionError if the legal action masks or the accepted
+    actions ever differ. Returns the number of positions compared.
+    """
+    rng = random.Random(seed)
+    batch = BatchQuoridorGame(games)
+    mirrors = [q.QuoridorGame() for _ in range(games)]
+    compared = 0
+    for _ in range(plies):
+        masks = batch.legal_mask()
+        actions = np.zeros(games, dtype=np.intp)
+        for index, game in enumerate(mirrors):
+            expected = sorted(q.action_to_index(action) for action in game.legal_moves(game.get_player_turn()))
+            actual = np.flatnonzero(masks[index]).tolist()
+            assert expected == actual, (index, sorted(set(expected) ^ set(actual)), position_summary(game))
+            if expected and rng.random() < 0.5:
+                actions[index] = rng.choice(expected)
+            else:
+                actions[index] = rng.randrange(ACTIONS)
+            compared += 1
+        made = batch.step(actions)
+        for index, game in enumerate(mirrors):
+            expected = game.apply(q.index_to_action(int(actions[index])))
+            assert expected == bool(made[index]), (index, q.index_to_action(int(actions[index])), expected)
+            if game.get_game_won():
+                assert batch.get_winner()[index] == 3 - game.get_player_turn()
+                mirrors[index] = q.QuoridorGame()
+                batch.reset([index])
+    return compared
+
+
+def position_summary(game):
+    """Returns the pawns, fences and turn of a QuoridorGame, for assertion messages."""
+    return (game.get_position(1), game.get_position(2), game.get_vFences(), game.get_hFences(), game.get_player_turn())
+
+
+if __name__ == '__main__':
+    print("batch engine agrees with QuoridorGame on %d positions" % cross_check())
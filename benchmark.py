@@ -0,0 +1,492 @@
+#Description: Benchmarks for the Quoridor game engine. Run with "python benchmark.py". "python benchmark.py ui" runs
+#the pygame drawing loop instead (needs pygame, uses SDL's dummy video driver so no window is opened).
+#"python benchmark.py memory" measures the memory per game kept by a server hosting many games.
+#"python benchmark.py suite --output results.json" runs the seeded benchmark suite and writes the results as JSON;
+#add "--compare old.json" to report the benchmarks that got slower than in an earlier run.
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+import Quoridor as q
+import bitboard
+import endgame
+
+
+class LinearScanQuoridorGame(q.QuoridorGame):
+    """
+    QuoridorGame that looks squares up with the original linear scan over the squares list. Used as the baseline
+    when measuring the coordinate index used by QuoridorGame.find_square.
+    """
+    def find_square(self, coordinate):
+        """Returns the Square object of a given coordinate parameter by checking every square on the board."""
+        for square in self._squares_list:
+            if coordinate == square.get_square_coordinate():
+                return square
+
+
+def random_move_attempts(seed, count):
+    """
+    Returns a reproducible list of pawn move attempts. Each attempt is a tuple (dx, dy) that is added to the moving
+    player's position, so that both legal steps/jumps and illegal moves are tried.
+    p1: seed for the random number generator
+    p2: number of attempts
+    """
+    rng = random.Random(seed)
+    offsets = [(0, -1), (-1, 0), (1, 0), (0, 1), (0, -2), (0, 2), (-2, 0), (2, 0), (1, 1), (-1, -1)]
+    return [rng.choice(offsets) for _ in range(count)]
+
+
+def play_move_attempts(game_class, attempts):
+    """
+    Plays the move attempts on a new game, starting a fresh game whenever one is won.
+    Returns the number of move validations that were performed.
+    """
+    game = game_class()
+    for dx, dy in attempts:
+        player = game.get_player_turn()
+        x, y = game.get_position(player)
+        game.move_pawn(player, (x + dx, y + dy))
+        if game.get_game_won():
+            game = game_class()
+    return len(attempts)
+
+
+def bench_move_validation(seed=2021, count=20000, repeat=5):
+    """
+    Compares the time per move validation of the indexed find_square with the original linear scan.
+    Returns a dictionary with the best time per move (in microseconds) for each variant and the speedup.
+    """
+    attempts = random_move_attempts(seed, count)
+    results = {}
+    for name, game_class in (("linear_scan", LinearScanQuoridorGame), ("indexed", q.QuoridorGame)):
+        timer = timeit.Timer(lambda: play_move_attempts(game_class, attempts))
+        best = min(timer.repeat(repeat=repeat, number=1))
+        results[name] = best / count * 1e6
+    results["speedup"] = results["linear_scan"] / results["indexed"]
+    return results
+
+
+def bytes_per_game(make_game, count=1000):
+    """
+    Returns the number of bytes allocated per game when count games are kept in memory, measured with tracemalloc.
+    p1: function that returns a new game
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [make_game() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del games
+    return (after - before) / count
+
+
+def game_in_progress(seed, plies=20):
+    """
+    Returns a game after up to plies seeded random actions made with move_pawn and place_fence (the way server.py
+    plays), so that it holds fences, moved pawns and cached paths like a game being hosted.
+    """
+    rng = random.Random(seed)
+    game = q.QuoridorGame()
+    for _ in range(plies):
+        player = game.get_player_turn()
+        if game.get_game_won():
+            break
+        if rng.random() < 0.4 and game.place_fence(player, rng.choice("vh"), (rng.randrange(1, 9), rng.randrange(1, 9))):
+            continue
+        moves = game.possible_pawn_moves(player)
+        if not moves:
+            break
+        game.move_pawn(player, rng.choice(moves))
+    return game
+
+
+def bench_memory(count=5000):
+    """
+    Measures the bytes per game of QuoridorGame with tracemalloc when count games are kept in memory, for new games
+    and for games in progress (see game_in_progress). Returns a dictionary with both.
+    """
+    seeds = iter(range(count))
+    return {"new": bytes_per_game(q.QuoridorGame, count),
+            "in_progress": bytes_per_game(lambda: game_in_progress(next(seeds)), count)}
+
+
+def bench_engines(repeat=5, number=2000):
+    """
+    Compares QuoridorGame with BitboardQuoridorGame on memory per game and on the time to copy a game.
+    Returns a dictionary of results (bytes per game and microseconds per copy).
+    """
+    game = q.QuoridorGame()
+    board = bitboard.BitboardQuoridorGame()
+    return {
+        "object_bytes": bytes_per_game(q.QuoridorGame),
+        "bitboard_bytes": bytes_per_game(bitboard.BitboardQuoridorGame),
+        "object_copy": min(timeit.repeat(lambda: copy.deepcopy(game), repeat=repeat, number=number // 10)) / (number // 10) * 1e6,
+        "bitboard_copy": min(timeit.repeat(board.copy, repeat=repeat, number=number)) / number * 1e6,
+    }
+
+
+def bench_explore(repeat=5):
+    """
+    Compares two ways of trying every legal action of the starting position: deep copying the game before each action
+    and making the action on the copy, or apply followed by undo on the same game.
+    Returns a dictionary with microseconds per action for both.
+    """
+    game = q.QuoridorGame()
+    actions = game.legal_moves(game.get_player_turn())
+
+    def with_deepcopy():
+        for kind, position in actions:
+            game_copy = copy.deepcopy(game)
+            if kind == "p":
+                game_copy.move_pawn(1, position)
+            else:
+                game_copy.place_fence(1, kind, position)
+
+    def with_undo():
+        for action in actions:
+            game.apply(action)
+            game.undo()
+
+    return {
+        "deepcopy": min(timeit.repeat(with_deepcopy, repeat=repeat, number=1)) / len(actions) * 1e6,
+        "apply_undo": min(timeit.repeat(with_undo, repeat=repeat, number=1)) / len(actions) * 1e6,
+    }
+
+
+def open_ui(game):
+    """
+    Sets up main.py's window for a game the way main does, with SDL's dummy video driver so no window is opened, and
+    draws the whole board once. Returns the pygame and main modules.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import main as ui
+
+    pygame.init()
+    ui.configure_board(game)
+    ui.DISPLAYSURF = pygame.display.set_mode((ui.WINDOWWIDTH, ui.WINDOWHEIGHT))
+    ui.FONT = pygame.font.Font('freesansbold.ttf', 17)
+    ui.TABLEBASE = endgame.EndgameTablebase()
+    ui.build_background()
+    ui.draw_full_board(game)
+    return pygame, ui
+
+
+def bench_ui_frames(frames=100000, sample_every=10000):
+    """
+    Runs main.py's frame loop without a player for a number of frames on a game with some fences placed: draw_changes
+    and the display update of the rects it returns, and a click hit test. Every tenth frame a pawn moves or moves back,
+    so the redraw of a changed box is part of it. Samples the traced memory every sample_every frames.
+    Returns a list of (frame, bytes traced). Memory should stay flat.
+    """
+    game = q.QuoridorGame()
+    for player, v_or_h, position in ((1, "v", (3, 3)), (2, "h", (5, 5)), (1, "v", (6, 2)), (2, "h", (2, 7))):
+        game.place_fence(player, v_or_h, position)
+    pygame, ui = open_ui(game)
+
+    samples = []
+    tracemalloc.start()
+    for frame in range(1, frames + 1):
+        if frame % 20 == 10:
+            game.apply(("p", (4, 1)))
+        elif frame % 20 == 0:
+            game.undo()
+        rects = ui.draw_changes(game)
+        if rects:
+            pygame.display.update(rects)
+        ui.pixel_to_grid(frame % ui.WINDOWWIDTH, frame % ui.WINDOWHEIGHT)
+        if frame % sample_every == 0:
+            samples.append((frame, tracemalloc.get_traced_memory()[0]))
+    tracemalloc.stop()
+    pygame.quit()
+    return samples
+
+
+def bench_ui_idle(frames=10000):
+    """
+    Measures the time per frame of main.py's dirty-rectangle drawing (draw_changes) when nothing changes between
+    frames, and when a pawn moves back and forth every frame. Returns microseconds per frame for both.
+    """
+    game = q.QuoridorGame()
+    pygame, ui = open_ui(game)
+
+    def idle():
+        for _ in range(frames):
+            rects = ui.draw_changes(game)
+            if rects:
+                pygame.display.update(rects)
+
+    def moving():
+        for frame in range(frames):
+            if frame % 2 == 0:
+                game.apply(("p", (4, 1)))
+            else:
+                game.undo()
+            pygame.display.update(ui.draw_changes(game))
+
+    results = {"idle": timeit.timeit(idle, number=1) / frames * 1e6,
+               "moving": timeit.timeit(moving, number=1) / frames * 1e6}
+    pygame.quit()
+    return results
+
+
+#Offsets from a pawn that the move benchmarks try: steps, jumps, diagonals and a move that is never possible
+MOVE_OFFSETS = ((0, -1), (-1, 0), (1, 0), (0, 1), (0, -2), (0, 2), (-2, 0), (2, 0), (1, 1), (-1, -1), (1, -1), (3, 0))
+REJECTED_GAME_FENCES = 8 #fences on the board of the place_fence_rejected benchmark, 4 from each player
+
+
+def random_fence_attempts(rng, count):
+    """Returns count random fence attempts ("v" or "h", (x,y)) anywhere on the board, so many of them are rejected."""
+    return [(rng.choice("vh"), (rng.randrange(9), rng.randrange(9))) for _ in range(count)]
+
+
+def game_with_pawns(p1_position, p2_position, fence=None):
+    """
+    Returns a game with player 1 to move, the pawns on the given squares and, optionally, a fence placed by player 1.
+    It is set up from a snapshot (see Quoridor.from_snapshot), which takes both pawns off the board before putting them
+    on their squares, so a pawn can be put on the other's start square.
+    """
+    v_fences = [fence[1]] if fence is not None and fence[0] == "v" else []
+    h_fences = [fence[1]] if fence is not None and fence[0] == "h" else []
+    return q.from_snapshot({"seq": 0, "size": 9, "players": 2, "fences": 10, "positions": [p1_position, p2_position],
+                            "v_fences": v_fences, "h_fences": h_fences,
+                            "inventories": [10 - len(v_fences + h_fences), 10], "turn": 1, "winner": None})
+
+
+def pawns_off_goals(p1_position, p2_position):
+    """Returns True if neither pawn is on its goal, as in every position of a game that is not won."""
+    return p1_position not in q.P2_BASELINE and p2_position not in q.P1_BASELINE
+
+
+def adjacent_positions(rng, count):
+    """
+    Returns count games where the pawn of player 1 is next to the pawn of player 2. Every other game has a fence
+    behind player 2 (when player 2 isn't on the edge of the board), so both the jump and the blocked jump are tried.
+    """
+    games = []
+    while len(games) < count:
+        x, y = rng.randrange(9), rng.randrange(9)
+        dx, dy = rng.choice(((0, -1), (-1, 0), (1, 0), (0, 1)))
+        other = (x + dx, y + dy)
+        behind = (x + 2 * dx, y + 2 * dy)
+        if q.SQUARE_INDEX.get(other) is None or not pawns_off_goals((x, y), other):
+            continue
+        fence = None
+        if len(games) % 2 == 1 and behind in q.SQUARE_INDEX:
+            fence = ("v", (max(other[0], behind[0]), y)) if dx else ("h", (x, max(other[1], behind[1])))
+        games.append(game_with_pawns((x, y), other, fence))
+    return games
+
+
+def apart_positions(rng, count):
+    """Returns count games where the pawns are on random squares that are not next to each other."""
+    games = []
+    while len(games) < count:
+        first = (rng.randrange(9), rng.randrange(9))
+        second = (rng.randrange(9), rng.randrange(9))
+        if abs(first[0] - second[0]) + abs(first[1] - second[1]) > 1 and pawns_off_goals(first, second):
+            games.append(game_with_pawns(first, second))
+    return games
+
+
+def move_queries(rng, games, count):
+    """Returns count (game, move-to position) pairs for player 1 of random games, using MOVE_OFFSETS."""
+    queries = []
+    for _ in range(count):
+        game = rng.choice(games)
+        x, y = game.get_position(1)
+        dx, dy = rng.choice(MOVE_OFFSETS)
+        queries.append((game, (x + dx, y + dy)))
+    return queries
+
+
+def play_random_game(rng, max_plies=1000):
+    """
+    Plays one game with a random policy: a random fence is tried one time in five, otherwise the pawn makes a random
+    possible move. The game stops early if the pawn has no possible move. Returns the number of plies.
+    """
+    game = q.QuoridorGame()
+    plies = 0
+    while not game.get_game_won() and plies < max_plies:
+        player = game.get_player_turn()
+        if game.get_fence_inventory(player) > 0 and rng.random() < 0.2:
+            if game.place_fence(player, rng.choice("vh"), (rng.randrange(9), rng.randrange(9))):
+                plies += 1
+                continue
+        moves = game.possible_pawn_moves(player)
+        if not moves:
+            #A pawn boxed in by fences and the other pawn can only place fences; the game ends here
+            break
+        game.move_pawn(player, rng.choice(moves))
+        plies += 1
+    return plies
+
+
+def suite_workloads(seed):
+    """
+    Returns the workloads of the benchmark suite as a list of (name, function, operations). Every workload is built
+    from its own random.Random(seed), so the same seed always measures the same work.
+    """
+    workloads = []
+
+    count = 10000
+    def construction():
+        for _ in range(count):
+            q.QuoridorGame()
+    workloads.append(("construction", construction, count))
+
+    rng = random.Random(seed)
+    game = q.QuoridorGame()
+    coordinates = [(rng.randrange(-1, 10), rng.randrange(-1, 10)) for _ in range(20000)]
+    def find_square():
+        for coordinate in coordinates:
+            game.find_square(coordinate)
+    workloads.append(("find_square", find_square, len(coordinates)))
+
+    for name, make_positions in (("basic_possible_moves_apart", apart_positions),
+                                 ("basic_possible_moves_adjacent", adjacent_positions)):
+        rng = random.Random(seed)
+        queries = move_queries(rng, make_positions(rng, 100), 20000)
+        def basic_possible_moves(queries=queries):
+            for position_game, position in queries:
+                position_game.basic_possible_moves(1, position)
+        workloads.append((name, basic_possible_moves, len(queries)))
+
+    attempts = random_fence_attempts(random.Random(seed), 5000)
+    def place_fence():
+        fence_game = q.QuoridorGame()
+        for v_or_h, position in attempts:
+            if fence_game.get_fence_inventory(fence_game.get_player_turn()) == 0:
+                fence_game = q.QuoridorGame()
+            fence_game.place_fence(fence_game.get_player_turn(), v_or_h, position)
+    workloads.append(("place_fence", place_fence, len(attempts)))
+
+    #Both players keep most of their fences, so the rejections come from the slot checks and not an empty inventory
+    rejected_game = q.QuoridorGame()
+    for v_or_h, position in random_fence_attempts(random.Random(seed), 200):
+        if len(rejected_game.get_vFences()) + len(rejected_game.get_hFences()) == REJECTED_GAME_FENCES:
+            break
+        rejected_game.place_fence(rejected_game.get_player_turn(), v_or_h, position)
+    taken = [("v", fence) for fence in rejected_game.get_vFences()] + [("h", fence) for fence in rejected_game.get_hFences()]
+    rng = random.Random(seed)
+    rejections = []
+    for _ in range(20000):
+        choices = [("v", (0, rng.randrange(9))), ("h", (rng.randrange(9), 0)), ("v", (9, rng.randrange(9)))]
+        if taken:
+            choices.append(rng.choice(taken))
+        rejections.append(rng.choice(choices))
+    def place_fence_rejected():
+        player = rejected_game.get_player_turn()
+        for v_or_h, position in rejections:
+            rejected_game.place_fence(player, v_or_h, position)
+    workloads.append(("place_fence_rejected", place_fence_rejected, len(rejections)))
+
+    games = 50
+    def random_games():
+        rng = random.Random(seed)
+        for _ in range(games):
+            play_random_game(rng)
+    workloads.append(("random_game", random_games, games))
+    return workloads
+
+
+def git_commit():
+    """Returns the commit the working tree is at, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(seed=2021, repeat=5):
+    """
+    Runs every workload of the suite repeat times and returns a JSON-ready dictionary with the commit, the Python
+    version, the seed and, for every benchmark, the best time per operation in microseconds and operations per
+    second.
+    """
+    results = {}
+    for name, function, operations in suite_workloads(seed):
+        best = min(timeit.repeat(function, repeat=repeat, number=1))
+        results[name] = {"us_per_op": best / operations * 1e6, "ops_per_second": operations / best}
+    return {"commit": git_commit(), "python": platform.python_version(), "seed": seed, "repeat": repeat,
+            "results": results}
+
+
+def compare_suites(old, new, threshold=0.1):
+    """
+    Returns a list of (name, old us per op, new us per op, ratio, slower) for every benchmark in both results, where
+    slower is True if the new time is more than threshold (a fraction) above the old one.
+    """
+    rows = []
+    for name, result in new["results"].items():
+        if name in old["results"]:
+            old_us = old["results"][name]["us_per_op"]
+            ratio = result["us_per_op"] / old_us
+            rows.append((name, old_us, result["us_per_op"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    """Runs the benchmarks and prints the results."""
+    parser = argparse.ArgumentParser(description="Benchmarks for the Quoridor game engine.")
+    parser.add_argument("mode", nargs="?", choices=("engine", "ui", "memory", "suite"), default="engine")
+    parser.add_argument("--output", default=None, help="suite: write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="suite: JSON file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="suite: report benchmarks more than this fraction slower than --compare (default 0.1)")
+    parser.add_argument("--seed", type=int, default=2021, help="suite: seed of the workloads")
+    parser.add_argument("--repeat", type=int, default=5, help="suite: runs of each workload, the best one counts")
+    args = parser.parse_args(argv)
+    if args.mode == "suite":
+        suite = run_suite(args.seed, args.repeat)
+        for name, result in suite["results"].items():
+            print("%-30s %10.3f us/op %12.1f ops/s" % (name, result["us_per_op"], result["ops_per_second"]))
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(suite, output, indent=2)
+        if args.compare:
+            with open(args.compare) as old_file:
+                old = json.load(old_file)
+            slower = 0
+            print("compared with %s:" % (old.get("commit") or args.compare))
+            for name, old_us, new_us, ratio, is_slower in compare_suites(old, suite, args.threshold):
+                print("%-30s %10.3f -> %10.3f us/op  x%.2f%s" % (name, old_us, new_us, ratio, "  SLOWER" if is_slower else ""))
+                slower += is_slower
+            return 1 if slower else 0
+        return 0
+    if args.mode == "ui":
+        for frame, traced in bench_ui_frames():
+            print("frame %6d: %8d bytes traced" % (frame, traced))
+        results = bench_ui_idle()
+        print("dirty-rect frame, idle:   %.2f us" % results["idle"])
+        print("dirty-rect frame, moving: %.2f us" % results["moving"])
+        return 0
+    if args.mode == "memory":
+        results = bench_memory()
+        print("QuoridorGame, new:         %6.0f bytes/game" % results["new"])
+        print("QuoridorGame, in progress: %6.0f bytes/game" % results["in_progress"])
+        return 0
+    results = bench_move_validation()
+    print("move validation, linear scan: %.2f us/move" % results["linear_scan"])
+    print("move validation, indexed:     %.2f us/move" % results["indexed"])
+    print("speedup: %.1fx" % results["speedup"])
+    results = bench_engines()
+    print("QuoridorGame:         %6.0f bytes/game, %7.2f us/copy" % (results["object_bytes"], results["object_copy"]))
+    print("BitboardQuoridorGame: %6.0f bytes/game, %7.2f us/copy" % (results["bitboard_bytes"], results["bitboard_copy"]))
+    results = bench_explore()
+    print("explore, deepcopy:   %.2f us/action" % results["deepcopy"])
+    print("explore, apply/undo: %.2f us/action" % results["apply_undo"])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,368 @@
+#Description: A compact Quoridor engine that stores the whole game in three integers. Square (x,y) is bit y*9+x of a
+#board bitmask, so that moves can be generated with shifts and masks instead of lists of Square objects.
+#BitboardQuoridorGame has the same public API and rules as QuoridorGame in Quoridor.py.
+
+import pickle
+import random
+
+import Quoridor as q
+
+
+BOARD_MASK = (1 << 81) - 1
+COLUMN_0 = sum(1 << (y * 9) for y in range(9))
+COLUMN_8 = COLUMN_0 << 8
+ROW_0 = (1 << 9) - 1
+ROW_8 = ROW_0 << 72
+NOT_COLUMN_0 = BOARD_MASK & ~COLUMN_0
+NOT_COLUMN_8 = BOARD_MASK & ~COLUMN_8
+NOT_ROW_0 = BOARD_MASK & ~ROW_0
+NOT_ROW_8 = BOARD_MASK & ~ROW_8
+
+#Layout of the packed state integer: two 7 bit pawn squares, two 4 bit fence inventories, the turn and the won flag.
+_P1_SHIFT = 0
+_P2_SHIFT = 7
+_INV1_SHIFT = 14
+_INV2_SHIFT = 18
+_TURN_SHIFT = 22
+_WON_SHIFT = 24
+_SQUARE_BITS = 0x7F
+_INV_BITS = 0xF
+_TURN_BITS = 0x3
+
+
+def neighbors(squares, vwalls, hwalls):
+    """
+    Returns the bitmask of every square that can be reached in one orthogonal step from any square in squares.
+    A vertical wall bit at square i blocks i from the square to its left, a horizontal wall bit at square i blocks i
+    from the square above it (the same convention as QuoridorGame.place_fence).
+    p1: bitmask of the starting squares
+    p2: bitmask of vertical walls
+    p3: bitmask of horizontal walls
+    """
+    right = NOT_COLUMN_8 & ~(vwalls >> 1)
+    left = NOT_COLUMN_0 & ~vwalls
+    down = NOT_ROW_8 & ~(hwalls >> 9)
+    up = NOT_ROW_0 & ~hwalls
+    return ((squares & right) << 1) | ((squares & left) >> 1) | ((squares & down) << 9) | ((squares & up) >> 9)
+
+
+def reaches(start, goal, vwalls, hwalls):
+    """
+    Returns True if any square of goal can be reached from the start squares. The reachable set is grown one step at
+    a time with neighbors (a flood fill over the whole board at once).
+    p1: bitmask of the starting squares
+    p2: bitmask of the goal squares
+    p3: bitmask of vertical walls
+    p4: bitmask of horizontal walls
+    """
+    reached = start
+    frontier = start
+    while frontier:
+        if reached & goal:
+            return True
+        frontier = neighbors(frontier, vwalls, hwalls) & ~reached
+        reached |= frontier
+    return False
+
+
+def to_bit(coordinate):
+    """Returns the bit of an (x,y) coordinate."""
+    return 1 << (coordinate[1] * 9 + coordinate[0])
+
+
+def to_coordinates(mask):
+    """Returns the list of (x,y) coordinates of the bits set in mask, in row-major order."""
+    coordinates = []
+    while mask:
+        low = mask & -mask
+        index = low.bit_length() - 1
+        coordinates.append((index % 9, index // 9))
+        mask ^= low
+    return coordinates
+
+
+class BitboardQuoridorGame:
+    """
+    Game of Quoridor stored as a packed state integer plus one bitmask for each wall orientation.
+    Takes no parameters. get_vFences and get_hFences return the fences in row-major order rather than the order in
+    which they were placed.
+    """
+    __slots__ = ("_state", "_vwalls", "_hwalls")
+
+    def __init__(self):
+        """Initializes board with pawns placed in their correct positions."""
+        self._state = ((4 << _P1_SHIFT) | (76 << _P2_SHIFT) | (10 << _INV1_SHIFT) | (10 << _INV2_SHIFT)
+                       | (1 << _TURN_SHIFT))
+        self._vwalls = 0
+        self._hwalls = 0
+
+    def copy(self):
+        """Returns an independent copy of the game. Only three integers are copied."""
+        game = BitboardQuoridorGame.__new__(BitboardQuoridorGame)
+        game._state = self._state
+        game._vwalls = self._vwalls
+        game._hwalls = self._hwalls
+        return game
+
+    @classmethod
+    def from_game(cls, game):
+        """
+        Returns a BitboardQuoridorGame in the same position as a QuoridorGame.
+        p1: QuoridorGame object
+        """
+        bitboard = cls.__new__(cls)
+        p1 = game.get_position(1)
+        p2 = game.get_position(2)
+        bitboard._state = ((p1[1] * 9 + p1[0]) << _P1_SHIFT | (p2[1] * 9 + p2[0]) << _P2_SHIFT
+                           | game.get_fence_inventory(1) << _INV1_SHIFT | game.get_fence_inventory(2) << _INV2_SHIFT
+                           | game.get_player_turn() << _TURN_SHIFT | int(game.get_game_won()) << _WON_SHIFT)
+        bitboard._vwalls = 0
+        for fence in game.get_vFences():
+            bitboard._vwalls |= to_bit(fence)
+        bitboard._hwalls = 0
+        for fence in game.get_hFences():
+            bitboard._hwalls |= to_bit(fence)
+        return bitboard
+
+    def get_vFences(self):
+        return to_coordinates(self._vwalls)
+
+    def get_hFences(self):
+        return to_coordinates(self._hwalls)
+
+    def get_game_won(self):
+        return bool(self._state >> _WON_SHIFT & 1)
+
+    def get_player_turn(self):
+        return self._state >> _TURN_SHIFT & _TURN_BITS
+
+    def get_fence_inventory(self, player):
+        """
+        Returns inventory of a player's fence
+        p1: player (1 or 2)
+        """
+        if player == 1:
+            return self._state >> _INV1_SHIFT & _INV_BITS
+        return self._state >> _INV2_SHIFT & _INV_BITS
+
+    def get_position(self, player):
+        """
+        Returns position of a player.
+        p1: player (1 or 2)
+        returns: tuple representing player 1 or player 2 position
+        """
+        if player == 1:
+            index = self._state >> _P1_SHIFT & _SQUARE_BITS
+        else:
+            index = self._state >> _P2_SHIFT & _SQUARE_BITS
+        return (index % 9, index // 9)
+
+    def basic_checks(self, player, position):
+        """
+        Returns False if the game is won, the wrong player is moving, or the input position is not on the board.
+        p1: integer representing player that is moving (1 or 2)
+        p2: position -- tuple representing the coordinate that the player wants to move-to
+        """
+        state = self._state
+        if state >> _WON_SHIFT & 1:
+            return False
+        elif state >> _TURN_SHIFT & _TURN_BITS != player:
+            return False
+        elif position[0] is None or position[1] is None:
+            return False
+        elif position[0] < 0 or position[0] > 8 or position[1] < 0 or position[1] > 8:
+            return False
+        return True
+
+    def pawn_moves_mask(self, player):
+        """
+        Returns the bitmask of every square the player's pawn may move to, including jumps over the other pawn and the
+        diagonal moves allowed when the jump is blocked.
+        p1: player (1 or 2)
+        """
+        state = self._state
+        vwalls = self._vwalls
+        hwalls = self._hwalls
+        if player == 1:
+            current = 1 << (state >> _P1_SHIFT & _SQUARE_BITS)
+            other = 1 << (state >> _P2_SHIFT & _SQUARE_BITS)
+        else:
+            current = 1 << (state >> _P2_SHIFT & _SQUARE_BITS)
+            other = 1 << (state >> _P1_SHIFT & _SQUARE_BITS)
+        moves = neighbors(current, vwalls, hwalls)
+
+        #The other pawn is next to this one (fences between the pawns are ignored, as in QuoridorGame)
+        if other == (current & NOT_COLUMN_8) << 1:
+            jump = (other & NOT_COLUMN_8 & ~(vwalls >> 1)) << 1
+        elif other == (current & NOT_COLUMN_0) >> 1:
+            jump = (other & NOT_COLUMN_0 & ~vwalls) >> 1
+        elif other == (current & NOT_ROW_8) << 9:
+            jump = (other & NOT_ROW_8 & ~(hwalls >> 9)) << 9
+        elif other == (current & NOT_ROW_0) >> 9:
+            jump = (other & NOT_ROW_0 & ~hwalls) >> 9
+        else:
+            return moves & ~other
+
+        #A blocked jump lets the pawn move to any square the other pawn can reach
+        if jump:
+            moves |= jump
+        else:
+            moves |= neighbors(other, vwalls, hwalls)
+        return moves & ~(current | other)
+
+    def move_pawn(self, player, move_to_position):
+        """
+        Moves a pawn to a valid position, switches the turn and records a win.
+        p1: player that is moving
+        p2: pawn destination (tuple coordinate, (x,y))
+        """
+        if self.basic_checks(player, move_to_position) is False:
+            return False
+        index = move_to_position[1] * 9 + move_to_position[0]
+        if not self.pawn_moves_mask(player) >> index & 1:
+            return False
+
+        state = self._state
+        if player == 1:
+            state = state & ~(_SQUARE_BITS << _P1_SHIFT) | index << _P1_SHIFT
+            won = index >= 72
+        else:
+            state = state & ~(_SQUARE_BITS << _P2_SHIFT) | index << _P2_SHIFT
+            won = index < 9
+        state = state & ~(_TURN_BITS << _TURN_SHIFT) | (3 - player) << _TURN_SHIFT
+        if won:
+            state |= 1 << _WON_SHIFT
+        self._state = state
+        return True
+
+    def fence_checks(self, player, position, vertical_or_horizontal):
+        """
+        Returns False if placement of the fence is incorrect.
+        p1: player (input as number 1 or 2)
+        p2: coordinate of the position where the fence wants to be placed (tuple, (x,y))
+        p3: "v" or "h" (for a vertically placed fence or horizontally placed fence)
+        """
+        if self.basic_checks(player, position) is False:
+            return False
+        if (position[0] == 0 and vertical_or_horizontal == "v") or (position[1] == 0 and vertical_or_horizontal == "h"):
+            return False
+        if self.get_fence_inventory(player) <= 0:
+            return False
+        bit = to_bit(position)
+        if (vertical_or_horizontal == "v" and self._vwalls & bit) or (vertical_or_horizontal == "h" and self._hwalls & bit):
+            return False
+        return True
+
+    def place_fence(self, player, vertical_or_horizontal, position):
+        """
+        Places a fence on the top left corner of the square ("v" blocks the square to the left, "h" blocks the square
+        above), uses one of the player's fences and switches the turn. A fence that leaves either pawn without a path
+        to its goal is rejected.
+        p1: 1 or 2 for the player.
+        p2: "v" or "h" for vertical or horizontal placement
+        p3: tuple (x,y) coordinate of where the fence wants to be placed
+        """
+        if self.fence_checks(player, position, vertical_or_horizontal) is False:
+            return False
+        vwalls = self._vwalls
+        hwalls = self._hwalls
+        if vertical_or_horizontal == "v":
+            vwalls |= to_bit(position)
+        elif vertical_or_horizontal == "h":
+            hwalls |= to_bit(position)
+        else:
+            return False
+
+        #A fence can't take away every path of either player to their goal
+        state = self._state
+        p1 = 1 << (state >> _P1_SHIFT & _SQUARE_BITS)
+        p2 = 1 << (state >> _P2_SHIFT & _SQUARE_BITS)
+        if not reaches(p1, ROW_8, vwalls, hwalls) or not reaches(p2, ROW_0, vwalls, hwalls):
+            return False
+        self._vwalls = vwalls
+        self._hwalls = hwalls
+        shift = _INV1_SHIFT if player == 1 else _INV2_SHIFT
+        state -= 1 << shift
+        self._state = state & ~(_TURN_BITS << _TURN_SHIFT) | (3 - player) << _TURN_SHIFT
+        return True
+
+    def is_winner(self, player):
+        """
+        Returns boolean if input player is a winner.
+        p1: player (1 or 2)
+        """
+        if player < 1 or player > 2:
+            return "Please enter a correct player"
+        index = self._state >> (_P1_SHIFT if player == 1 else _P2_SHIFT) & _SQUARE_BITS
+        if (player == 1 and index >= 72) or (player == 2 and index < 9):
+            self._state |= 1 << _WON_SHIFT
+            return True
+        return False
+
+
+def game_summary(game):
+    """Returns a comparable summary of a game's state that both engines can produce."""
+    return (game.get_position(1), game.get_position(2), game.get_player_turn(), game.get_game_won(),
+            game.get_fence_inventory(1), game.get_fence_inventory(2),
+            sorted(game.get_vFences()), sorted(game.get_hFences()))
+
+
+def candidate_actions(game, rng, samples):
+    """
+    Returns a list of actions to try in a position: every pawn step and jump around the moving pawn, a random sample
+    of fences, the fences next to both pawns, and a few malformed actions. Actions are tuples (method name, arguments).
+    """
+    player = game.get_player_turn()
+    x, y = game.get_position(player)
+    actions = [("move_pawn", (player, (x + dx, y + dy))) for dx in range(-2, 3) for dy in range(-2, 3)]
+    for _ in range(samples):
+        actions.append(("place_fence", (player, rng.choice("vh"), (rng.randrange(9), rng.randrange(9)))))
+    #Fences right around both pawns are the ones most likely to cut off a pawn from its goal
+    for px, py in (game.get_position(1), game.get_position(2)):
+        actions += [("place_fence", (player, "v", (px, py))), ("place_fence", (player, "v", (px + 1, py))),
+                    ("place_fence", (player, "h", (px, py))), ("place_fence", (player, "h", (px, py + 1)))]
+    actions += [
+        ("move_pawn", (3 - player, (x, y + 1))),
+        ("move_pawn", (player, (None, None))),
+        ("place_fence", (player, "x", (4, 4))),
+        ("place_fence", (3 - player, "v", (4, 4))),
+        ("place_fence", (player, "h", (9, 4))),
+    ]
+    return actions
+
+
+def cross_check(games=10, seed=0, samples=20, max_plies=120):
+    """
+    Differential test between QuoridorGame and BitboardQuoridorGame. Plays random games and, at every ply, tries the
+    candidate actions on copies of both engines. Raises AssertionError if the engines ever disagree about whether an
+    action is accepted or about the resulting state. Returns the number of actions that were compared.
+    """
+    rng = random.Random(seed)
+    compared = 0
+    for _ in range(games):
+        game = q.QuoridorGame()
+        bitboard = BitboardQuoridorGame()
+        for _ in range(max_plies):
+            accepted = []
+            for method, arguments in candidate_actions(game, rng, samples):
+                game_copy = pickle.loads(pickle.dumps(game, -1))
+                bitboard_copy = bitboard.copy()
+                expected = getattr(game_copy, method)(*arguments)
+                actual = getattr(bitboard_copy, method)(*arguments)
+                assert expected == actual, (method, arguments, expected, actual, game_summary(game))
+                assert game_summary(game_copy) == game_summary(bitboard_copy), (method, arguments)
+                compared += 1
+                if expected:
+                    accepted.append((method, arguments))
+            if not accepted:
+                break
+            method, arguments = rng.choice(accepted)
+            getattr(game, method)(*arguments)
+            getattr(bitboard, method)(*arguments)
+            if game.get_game_won():
+                break
+    return compared
+
+
+if __name__ == '__main__':
+    print("bitboard engine agrees with QuoridorGame on %d actions" % cross_check())
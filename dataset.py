@@ -0,0 +1,231 @@
+#Description: Feature planes and memory-mapped datasets of Quoridor positions for training.
+#encode turns a position into a (7, 9, 9) uint8 array of feature planes (see PLANES). ShardWriter writes the positions
+#of whole games, each with the action that was played (the move target) and the outcome for the player to move, to
+#preallocated .npy shards that are filled through memory maps. A meta.json file lists the shards and how many
+#positions each one holds; load_shards opens them read-only as memory maps, so data loaders read them without copies.
+#Needs numpy.
+#Usage: python dataset.py convert games.jsonl|games.qgr DATASET_DIR [--shard-size N]
+#       python dataset.py info DATASET_DIR
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+import Quoridor as q
+import gamerecord
+
+
+#Feature planes, indexed [plane, y, x]. Pawn and fence planes are 1 where there is a pawn or fence (a fence is stored
+#on the square given to place_fence). Inventory planes hold the number of fences left on every square. The turn plane
+#is all ones when player 2 is to move.
+PLANES = ("p1_pawn", "p2_pawn", "v_fences", "h_fences", "p1_fences_left", "p2_fences_left", "player2_to_move")
+P1_PAWN, P2_PAWN, V_FENCES, H_FENCES, P1_FENCES_LEFT, P2_FENCES_LEFT, TURN = range(len(PLANES))
+PLANE_SHAPE = (len(PLANES), 9, 9)
+META_FILE = "meta.json"
+DEFAULT_SHARD_SIZE = 1 << 16 #positions per shard
+
+
+def encode(game, out=None):
+    """
+    Returns the feature planes of a position as a (7, 9, 9) uint8 array.
+    p1: QuoridorGame object (or any game with the same getters)
+    p2: out -- optional (7, 9, 9) uint8 array to write into, such as one row of a shard
+    """
+    planes = np.zeros(PLANE_SHAPE, dtype=np.uint8) if out is None else out
+    if out is not None:
+        planes.fill(0)
+    for plane, player in ((P1_PAWN, 1), (P2_PAWN, 2)):
+        x, y = game.get_position(player)
+        planes[plane, y, x] = 1
+    for plane, fences in ((V_FENCES, game.get_vFences()), (H_FENCES, game.get_hFences())):
+        for x, y in fences:
+            planes[plane, y, x] = 1
+    planes[P1_FENCES_LEFT] = game.get_fence_inventory(1)
+    planes[P2_FENCES_LEFT] = game.get_fence_inventory(2)
+    planes[TURN] = game.get_player_turn() == 2
+    return planes
+
+
+def encode_batch(batch):
+    """
+    Returns the feature planes of every game of a batch.BatchQuoridorGame as an (N, 7, 9, 9) uint8 array, with the
+    same planes as encode.
+    """
+    size = batch.get_size()
+    rows = np.arange(size)
+    planes = np.zeros((size,) + PLANE_SHAPE, dtype=np.uint8)
+    flat = planes.reshape(size, len(PLANES), 81)
+    pawns = batch.get_pawns()
+    flat[rows, P1_PAWN, pawns[:, 0]] = 1
+    flat[rows, P2_PAWN, pawns[:, 1]] = 1
+    planes[:, V_FENCES:H_FENCES + 1] = batch.get_fences()
+    inventories = batch.get_inventories()
+    planes[:, P1_FENCES_LEFT] = inventories[:, 0, None, None]
+    planes[:, P2_FENCES_LEFT] = inventories[:, 1, None, None]
+    planes[:, TURN] = (batch.get_turn() == 2)[:, None, None]
+    return planes
+
+
+def shard_paths(directory, name):
+    """Returns the paths of the planes, targets and outcomes files of a shard."""
+    return tuple(os.path.join(directory, "%s.%s.npy" % (name, part)) for part in ("planes", "targets", "outcomes"))
+
+
+class ShardWriter:
+    """
+    Writes positions to a dataset directory. Each shard is three .npy files created at full size and filled through
+    memory maps: planes (shard_size, 7, 9, 9) uint8, targets (shard_size,) int16 with the action number that was
+    played (Quoridor.action_to_index) and outcomes (shard_size,) int8 with 1 if the player to move went on to win, -1
+    if they lost and 0 if the game has no winner. Only the first "positions" rows of a shard (see meta.json) are used.
+    Can be used as a context manager.
+    """
+    def __init__(self, directory, shard_size=DEFAULT_SHARD_SIZE):
+        """
+        p1: directory -- dataset directory, created if needed; shards already listed in its meta.json are kept
+        p2: shard_size -- positions per shard
+        """
+        self._directory = directory
+        self._shard_size = shard_size
+        os.makedirs(directory, exist_ok=True)
+        self._shards = read_meta(directory)["shards"] if os.path.exists(os.path.join(directory, META_FILE)) else []
+        self._arrays = None #planes, targets and outcomes memory maps of the shard being filled
+        self._filled = 0
+
+    def get_position_count(self):
+        """Returns the number of positions in the dataset."""
+        return sum(shard["positions"] for shard in self._shards) + self._filled
+
+    def new_shard(self):
+        """Closes the shard being filled and creates the next one."""
+        self.finish_shard()
+        name = "shard-%05d" % len(self._shards)
+        planes_path, targets_path, outcomes_path = shard_paths(self._directory, name)
+        self._arrays = (
+            np.lib.format.open_memmap(planes_path, mode="w+", dtype=np.uint8, shape=(self._shard_size,) + PLANE_SHAPE),
+            np.lib.format.open_memmap(targets_path, mode="w+", dtype=np.int16, shape=(self._shard_size,)),
+            np.lib.format.open_memmap(outcomes_path, mode="w+", dtype=np.int8, shape=(self._shard_size,)),
+        )
+        self._shards.append({"name": name, "positions": 0})
+        self._filled = 0
+
+    def finish_shard(self):
+        """Flushes the shard being filled and records its size in meta.json."""
+        if self._arrays is None:
+            return
+        for array in self._arrays:
+            array.flush()
+        self._shards[-1]["positions"] = self._filled
+        self._filled = 0
+        self._arrays = None
+        self.write_meta()
+
+    def write_meta(self):
+        """Writes meta.json: the plane names, the shard size and every shard with its number of positions."""
+        meta = {"planes": list(PLANES), "shard_size": self._shard_size, "shards": self._shards}
+        with open(os.path.join(self._directory, META_FILE), "w") as meta_file:
+            json.dump(meta, meta_file, indent=1)
+
+    def write_game(self, actions, winner=None):
+        """
+        Replays a game and writes every position before an action, with that action and the outcome for the player
+        to move. Raises ValueError if an action is illegal; nothing of the game is written then.
+        p1: actions -- list of action tuples ("p"|"v"|"h", (x,y)) or action numbers, in the order they were made
+        p2: winner -- 1, 2 or None for a game without a winner
+        """
+        actions = [gamerecord.ACTIONS[action] if isinstance(action, (int, np.integer)) else action
+                   for action in actions]
+        #The game is checked before any row is written, so an illegal action can't leave half a game in a shard
+        game = q.QuoridorGame()
+        for number, action in enumerate(actions):
+            if not game.apply(action):
+                raise ValueError("action %d %s is illegal" % (number, action))
+        game = q.QuoridorGame()
+        for action in actions:
+            if self._arrays is None or self._filled == self._shard_size:
+                self.new_shard()
+            planes, targets, outcomes = self._arrays
+            player = game.get_player_turn()
+            encode(game, planes[self._filled])
+            targets[self._filled] = q.action_to_index(action)
+            outcomes[self._filled] = 0 if winner is None else (1 if winner == player else -1)
+            game.apply(action)
+            self._filled += 1
+
+    def close(self):
+        """Finishes the last shard and writes meta.json."""
+        if self._arrays is not None:
+            self.finish_shard()
+        else:
+            self.write_meta()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_meta(directory):
+    """Returns the contents of the meta.json file of a dataset directory."""
+    with open(os.path.join(directory, META_FILE)) as meta_file:
+        return json.load(meta_file)
+
+
+def load_shards(directory):
+    """
+    Returns the shards of a dataset as a list of (planes, targets, outcomes) read-only memory maps, each cut to the
+    positions that were written.
+    p1: dataset directory
+    """
+    shards = []
+    for shard in read_meta(directory)["shards"]:
+        count = shard["positions"]
+        arrays = tuple(np.load(path, mmap_mode="r")[:count] for path in shard_paths(directory, shard["name"]))
+        shards.append(arrays)
+    return shards
+
+
+def convert(source, directory, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Writes the positions of a record file of selfplay.py (JSON lines) or gamerecord.py (binary) to a dataset.
+    Returns the number of games.
+    """
+    games = 0
+    with ShardWriter(directory, shard_size) as writer:
+        if source.endswith(".jsonl"):
+            with open(source) as lines:
+                for line in lines:
+                    record = json.loads(line)
+                    writer.write_game([(kind, (x, y)) for kind, x, y in record["actions"]], record["winner"])
+                    games += 1
+        else:
+            for winner, actions in gamerecord.read_games(source, raw=True):
+                writer.write_game(list(actions), winner)
+                games += 1
+    return games
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Write and inspect memory-mapped datasets of Quoridor positions.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="convert a .jsonl or binary game record file")
+    convert_parser.add_argument("source")
+    convert_parser.add_argument("directory")
+    convert_parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    info_parser = commands.add_parser("info", help="print the shards of a dataset")
+    info_parser.add_argument("directory")
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        print("converted %d games" % convert(args.source, args.directory, args.shard_size))
+    else:
+        shards = load_shards(args.directory)
+        for name, (planes, targets, outcomes) in zip((shard["name"] for shard in read_meta(args.directory)["shards"]), shards):
+            print("%s: %d positions, %d won by the player to move" % (name, len(targets), int((outcomes == 1).sum())))
+        print("%d positions in %d shards" % (sum(len(shard[1]) for shard in shards), len(shards)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+#Description: Exact solver for Quoridor endgames in which both players have used all their fences. What is left is a
+#pawn race on a fixed board, so every position with the same fences can be solved at once by retrograde analysis over
+#(player 1 square, player 2 square, side to move): positions where the side to move reaches its goal in one move are
+#won, a position is won if a move leads to a lost position and lost if every move leads to a won one. Positions that
+#are never decided are draws (both players can keep the other from winning forever).
+#EndgameTablebase keeps the solved tables keyed by board size and fence set and can save them to a file and load them
+#again, so a result is only ever computed once. The file starts with the 5 byte header b"QEGT" + version, followed by
+#every table: a 5 byte header (board size, then the numbers of "v" and "h" fences as little-endian 16 bit integers),
+#the square index of every fence as a little-endian 16 bit integer and the table as little-endian 16 bit integers.
+#Usage: python endgame.py solve games.jsonl endgame.qtb   (solves the final fence set of every finished record)
+#       python endgame.py info endgame.qtb
+
+import argparse
+import copy
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import deque
+
+import Quoridor as q
+
+
+MAGIC = b"QEGT"
+VERSION = 1
+FILE_HEADER = MAGIC + bytes([VERSION])
+TABLE_HEADER = struct.Struct("<BHH")
+DRAW = 0 #table value of a position that neither player can win
+DEFAULT_MAX_TABLES = 1024 #tables kept in memory (about 26 KB each on the standard board); the oldest is dropped first
+
+
+def is_endgame(game):
+    """
+    Returns True if a position can be solved: a two player game that is not won in which neither player has a fence
+    left.
+    p1: QuoridorGame object
+    """
+    return (game.get_player_count() == 2 and not game.get_game_won() and game.get_fence_inventory(1) == 0
+            and game.get_fence_inventory(2) == 0)
+
+
+def fences_key(game):
+    """Returns the key of the tables of a game's board: (size, sorted "v" fences, sorted "h" fences)."""
+    return game.get_size(), tuple(sorted(game.get_vFences())), tuple(sorted(game.get_hFences()))
+
+
+def table_index(squares, turn, p1_index, p2_index):
+    """Returns the position of (side to move, player 1 square index, player 2 square index) in a table."""
+    return ((turn - 1) * squares + p1_index) * squares + p2_index
+
+
+def pawn_moves(moves, neighbors, mover, other):
+    """
+    Returns the square indexes a pawn can move to, with the rules of QuoridorGame.possible_pawn_moves: orthogonal
+    moves, the jump over a pawn next to it and the other pawn's moves when that jump is blocked.
+    p1: moves -- tuple of the open moves of every square index (with the fences in place)
+    p2: neighbors -- tuple of the squares next to every square index on an empty board
+    p3: square index of the pawn that moves
+    p4: square index of the other pawn
+    """
+    result = [move for move in moves[mover] if move != other]
+    if other in neighbors[mover]:
+        jump = 2 * other - mover
+        if jump in moves[other]:
+            result.append(jump)
+        else:
+            result.extend(move for move in moves[other] if move != mover and move not in result)
+    return result
+
+
+def solve(game):
+    """
+    Returns the table of every position with the pawns anywhere on the game's board and its fences in place, as an
+    array of 16 bit integers indexed by table_index. A value n > 0 means the side to move wins in n plies, n < 0 that
+    it loses in -n plies (both with best play: the winner wins as fast as possible and the loser holds out as long as
+    possible) and DRAW that no one can force a win. Positions with a pawn already on its goal are left as DRAW.
+    p1: QuoridorGame object (only its board size and fences are used)
+    """
+    topology = game.get_topology()
+    squares = len(topology.coordinates)
+    square_index = topology.square_index
+    moves = tuple(tuple(square_index[move] for move in square.get_ortho_moves()) for square in game.get_squares())
+    neighbors = tuple(tuple(square_index[move] for move in ortho_moves) for ortho_moves in topology.ortho_moves)
+    goals = {player: frozenset(square_index[square] for square in topology.goals[player]) for player in (1, 2)}
+
+    values = array("h", bytes(2 * 2 * squares * squares))
+    resolved = bytearray(2 * squares * squares)
+    unresolved_moves = array("i", bytes(4 * 2 * squares * squares))
+    predecessors = [[] for _ in range(2 * squares * squares)]
+    queue = deque()
+    for turn in (1, 2):
+        goal = goals[turn]
+        for p1_index in range(squares):
+            if p1_index in goals[1]:
+                continue
+            for p2_index in range(squares):
+                if p2_index == p1_index or p2_index in goals[2]:
+                    continue
+                state = table_index(squares, turn, p1_index, p2_index)
+                mover, other = (p1_index, p2_index) if turn == 1 else (p2_index, p1_index)
+                targets = pawn_moves(moves, neighbors, mover, other)
+                if any(target in goal for target in targets):
+                    values[state] = 1
+                    resolved[state] = 1
+                    queue.append(state)
+                    continue
+                unresolved_moves[state] = len(targets)
+                for target in targets:
+                    if turn == 1:
+                        predecessors[table_index(squares, 2, target, p2_index)].append(state)
+                    else:
+                        predecessors[table_index(squares, 1, p1_index, target)].append(state)
+
+    #Positions are decided in order of their distance from the end, so wins are as short as possible and losses as
+    #long as possible
+    while queue:
+        state = queue.popleft()
+        value = values[state]
+        for predecessor in predecessors[state]:
+            if resolved[predecessor]:
+                continue
+            if value < 0:
+                values[predecessor] = 1 - value
+            else:
+                unresolved_moves[predecessor] -= 1
+                if unresolved_moves[predecessor] > 0:
+                    continue
+                values[predecessor] = -1 - value
+            resolved[predecessor] = 1
+            queue.append(predecessor)
+    return values
+
+
+class EndgameTablebase:
+    """
+    Cache of solved endgame tables keyed by board size and fence set (see solve). A table is solved the first time a
+    position with its fences is probed. At most max_tables tables are kept in memory; the oldest is dropped first.
+    A tablebase can be shared between threads (the pygame window and the computer player's worker thread): the tables
+    are guarded by a lock, and only one table is solved at a time, so a table is never solved twice.
+    """
+    def __init__(self, path=None, max_tables=DEFAULT_MAX_TABLES):
+        """
+        p1: path -- file that save writes to; tables already in it are loaded
+        p2: max_tables -- number of tables kept in memory
+        """
+        self._path = path
+        self._max_tables = max_tables
+        self._tables = {} #table of every fences_key, oldest first
+        self._hits = 0
+        self._solved = 0
+        self._lock = threading.Lock() #guards _tables, the counters and _pending
+        self._solve_lock = threading.Lock() #held while a table is solved, outside _lock so lookups don't wait for it
+        self._pending = set() #keys of the tables solve_in_background is solving
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def get_table_count(self):
+        """Returns the number of tables in memory."""
+        with self._lock:
+            return len(self._tables)
+
+    def get_stats(self):
+        """Returns the number of tables in memory, the probes answered by a table already known and the tables solved."""
+        with self._lock:
+            return {"tables": len(self._tables), "hits": self._hits, "solved": self._solved}
+
+    def add_table(self, key, table):
+        """Adds a solved table, dropping the oldest table if there are already max_tables."""
+        with self._lock:
+            if key not in self._tables and len(self._tables) >= self._max_tables:
+                del self._tables[next(iter(self._tables))]
+            self._tables[key] = table
+
+    def find_table(self, key):
+        """Returns the table of a fences_key, or None if it is not known. Counts a hit if it is."""
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._hits += 1
+            return table
+
+    def get_table(self, game, solve_missing=True):
+        """
+        Returns the table of a game's board size and fences, solving it if it is not known yet. If another thread is
+        solving a table, waits for it first, then looks again in case it was this one.
+        p1: QuoridorGame object
+        p2: solve_missing -- if False, None is returned instead of solving a table that is not known (never waits)
+        """
+        key = fences_key(game)
+        table = self.find_table(key)
+        if table is not None or not solve_missing:
+            return table
+        with self._solve_lock:
+            table = self.find_table(key)
+            if table is None:
+                table = solve(game)
+                self.add_table(key, table)
+                with self._lock:
+                    self._solved += 1
+        return table
+
+    def solve_in_background(self, game):
+        """
+        Starts solving the table of an endgame position in a new thread, unless it is known or already being solved,
+        so that a caller that can't wait (the pygame window) can probe with solve_missing=False and find it later.
+        p1: QuoridorGame object, which may be changed after the call
+        """
+        if not is_endgame(game):
+            return
+        key = fences_key(game)
+        with self._lock:
+            if key in self._tables or key in self._pending:
+                return
+            self._pending.add(key)
+        threading.Thread(target=self.solve_pending, args=(key, copy.deepcopy(game)), daemon=True).start()
+
+    def solve_pending(self, key, game):
+        """Runs in the thread started by solve_in_background: solves the table of the game."""
+        try:
+            self.get_table(game)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def probe(self, game, solve_missing=True):
+        """
+        Returns the exact result of a position for the side to move (plies to a win if positive, plies to a loss if
+        negative, DRAW if no one can win), or None if the position is not an endgame (see is_endgame).
+        p1: QuoridorGame object
+        p2: solve_missing -- if False, None is also returned when the table of the position's fences is not known.
+        Solving a table takes tens of milliseconds, much longer than searching one position.
+        """
+        if not is_endgame(game):
+            return None
+        table = self.get_table(game, solve_missing)
+        if table is None:
+            return None
+        square_index = game.get_topology().square_index
+        return table[table_index(len(square_index), game.get_player_turn(), square_index[game.get_position(1)],
+                                 square_index[game.get_position(2)])]
+
+    def best_move(self, game):
+        """
+        Returns (action, result) for an endgame position: the pawn move that keeps the result of probe (the fastest
+        win, the slowest loss or a move that keeps the draw) and that result. Returns None if the position is not an
+        endgame or the side to move has no move.
+        p1: QuoridorGame object
+        """
+        result = self.probe(game)
+        if result is None:
+            return None
+        player = game.get_player_turn()
+        goal = game.get_goal(player)
+        square_index = game.get_topology().square_index
+        squares = len(square_index)
+        table = self.get_table(game)
+        other_index = square_index[game.get_position(3 - player)]
+        best, best_rank = None, None
+        for move in game.possible_pawn_moves(player):
+            if move in goal:
+                return ("p", move), 1
+            if player == 1:
+                reply = table[table_index(squares, 2, square_index[move], other_index)]
+            else:
+                reply = table[table_index(squares, 1, other_index, square_index[move])]
+            #Rank the move for the side to move: wins first (shortest first), then draws, then losses (longest first)
+            if reply < 0:
+                rank = (2, reply)
+            elif reply == DRAW:
+                rank = (1, 0)
+            else:
+                rank = (0, reply)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = ("p", move), rank
+        if best is None:
+            return None
+        return best, result
+
+    def save(self, path=None):
+        """
+        Writes every table in memory to a file (see the description at the top), replacing it.
+        p1: path -- file to write, the path given when the tablebase was made by default
+        """
+        path = path if path is not None else self._path
+        with self._lock:
+            tables = list(self._tables.items())
+        with open(path + ".tmp", "wb") as tablebase_file:
+            tablebase_file.write(FILE_HEADER)
+            for (size, v_fences, h_fences), table in tables:
+                tablebase_file.write(TABLE_HEADER.pack(size, len(v_fences), len(h_fences)))
+                fences = array("H", (y * size + x for x, y in v_fences + h_fences))
+                for values in (fences, table):
+                    if sys.byteorder == "big":
+                        values = array(values.typecode, values)
+                        values.byteswap()
+                    values.tofile(tablebase_file)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path):
+        """
+        Adds the tables of a file written by save. Raises ValueError if it is not a tablebase file or if it is cut off;
+        no table is added then.
+        """
+        with open(path, "rb") as tablebase_file:
+            data = tablebase_file.read()
+        if data[:len(FILE_HEADER)] != FILE_HEADER:
+            raise ValueError("%s is not a version %d endgame tablebase file" % (path, VERSION))
+        tables = []
+        offset = len(FILE_HEADER)
+        while offset < len(data):
+            if offset + TABLE_HEADER.size > len(data):
+                raise ValueError("truncated endgame tablebase: %s ends in the middle of a table header" % path)
+            size, v_count, h_count = TABLE_HEADER.unpack_from(data, offset)
+            offset += TABLE_HEADER.size
+            squares = size * size
+            if offset + 2 * (v_count + h_count) + 2 * 2 * squares * squares > len(data):
+                raise ValueError("truncated endgame tablebase: %s ends in the middle of a table" % path)
+            fences = array("H", data[offset:offset + 2 * (v_count + h_count)])
+            offset += 2 * (v_count + h_count)
+            table = array("h", data[offset:offset + 2 * 2 * squares * squares])
+            offset += 2 * 2 * squares * squares
+            if sys.byteorder == "big":
+                fences.byteswap()
+                table.byteswap()
+            coordinates = [(index % size, index // size) for index in fences]
+            tables.append(((size, tuple(coordinates[:v_count]), tuple(coordinates[v_count:])), table))
+        for key, table in tables:
+            self.add_table(key, table)
+
+
+def format_result(result, player):
+    """
+    Returns a probe result as text for the side to move, for example "P1 wins in 3 moves" (moves of the winner).
+    p1: result of EndgameTablebase.probe
+    p2: player to move (1 or 2)
+    """
+    if result == DRAW:
+        return "draw"
+    if result > 0:
+        return "P%d wins in %d moves" % (player, (result + 1) // 2)
+    return "P%d wins in %d moves" % (3 - player, -result // 2)
+
+
+def final_position(actions):
+    """Returns the QuoridorGame after a list of actions."""
+    game = q.QuoridorGame()
+    for action in actions:
+        game.apply(action)
+    return game
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Solve Quoridor endgames without fences and keep them in a file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    solve_parser = commands.add_parser("solve", help="solve the fences of every record that used all its fences")
+    solve_parser.add_argument("source", help="JSON lines written by selfplay.py")
+    solve_parser.add_argument("path")
+    info_parser = commands.add_parser("info", help="print the tables of a tablebase file")
+    info_parser.add_argument("path")
+    args = parser.parse_args(argv)
+    tablebase = EndgameTablebase(args.path, max_tables=sys.maxsize)
+    if args.command == "solve":
+        with open(args.source) as lines:
+            for line in lines:
+                actions = [(kind, (x, y)) for kind, x, y in json.loads(line)["actions"]]
+                game = final_position(actions)
+                if game.get_fence_inventory(1) == 0 and game.get_fence_inventory(2) == 0:
+                    tablebase.get_table(game)
+        tablebase.save()
+    print("%d tables" % tablebase.get_table_count())
+
+
+if __name__ == '__main__':
+    main()
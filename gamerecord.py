@@ -0,0 +1,149 @@
+#Description: Compact binary format for Quoridor game records.
+#A file starts with the 5 byte header b"QRDG" + version. Each game follows as a 3 byte game header (winner: 0 for none,
+#1 or 2, then the number of actions as a little-endian 16 bit integer) and one byte per action. The byte is the action
+#number of Quoridor.action_to_index (0-80 pawn moves, 81-161 "v" fences, 162-242 "h" fences). The player of each
+#action is not stored: players alternate, starting with player 1.
+#Usage: python gamerecord.py convert games.jsonl games.qgr
+#       python gamerecord.py info games.qgr
+
+import json
+import mmap
+import struct
+import sys
+
+import Quoridor as q
+
+
+MAGIC = b"QRDG"
+VERSION = 1
+FILE_HEADER = MAGIC + bytes([VERSION])
+GAME_HEADER = struct.Struct("<BH")
+MAX_ACTIONS = 0xFFFF
+ACTIONS = [q.index_to_action(index) for index in range(243)] #action tuple of every action number
+
+
+class GameRecordWriter:
+    """
+    Appends games to a record file. The file header is written when the file is new or empty. Can be used as a
+    context manager.
+    """
+    def __init__(self, path):
+        """p1: path -- file to append to"""
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER)
+
+    def write_game(self, actions, winner=None):
+        """
+        Appends one game.
+        p1: actions -- list of actions as ("p"|"v"|"h", (x,y)) in the order they were made
+        p2: winner -- 1, 2 or None for a game without a winner
+        """
+        if len(actions) > MAX_ACTIONS:
+            raise ValueError("a game can have at most %d actions" % MAX_ACTIONS)
+        self._file.write(GAME_HEADER.pack(winner or 0, len(actions)))
+        self._file.write(bytes(q.action_to_index(action) for action in actions))
+
+    def flush(self):
+        """Writes buffered games to the file."""
+        self._file.flush()
+
+    def close(self):
+        """Closes the file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def read_games(path, raw=False):
+    """
+    Generates the games of a record file one at a time as (winner, actions), with winner None for a game without a
+    winner. The file is memory mapped, so only the pages of the games being read are loaded. Raises ValueError if the
+    file is not a record file or is cut off in the middle of a game (after the games before it).
+    p1: path -- record file
+    p2: raw -- if True, actions is the bytes of action numbers instead of a list of action tuples
+    """
+    with open(path, "rb") as record_file:
+        if record_file.seek(0, 2) == 0:
+            return
+        with mmap.mmap(record_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(FILE_HEADER)] != FILE_HEADER:
+                raise ValueError("%s is not a Quoridor game record file" % path)
+            offset = len(FILE_HEADER)
+            end = len(data)
+            while offset < end:
+                #A file cut off inside a game header or inside its actions raises the same error
+                if end - offset < GAME_HEADER.size:
+                    raise ValueError("truncated game record: %s ends in the middle of a game" % path)
+                winner, count = GAME_HEADER.unpack_from(data, offset)
+                offset += GAME_HEADER.size
+                if end - offset < count:
+                    raise ValueError("truncated game record: %s ends in the middle of a game" % path)
+                moves = data[offset:offset + count]
+                offset += count
+                if raw:
+                    yield winner or None, moves
+                else:
+                    yield winner or None, [ACTIONS[index] for index in moves]
+
+
+def replay(actions, ply=None):
+    """
+    Returns a QuoridorGame in the position after the first ply actions of a game (all of them by default).
+    Raises ValueError if an action is illegal.
+    p1: actions -- list of action tuples, or bytes of action numbers
+    p2: ply -- number of actions to make
+    """
+    game = q.QuoridorGame()
+    if ply is None:
+        ply = len(actions)
+    for number in range(ply):
+        action = actions[number]
+        if isinstance(action, int):
+            action = ACTIONS[action]
+        if not game.apply(action):
+            raise ValueError("action %d %s is illegal" % (number, action))
+    return game
+
+
+def convert_jsonl(source, destination):
+    """
+    Appends the games of a JSON lines file written by selfplay.py to a record file. Returns the number of games.
+    p1: source -- path of the JSON lines file
+    p2: destination -- path of the record file
+    """
+    games = 0
+    with open(source) as lines, GameRecordWriter(destination) as writer:
+        for line in lines:
+            record = json.loads(line)
+            writer.write_game([(kind, (x, y)) for kind, x, y in record["actions"]], record["winner"])
+            games += 1
+    return games
+
+
+def main(argv=None):
+    """Command line entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 3 and argv[0] == "convert":
+        print("converted %d games" % convert_jsonl(argv[1], argv[2]))
+    elif len(argv) == 2 and argv[0] == "info":
+        games = actions = 0
+        wins = {1: 0, 2: 0, None: 0}
+        for winner, moves in read_games(argv[1], raw=True):
+            games += 1
+            actions += len(moves)
+            wins[winner] += 1
+        print("%d games, %d actions, player 1 won %d, player 2 won %d, unfinished %d" % (
+            games, actions, wins[1], wins[2], wins[None]))
+    else:
+        print("usage: python gamerecord.py convert GAMES.jsonl GAMES.qgr | info GAMES.qgr", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+#Description: Opt-in instrumentation of the hot paths of QuoridorGame. While it is on, calls to find_square,
+#basic_possible_moves, move_pawn, place_fence and fence_checks are counted and timed, and every move_pawn or
+#place_fence that returns False is given a rejection reason. When it is off the methods are the original ones, so it
+#costs nothing.
+#Use it around some code:
+#   with instrument.instrumented("run.prof") as stats:   (the profile path is optional)
+#       ...
+#   print(instrument.format_summary(stats))
+#or for a whole process by setting the environment variable QUORIDOR_INSTRUMENT before starting it, for example
+#"QUORIDOR_INSTRUMENT=1 python server.py". The summary table is printed to standard error when the process exits. Any
+#value other than 1 is used as a path to also write a cProfile file to, which can be read with pstats or snakeviz.
+#Worker processes of selfplay.py and mcts.py don't print a summary.
+
+import atexit
+import cProfile
+import functools
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import Quoridor as q
+
+
+INSTRUMENTED = ("find_square", "basic_possible_moves", "move_pawn", "place_fence", "fence_checks")
+
+_originals = {} #original method of every instrumented name while instrumentation is on
+_stats = None
+
+
+def new_stats():
+    """Returns empty statistics: calls and seconds per method, and a Counter of (method, reason) rejections."""
+    return {"calls": dict.fromkeys(INSTRUMENTED, 0), "seconds": dict.fromkeys(INSTRUMENTED, 0.0),
+            "rejections": Counter()}
+
+
+def move_rejection(game, player, move_to_position):
+    """
+    Returns why move_pawn rejected a move, checking in the same order as move_pawn. Doesn't call any instrumented
+    method.
+    """
+    reason = basic_rejection(game, player, move_to_position)
+    if reason is not None:
+        return reason
+    topology = game.get_topology()
+    if any(move_to_position == game.get_position(other) for other in range(1, topology.players + 1)):
+        return "square taken by a pawn"
+    index = topology.square_index[game.get_position(player)]
+    if move_to_position in topology.ortho_moves[index]:
+        return "fence in the way"
+    return "not reachable"
+
+
+def fence_rejection(game, player, vertical_or_horizontal, position):
+    """
+    Returns why place_fence rejected a fence, checking in the same order as fence_checks and place_fence. Doesn't call
+    any instrumented method.
+    """
+    reason = basic_rejection(game, player, position)
+    if reason is not None:
+        return reason
+    topology = game.get_topology()
+    edge = topology.fence_edges.get((vertical_or_horizontal, position))
+    if edge is None:
+        return "not a fence slot"
+    if game.get_fence_inventory(player) <= 0:
+        return "no fences left"
+    if edge[0] not in game.get_squares()[topology.square_index[position]].get_ortho_moves():
+        return "slot taken"
+    return "would block a path"
+
+
+def basic_rejection(game, player, position):
+    """Returns the reason basic_checks fails for a move or fence, or None if it passes."""
+    if game.get_game_won() is True:
+        return "game over"
+    if game.get_player_turn() != player:
+        return "not your turn"
+    if position[0] is None or position[1] is None:
+        return "no position"
+    if game.get_topology().square_index.get(tuple(position)) is None:
+        return "off the board"
+    return None
+
+
+REJECTION_REASONS = {"move_pawn": move_rejection, "place_fence": fence_rejection}
+
+
+def instrument_method(name, method):
+    """Returns a wrapper of a QuoridorGame method that counts and times its calls and records rejections."""
+    perf_counter = time.perf_counter
+    reason_of = REJECTION_REASONS.get(name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = perf_counter()
+        result = method(self, *args, **kwargs)
+        elapsed = perf_counter() - start
+        stats = _stats
+        stats["calls"][name] += 1
+        stats["seconds"][name] += elapsed
+        if result is False and reason_of is not None:
+            stats["rejections"][name, reason_of(self, *args, **kwargs)] += 1
+        return result
+
+    return wrapper
+
+
+def is_enabled():
+    """Returns True if instrumentation is on."""
+    return bool(_originals)
+
+
+def enable(stats=None):
+    """
+    Turns instrumentation on and returns the statistics that are collected into (a new one unless stats is given).
+    Turning it on again only switches to the given statistics.
+    """
+    global _stats
+    _stats = stats if stats is not None else new_stats()
+    if not _originals:
+        for name in INSTRUMENTED:
+            method = q.QuoridorGame.__dict__[name]
+            _originals[name] = method
+            setattr(q.QuoridorGame, name, instrument_method(name, method))
+    return _stats
+
+
+def disable():
+    """Turns instrumentation off and puts the original methods back. Returns the statistics collected."""
+    for name, method in _originals.items():
+        setattr(q.QuoridorGame, name, method)
+    _originals.clear()
+    return _stats
+
+
+def get_stats():
+    """Returns the statistics being collected, or the last ones if instrumentation is off (None if it never ran)."""
+    return _stats
+
+
+@contextmanager
+def instrumented(profile_path=None):
+    """
+    Context manager that turns instrumentation on for its block and yields the statistics. With profile_path the block
+    is also run under cProfile and the profile is written to that path. Afterwards instrumentation is back the way it
+    was: still on, collecting into the earlier statistics, if it was on before (QUORIDOR_INSTRUMENT or an outer
+    block), and off otherwise.
+    """
+    was_enabled, previous_stats = is_enabled(), _stats
+    stats = enable()
+    profiler = cProfile.Profile() if profile_path else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield stats
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if was_enabled:
+            enable(previous_stats)
+        else:
+            disable()
+
+
+def format_summary(stats=None):
+    """
+    Returns a table of calls, total milliseconds and microseconds per call of every instrumented method, followed by
+    the rejection reasons. Times are inclusive: move_pawn includes the basic_possible_moves it calls.
+    """
+    stats = stats if stats is not None else _stats
+    lines = ["%-22s %10s %12s %10s" % ("method", "calls", "total ms", "us/call")]
+    for name in INSTRUMENTED:
+        calls = stats["calls"][name]
+        seconds = stats["seconds"][name]
+        lines.append("%-22s %10d %12.3f %10.3f" % (name, calls, seconds * 1000, seconds / calls * 1e6 if calls else 0.0))
+    if stats["rejections"]:
+        lines.append("")
+        lines.append("%-22s %-24s %10s" % ("rejected by", "reason", "count"))
+        for (name, reason), count in stats["rejections"].most_common():
+            lines.append("%-22s %-24s %10d" % (name, reason, count))
+    return "\n".join(lines)
+
+
+def enable_from_environment(value):
+    """
+    Turns instrumentation on for the rest of the process and prints the summary to standard error at exit. A value
+    other than "1" is also used as the path of a cProfile file written at exit.
+    p1: value of the QUORIDOR_INSTRUMENT environment variable
+    """
+    stats = enable()
+    profiler = None
+    if value != "1":
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def report():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(value)
+        print(format_summary(stats), file=sys.stderr)
+
+    atexit.register(report)
@@ -0,0 +1,128 @@
+#Description: Load generator for server.py. Runs many bot clients at once; each one plays whole games against itself
+#over the line protocol and measures how long every action takes to be answered. Prints p50/p99 action latency and
+#games per second. Without --port or --unix a server is started in the same process on a free localhost port.
+#Example: python loadgen.py --clients 100 --games 2000
+
+import argparse
+import asyncio
+import random
+import time
+
+import Quoridor as q
+import server
+
+
+FENCE_PROBABILITY = 0.2 #chance that a bot tries a random fence instead of stepping along its shortest path
+MAX_PLIES = 200 #games are abandoned after this many accepted actions
+
+
+def percentile(sorted_values, fraction):
+    """Returns the value below which the given fraction of the sorted values lie."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def bot(connect, games, rng, latencies, finished):
+    """
+    Plays games over one connection until the shared games counter runs out. The bot keeps its own copy of the game to
+    pick actions: usually a step along its shortest path, sometimes a random fence (which the server may reject).
+    p1: connect -- coroutine function that opens a connection and returns (reader, writer)
+    p2: games -- list with one integer, the number of games still to start (shared by all bots)
+    p3: rng -- random.Random of this bot
+    p4: latencies -- list that the seconds of every request are added to
+    p5: finished -- list that 1 is appended to for every finished game
+    """
+    reader, writer = await connect()
+
+    async def request(line):
+        start = time.perf_counter()
+        writer.write(line.encode())
+        await writer.drain()
+        reply = await reader.readline()
+        latencies.append(time.perf_counter() - start)
+        return reply.decode().strip()
+
+    try:
+        while games[0] > 0:
+            games[0] -= 1
+            reply = await request("NEW\n")
+            if not reply.startswith("OK"):
+                raise RuntimeError("server refused NEW: " + reply)
+            game = q.QuoridorGame()
+            plies = 0
+            while not game.get_game_won() and plies < MAX_PLIES:
+                player = game.get_player_turn()
+                if game.get_fence_inventory(player) > 0 and rng.random() < FENCE_PROBABILITY:
+                    v_or_h, x, y = rng.choice("vh"), rng.randrange(1, 9), rng.randrange(1, 9)
+                    if await request("FENCE %s %d %d\n" % (v_or_h, x, y)) == "OK":
+                        game.place_fence(player, v_or_h, (x, y))
+                        plies += 1
+                        continue
+                moves = game.possible_pawn_moves(player)
+                if not moves:
+                    #The pawn is boxed in and no fence was placed: the game can't go on, so a new one is started
+                    break
+                path = game.get_shortest_path(player)
+                x, y = path[1] if path[1] in moves else rng.choice(moves)
+                if await request("MOVE %d %d\n" % (x, y)) != "OK":
+                    raise RuntimeError("server rejected a legal move")
+                game.move_pawn(player, (x, y))
+                plies += 1
+            finished.append(1)
+        writer.write(b"QUIT\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run(clients, games, seed=0, host=None, port=None, unix_path=None):
+    """
+    Runs the bots against a server and returns a summary: games, actions, seconds, games per second, and the p50 and
+    p99 request latency in milliseconds. Starts a server in this process if neither port nor unix_path is given.
+    """
+    hosted = None
+    if port is None and unix_path is None:
+        hosted = await server.start_server(server.GameServer(), "127.0.0.1", 0)
+        host, port = hosted.sockets[0].getsockname()[:2]
+
+    async def connect():
+        if unix_path is not None:
+            return await asyncio.open_unix_connection(unix_path)
+        return await asyncio.open_connection(host, port)
+
+    remaining = [games]
+    latencies = []
+    finished = []
+    start = time.perf_counter()
+    await asyncio.gather(*(bot(connect, remaining, random.Random(seed + number), latencies, finished)
+                           for number in range(clients)))
+    elapsed = time.perf_counter() - start
+    if hosted is not None:
+        hosted.close()
+        await hosted.wait_closed()
+
+    latencies.sort()
+    return {"games": len(finished), "requests": len(latencies), "seconds": elapsed,
+            "games_per_second": len(finished) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000, "p99_ms": percentile(latencies, 0.99) * 1000}
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure action latency and game throughput of server.py.")
+    parser.add_argument("--clients", type=int, default=50, help="number of concurrent bot connections")
+    parser.add_argument("--games", type=int, default=500, help="total number of games to play")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="connect to a running server on this port")
+    parser.add_argument("--unix", default=None, help="connect to a running server on this Unix socket")
+    args = parser.parse_args(argv)
+    summary = asyncio.run(run(args.clients, args.games, args.seed, args.host, args.port, args.unix))
+    print("%(games)d games, %(requests)d requests in %(seconds).2fs: %(games_per_second).1f games/s, "
+          "p50 %(p50_ms).2f ms, p99 %(p99_ms).2f ms" % summary)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
 #Author: Daniel Dam
 #Last Updated: 9/18/21
 #Description: This file executes Quoridor with an UI using pygame.
+#Usage: python main.py [--cpu [--verbose]] [--size 11] [--players 4] [--fences 8]
 
+import argparse
 import Quoridor as q
+import ai
+import endgame
+import thinker
 import pygame, sys
+from functools import lru_cache
 from pygame.locals import *
 
 
@@ -12,13 +18,16 @@ WINDOWWIDTH = 630 # size of window's width in pixels
 WINDOWHEIGHT = 630 # size of windows' height in pixels
 BOXSIZE = 40 # size of box height & width in pixels
 GAPSIZE = 10 # size of gap between boxes in pixels (where fences will be placed)
-BOARDWIDTH = 9 # number of columns of boxes
-BOARDHEIGHT = 9 # number of rows of boxes
+BOARDWIDTH = 9 # number of columns of boxes, set from the game by configure_board
+BOARDHEIGHT = 9 # number of rows of boxes, set from the game by configure_board
 XMARGIN = int((WINDOWWIDTH - (BOARDWIDTH * (BOXSIZE + GAPSIZE))) / 2)
 YMARGIN = int((WINDOWHEIGHT - (BOARDHEIGHT * (BOXSIZE + GAPSIZE))) / 2)
 distance_between_corners = WINDOWWIDTH / BOARDWIDTH
-vertical_fences = []
-horizontal_fences = []
+CPU_TIME_BUDGET = 2.0 # seconds the computer player thinks per move, in a worker thread
+BACKGROUND = None # surface with the parts of the board that never change, made by build_background
+TABLEBASE_PATH = "endgame.qtb" # file the solved endgames are kept in between runs
+TABLEBASE = None # endgame.EndgameTablebase loaded from TABLEBASE_PATH by main
+drawn = {} # what is on the screen right now (pawns, fences, text), so draw_changes only redraws what changed
 
 
 
@@ -35,76 +44,117 @@ CYAN     = (  0, 255, 255)
 TEAL     = (  0, 128, 128)
 BLACK    = (  0,   0,   0)
 
+PLAYER_COLORS = {1: RED, 2: BLUE, 3: GREEN, 4: ORANGE} # color of every player's pawn and text
 
 
-def main():
-    """Main game loop that initializes pygame and Quoridor."""
-    global FPSCLOCK, DISPLAYSURF, FONT
 
+def main(cpu_player=None, size=9, players=2, fences=None, verbose=False):
+    """
+    Main game loop that initializes pygame and Quoridor.
+    p1: cpu_player -- player (1 or 2) that is played by the computer, or None for human players only. The computer
+    only plays two player games.
+    p2: size -- squares per side of the board
+    p3: players -- 2 or 4
+    p4: fences -- fences per player, the standard number for the number of players by default
+    p5: verbose -- print the computer's search depth and speed after each of its moves
+    """
+    global FPSCLOCK, DISPLAYSURF, FONT, TABLEBASE
+
+    if cpu_player is not None and players != 2:
+        raise ValueError("the computer player only plays two player games")
     pygame.init()
-    Quoridor = q.QuoridorGame()
-    mainBoard = mainBoardRepresentation(Quoridor.get_squares())
+    Quoridor = q.QuoridorGame(size, players, fences)
+    configure_board(Quoridor)
+    TABLEBASE = endgame.EndgameTablebase(TABLEBASE_PATH)
+    cpu, cpu_thinker = None, None
+    if cpu_player is not None:
+        cpu = ai.AlphaBetaPlayer(CPU_TIME_BUDGET, tablebase=TABLEBASE)
+        # searches run in a worker thread; on the human's turn it ponders the predicted reply
+        cpu_thinker = thinker.BackgroundThinker(cpu)
 
     FPSCLOCK = pygame.time.Clock()
     FONT = pygame.font.Font('freesansbold.ttf', 17)
     DISPLAYSURF = pygame.display.set_mode((WINDOWWIDTH, WINDOWHEIGHT))
-    DISPLAYSURF.fill(TEAL)
     pygame.display.set_caption("Quoridor")
-
-    mouseX = 0
-    mouseY = 0
-
+    build_background()
+    draw_full_board(Quoridor)
 
     while True:
-        mouseClicked = False
-        add_vertical_fence = False
-        add_horizontal_fence = False
-        DISPLAYSURF.fill(TEAL)
-        drawBoard(mainBoard)
-        draw_vertical_fences(Quoridor)
-        draw_horizontal_fences(Quoridor)
-        show_fences(Quoridor)
-        show_player_turn(Quoridor)
-
         for event in pygame.event.get():
             if event.type == QUIT or (event.type == KEYUP and event.key == K_ESCAPE):
+                if cpu_thinker is not None:
+                    cpu_thinker.close()
+                if TABLEBASE.get_table_count():
+                    TABLEBASE.save()
                 pygame.quit()
                 sys.exit()
-            if event.type == MOUSEBUTTONUP:
+            # the board is only hit tested when the mouse is clicked, and clicks are ignored on the computer's turn
+            if event.type == MOUSEBUTTONUP and Quoridor.get_player_turn() != cpu_player:
                 mouseX, mouseY = event.pos
-                mouseClicked = True
+                handle_click(Quoridor, mouseX, mouseY)
+
+        # a ponder search may run for thinker.PONDER_LIMIT, so it is stopped as soon as the game is won
+        if cpu_thinker is not None and Quoridor.get_game_won():
+            cpu_thinker.cancel()
+
+        # the computer's move is asked for once and picked up in a later frame when the worker thread has it
+        if Quoridor.get_player_turn() == cpu_player and Quoridor.get_game_won() is False:
+            if not cpu_thinker.is_thinking():
+                cpu_thinker.request_move(Quoridor)
+            action = cpu_thinker.poll()
+            if action is not None:
+                Quoridor.apply(action)
+                if verbose:
+                    print("CPU " + cpu.format_search_info())
+                cpu_thinker.ponder(Quoridor)
+
+        # only the parts of the screen that changed are redrawn and sent to the display
+        dirty_rects = draw_changes(Quoridor)
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        FPSCLOCK.tick(FPS)
 
-        vertical_fence_wanted, vfence = vertical_fence_pressed(mouseX, mouseY)
-        horizontal_fence_wanted, hfence = horizontal_fence_pressed(mouseX, mouseY)
-        player = Quoridor.get_player_turn()
-        box_coordinates = getBoxAtPixel(mouseX, mouseY)
-        v_fence_coordinates = getBoxAtPixel_for_vertical_grid(mouseX, mouseY)
-        h_fence_coordinates = getBoxAtPixel_for_horizontal_grid(mouseX, mouseY)
 
-        if mouseClicked and vertical_fence_wanted != None:
-            if Quoridor.place_fence(player, vertical_fence_wanted, v_fence_coordinates):
-                pygame.draw.rect(DISPLAYSURF, BLACK, vfence)
-                mouseClicked = False
+def configure_board(Quoridor):
+    """
+    Sizes the board and the window for a game: the board has as many boxes as the game has squares, and the window
+    grows past its standard size when the board would not fit between the text at the top and at the bottom.
+    """
+    global BOARDWIDTH, BOARDHEIGHT, WINDOWWIDTH, WINDOWHEIGHT, XMARGIN, YMARGIN, distance_between_corners
+    BOARDWIDTH = BOARDHEIGHT = Quoridor.get_size()
+    WINDOWWIDTH = max(630, BOARDWIDTH * (BOXSIZE + GAPSIZE) + 180)
+    WINDOWHEIGHT = max(630, BOARDHEIGHT * (BOXSIZE + GAPSIZE) + 180)
+    XMARGIN = int((WINDOWWIDTH - (BOARDWIDTH * (BOXSIZE + GAPSIZE))) / 2)
+    YMARGIN = int((WINDOWHEIGHT - (BOARDHEIGHT * (BOXSIZE + GAPSIZE))) / 2)
+    distance_between_corners = WINDOWWIDTH / BOARDWIDTH
 
 
-        if mouseClicked and horizontal_fence_wanted != None:
-            if Quoridor.place_fence(player, horizontal_fence_wanted, h_fence_coordinates):
-                pygame.draw.rect(DISPLAYSURF, BLACK, hfence)
-                mouseClicked = False
+def player_positions(Quoridor):
+    """Returns the position of every player's pawn, in player order."""
+    return tuple(Quoridor.get_position(player) for player in range(1, Quoridor.get_player_count() + 1))
 
 
-        elif mouseClicked and Quoridor.move_pawn(player, box_coordinates):
-            drawBoard(mainBoard)
-            mouseClicked = False
+def fence_inventories(Quoridor):
+    """Returns the number of fences every player has left, in player order."""
+    return tuple(Quoridor.get_fence_inventory(player) for player in range(1, Quoridor.get_player_count() + 1))
 
 
-        pygame.display.update()
-        FPSCLOCK.tick(FPS)
+def turn_state(Quoridor):
+    """
+    Returns what show_player_turn displays: the player to move, whether the game is won and the proven result of an
+    endgame without fences (None for other positions). Called every frame, so a table that is not known yet is
+    solved in another thread and the result shows up once it is ready.
+    """
+    result = TABLEBASE.probe(Quoridor, solve_missing=False)
+    if result is None:
+        TABLEBASE.solve_in_background(Quoridor)
+    proven = endgame.format_result(result, Quoridor.get_player_turn()) if result is not None else None
+    return Quoridor.get_player_turn(), Quoridor.get_game_won(), proven
 
 
 def mainBoardRepresentation(squares:list):
     """
-    Creates an internal representation of the board as a list of 9x9 lists containing the class Square, which
+    Creates an internal representation of the board as a list of BOARDWIDTH lists containing the class Square, which
     represents a square in Quoridor.
     p1: squares -- list of all the Square objects made when Quoridor was initialized.
     """
@@ -123,24 +173,137 @@ def drawBoard(mainBoard):
     """
     Draws all the boxes in the game based on board made from mainBoardRepresentation.
     """
+    for boxX in range(BOARDWIDTH):
+        for boxY in range(BOARDHEIGHT):
+            draw_box(boxX, boxY, mainBoard[boxY][boxX].get_pawn())
+
+
+def draw_box(boxX, boxY, pawn):
+    """Draws one box in the color of the pawn on it (white if there is none) and returns its rect."""
+    x, y = leftTopCoordsOfBox(boxX, boxY)
+    color = PLAYER_COLORS.get(pawn, WHITE)
+    return pygame.draw.rect(DISPLAYSURF, color, (x, y, BOXSIZE, BOXSIZE))
+
+
+def build_background():
+    """Draws the parts of the board that never change (the background and the empty boxes) on BACKGROUND."""
+    global BACKGROUND
+    BACKGROUND = pygame.Surface((WINDOWWIDTH, WINDOWHEIGHT))
+    BACKGROUND.fill(TEAL)
     for boxX in range(BOARDWIDTH):
         for boxY in range(BOARDHEIGHT):
             x, y = leftTopCoordsOfBox(boxX, boxY)
-            if mainBoard[boxY][boxX].get_pawn() == 1:
-                pygame.draw.rect(DISPLAYSURF, RED, (x, y, BOXSIZE, BOXSIZE))
-            elif mainBoard[boxY][boxX].get_pawn() == 2:
-                pygame.draw.rect(DISPLAYSURF, BLUE, (x, y, BOXSIZE, BOXSIZE))
-            else:
-                pygame.draw.rect(DISPLAYSURF, WHITE, (x, y, BOXSIZE, BOXSIZE))
+            pygame.draw.rect(BACKGROUND, WHITE, (x, y, BOXSIZE, BOXSIZE))
+
+
+def draw_full_board(Quoridor):
+    """Draws the whole window from scratch, remembers what was drawn in drawn, and updates the whole display."""
+    DISPLAYSURF.blit(BACKGROUND, (0, 0))
+    # the game swaps its Square objects as pawns move, so the board is taken from the game's current squares
+    drawBoard(mainBoardRepresentation(Quoridor.get_squares()))
+    draw_vertical_fences(Quoridor)
+    draw_horizontal_fences(Quoridor)
+    drawn.clear()
+    drawn['positions'] = player_positions(Quoridor)
+    drawn['vFences'] = list(Quoridor.get_vFences())
+    drawn['hFences'] = list(Quoridor.get_hFences())
+    drawn['fences_text'] = fence_inventories(Quoridor)
+    drawn['fences_rects'] = show_fences(Quoridor)
+    drawn['turn_text'] = turn_state(Quoridor)
+    drawn['turn_rects'] = show_player_turn(Quoridor)
+    pygame.display.update()
+
+
+def draw_changes(Quoridor):
+    """
+    Redraws only the boxes, fence slots and text that differ from what is on the screen (see drawn).
+    Returns the list of rects that were redrawn, which is empty when nothing changed.
+    """
+    dirty_rects = []
+
+    positions = player_positions(Quoridor)
+    if positions != drawn['positions']:
+        changed = set()
+        for old_position, new_position in zip(drawn['positions'], positions):
+            if old_position != new_position:
+                changed.update((old_position, new_position))
+        for boxX, boxY in changed:
+            dirty_rects.append(draw_box(boxX, boxY, Quoridor.find_square((boxX, boxY)).get_pawn()))
+        drawn['positions'] = positions
+
+    for v_or_h, fences, width, height, leftTopCoords in (
+            ('vFences', Quoridor.get_vFences(), GAPSIZE, BOXSIZE, leftTopCoordsOfBox_for_vertical_grid),
+            ('hFences', Quoridor.get_hFences(), BOXSIZE, GAPSIZE, leftTopCoordsOfBox_for_horizonal_grid)):
+        if fences != drawn[v_or_h]:
+            for fence in drawn[v_or_h]:
+                if fence not in fences:
+                    # a fence that was taken back (undo) is covered with the background again
+                    rect = pygame.Rect(leftTopCoords(fence[0], fence[1]), (width, height))
+                    DISPLAYSURF.blit(BACKGROUND, rect, rect)
+                    dirty_rects.append(rect)
+            for fence in fences:
+                if fence not in drawn[v_or_h]:
+                    dirty_rects.append(pygame.draw.rect(DISPLAYSURF, BLACK, (leftTopCoords(fence[0], fence[1]), (width, height))))
+            drawn[v_or_h] = list(fences)
+
+    for key, rects_key, text, show in (
+            ('fences_text', 'fences_rects', fence_inventories(Quoridor), show_fences),
+            ('turn_text', 'turn_rects', turn_state(Quoridor), show_player_turn)):
+        if text != drawn[key]:
+            for rect in drawn[rects_key]:
+                DISPLAYSURF.blit(BACKGROUND, rect, rect)
+                dirty_rects.append(rect)
+            drawn[rects_key] = show(Quoridor)
+            dirty_rects.extend(drawn[rects_key])
+            drawn[key] = text
+
+    return dirty_rects
+
+
+def handle_click(Quoridor, mouseX, mouseY):
+    """
+    Moves the pawn or places a fence for the player whose turn it is, depending on where the board was clicked.
+    Returns True if the click changed the game.
+    """
+    player = Quoridor.get_player_turn()
+    target, coordinates = pixel_to_grid(mouseX, mouseY)
+    if target == 'v' or target == 'h':
+        return Quoridor.place_fence(player, target, coordinates)
+    elif target == 'box':
+        return Quoridor.move_pawn(player, coordinates)
+    return False
+
+
+def pixel_to_grid(x, y):
+    """
+    Maps a pixel to what is drawn there, using the board layout instead of testing rects.
+    Returns ('box', (boxx, boxy)) for a box, ('v', (boxx, boxy)) for the vertical fence slot to the left of a box,
+    ('h', (boxx, boxy)) for the horizontal fence slot above a box, or (None, (None, None)) for anything else.
+    """
+    # each column and row is a GAPSIZE fence slot followed by a BOXSIZE box
+    column, column_offset = divmod(x - XMARGIN + GAPSIZE, BOXSIZE + GAPSIZE)
+    row, row_offset = divmod(y - YMARGIN + GAPSIZE, BOXSIZE + GAPSIZE)
+    if column < 0 or column >= BOARDWIDTH or row < 0 or row >= BOARDHEIGHT:
+        return None, (None, None)
+    in_column_gap = column_offset < GAPSIZE
+    in_row_gap = row_offset < GAPSIZE
+    if in_column_gap and in_row_gap:
+        return None, (None, None)
+    elif in_column_gap:
+        return 'v', (column, row)
+    elif in_row_gap:
+        return 'h', (column, row)
+    return 'box', (column, row)
 
 
 def vertical_fence_pressed(mouseX, mouseY):
     """
     Determines if the user pressed a space that can contain a vertical fence.
     """
-    for fence in vertical_fences:
-        if fence.collidepoint(mouseX, mouseY):
-            return 'v', fence
+    target, (boxx, boxy) = pixel_to_grid(mouseX, mouseY)
+    if target == 'v':
+        x, y = leftTopCoordsOfBox_for_vertical_grid(boxx, boxy)
+        return 'v', pygame.Rect(x, y, GAPSIZE, BOXSIZE)
     return None, None
 
 
@@ -148,34 +311,25 @@ def horizontal_fence_pressed(mouseX, mouseY):
     """
     Determines if the user pressed a space that can contain a horizontal fence.
     """
-    for fence in horizontal_fences:
-        if fence.collidepoint(mouseX, mouseY):
-            return 'h', fence
+    target, (boxx, boxy) = pixel_to_grid(mouseX, mouseY)
+    if target == 'h':
+        x, y = leftTopCoordsOfBox_for_horizonal_grid(boxx, boxy)
+        return 'h', pygame.Rect(x, y, BOXSIZE, GAPSIZE)
     return None, None
 
 
 def draw_vertical_fences(Quoridor):
     """Draws all the vertical fences that are placed on the board."""
-    for boxX in range(BOARDWIDTH):
-        for boxY in range(BOARDHEIGHT):
-            x, y = leftTopCoordsOfBox_for_vertical_grid(boxX, boxY)
-            fenceRect = pygame.Rect(x, y, GAPSIZE, BOXSIZE)
-            if (boxX, boxY) in Quoridor.get_vFences():
-                pygame.draw.rect(DISPLAYSURF, BLACK, fenceRect)
-            else:
-                vertical_fences.append(fenceRect)
+    for boxX, boxY in Quoridor.get_vFences():
+        x, y = leftTopCoordsOfBox_for_vertical_grid(boxX, boxY)
+        pygame.draw.rect(DISPLAYSURF, BLACK, (x, y, GAPSIZE, BOXSIZE))
 
 
 def draw_horizontal_fences(Quoridor):
     """Draws all the horizontal fences that are placed on the board."""
-    for boxX in range(BOARDWIDTH):
-        for boxY in range(BOARDHEIGHT):
-            x, y = leftTopCoordsOfBox_for_horizonal_grid(boxX, boxY)
-            fenceRect = pygame.Rect(x, y, BOXSIZE, GAPSIZE)
-            if (boxX, boxY) in Quoridor.get_hFences():
-                pygame.draw.rect(DISPLAYSURF, BLACK, fenceRect)
-            else:
-                horizontal_fences.append(fenceRect)
+    for boxX, boxY in Quoridor.get_hFences():
+        x, y = leftTopCoordsOfBox_for_horizonal_grid(boxX, boxY)
+        pygame.draw.rect(DISPLAYSURF, BLACK, (x, y, BOXSIZE, GAPSIZE))
 
 
 def leftTopCoordsOfBox_for_vertical_grid(boxx, boxy):
@@ -195,24 +349,17 @@ def leftTopCoordsOfBox_for_horizonal_grid(boxx, boxy):
 def getBoxAtPixel_for_vertical_grid(x, y):
     """Function returns the vertical fence coordinates corresponding to the pixels that were clicked, if any."""
     #returns box coordinates (not pixel coordinates!)
-    #uses leftTopCoordsofBox
-    for boxx in range(BOARDWIDTH):
-        for boxy in range(BOARDHEIGHT):
-            x_pixel, y_pixel = leftTopCoordsOfBox_for_vertical_grid(boxx, boxy)
-            boxRect = pygame.Rect(x_pixel, y_pixel, GAPSIZE, BOXSIZE)
-            if boxRect.collidepoint(x, y):
-                return (boxx, boxy)
+    target, coordinates = pixel_to_grid(x, y)
+    if target == 'v':
+        return coordinates
     return (None, None)
 
 
 def getBoxAtPixel_for_horizontal_grid(x, y):
     """Function returns the horizontal fence coordinates corresponding to the pixels that were clicked, if any."""
-    for boxx in range(BOARDWIDTH):
-        for boxy in range(BOARDHEIGHT):
-            x_pixel, y_pixel = leftTopCoordsOfBox_for_horizonal_grid(boxx, boxy)
-            boxRect = pygame.Rect(x_pixel, y_pixel, BOXSIZE, GAPSIZE)
-            if boxRect.collidepoint(x, y):
-                return (boxx, boxy)
+    target, coordinates = pixel_to_grid(x, y)
+    if target == 'h':
+        return coordinates
     return (None, None)
 
 
@@ -225,44 +372,61 @@ def leftTopCoordsOfBox(boxx, boxy):
 
 def getBoxAtPixel(x, y):
     """Returns box coordinates"""
-    for boxx in range(BOARDWIDTH):
-        for boxy in range(BOARDHEIGHT):
-            x_pixel, y_pixel = leftTopCoordsOfBox(boxx, boxy)
-            boxRect = pygame.Rect(x_pixel, y_pixel, BOXSIZE, BOXSIZE)
-            if boxRect.collidepoint(x, y):
-                return (boxx, boxy)
+    target, coordinates = pixel_to_grid(x, y)
+    if target == 'box':
+        return coordinates
     return (None, None)
 
 
+@lru_cache(maxsize=32)
+def render_text(text, color):
+    """Renders a line of text with FONT. Rendered surfaces are cached, since only a few different lines are shown."""
+    return FONT.render(text, True, color)
+
+
 def show_fences(Quoridor_game_object):
-    """Displays the number of fences each player has in the game."""
-    p1_score = FONT.render("P1 Fences:" + str(Quoridor_game_object.get_fence_inventory(1)), True, RED)
-    p2_score = FONT.render("P2 Fences:" + str(Quoridor_game_object.get_fence_inventory(2)), True, BLUE)
-    DISPLAYSURF.blit(p1_score, (BOXSIZE + WINDOWWIDTH/100, BOXSIZE + BOXSIZE/3))
-    DISPLAYSURF.blit(p2_score, ((WINDOWWIDTH * .80) - BOXSIZE, BOXSIZE + BOXSIZE/3))
+    """
+    Displays the number of fences each player has in the game: P1 and P2 at the top, P3 and P4 at the bottom.
+    Returns the rects that were drawn.
+    """
+    places = {1: (BOXSIZE + WINDOWWIDTH/100, BOXSIZE + BOXSIZE/3),
+              2: ((WINDOWWIDTH * .80) - BOXSIZE, BOXSIZE + BOXSIZE/3),
+              3: (BOXSIZE + WINDOWWIDTH/100, WINDOWHEIGHT *.9),
+              4: ((WINDOWWIDTH * .80) - BOXSIZE, WINDOWHEIGHT *.9)}
+    rects = []
+    for player in range(1, Quoridor_game_object.get_player_count() + 1):
+        score = render_text("P%d Fences:%d" % (player, Quoridor_game_object.get_fence_inventory(player)),
+                            PLAYER_COLORS[player])
+        rects.append(DISPLAYSURF.blit(score, places[player]))
+    return rects
 
 
 def show_player_turn(Quoridor_game_object):
-    """Displays which player is moving or who won the game."""
-    player = str(Quoridor_game_object.get_player_turn())
-    game_won = Quoridor_game_object.get_game_won()
-    color = None
+    """
+    Displays which player is moving or who won the game, and the proven result once no fences are left. Returns the
+    rects that were drawn.
+    """
+    player, game_won, proven = turn_state(Quoridor_game_object)
     if game_won is False:
-        if player == "1":
-            color = RED
-        elif player == "2":
-            color = BLUE
-        display_turn = FONT.render("Player Turn: P" + player, True, color)
-        DISPLAYSURF.blit(display_turn, (WINDOWWIDTH * .4, WINDOWHEIGHT *.9))
-    elif game_won:
-        if Quoridor_game_object.is_winner(1):
-            winner_prompt = FONT.render("Player 1 won!", True, RED)
-            DISPLAYSURF.blit(winner_prompt, (WINDOWWIDTH * .4, WINDOWHEIGHT *.9))
-        elif Quoridor_game_object.is_winner(2):
-            winner_prompt = FONT.render("Player 2 won!", True, BLUE)
-            DISPLAYSURF.blit(winner_prompt, (WINDOWWIDTH * .4, WINDOWHEIGHT *.9))
+        display_turn = render_text("Player Turn: P" + str(player), PLAYER_COLORS[player])
+        rects = [DISPLAYSURF.blit(display_turn, (WINDOWWIDTH * .4, WINDOWHEIGHT *.9))]
+        if proven is not None:
+            rects.append(DISPLAYSURF.blit(render_text(proven, BLACK), (WINDOWWIDTH * .4, WINDOWHEIGHT * .9 + 20)))
+        return rects
+    winner = Quoridor_game_object.get_winner()
+    if winner is not None:
+        winner_prompt = render_text("Player %d won!" % winner, PLAYER_COLORS[winner])
+        return [DISPLAYSURF.blit(winner_prompt, (WINDOWWIDTH * .4, WINDOWHEIGHT *.9))]
+    return []
 
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Play Quoridor.")
+    parser.add_argument("--cpu", action="store_true", help="play against the computer, which moves second")
+    parser.add_argument("--size", type=int, default=9, help="squares per side of the board")
+    parser.add_argument("--players", type=int, choices=(2, 4), default=2)
+    parser.add_argument("--fences", type=int, default=None, help="fences per player")
+    parser.add_argument("--verbose", action="store_true", help="print the computer's search info after its moves")
+    args = parser.parse_args()
+    main(2 if args.cpu else None, args.size, args.players, args.fences, args.verbose)
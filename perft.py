@@ -0,0 +1,166 @@
+#Description: Perft for Quoridor: counts every leaf of the tree of legal actions to a given depth. The counts of fixed
+#positions are a regression oracle for the rules and move generation (pawn steps, jumps, blocked jumps and fences), and
+#the time they take measures its speed. KNOWN_NODES holds counts that were confirmed by trying all 243 action numbers
+#on the bitboard engine (see bitboard.py).
+#Usage: python perft.py --depth 2 [--position vertical_jump] [--divide]
+#       python perft.py --check [--max-nodes 100000]
+
+import argparse
+import sys
+import time
+
+import Quoridor as q
+
+
+def pawn(x, y):
+    """Returns the action that moves the pawn to (x,y)."""
+    return "p", (x, y)
+
+
+def vfence(x, y):
+    """Returns the action that places a "v" fence at (x,y)."""
+    return "v", (x, y)
+
+
+def hfence(x, y):
+    """Returns the action that places an "h" fence at (x,y)."""
+    return "h", (x, y)
+
+
+#Fixed positions, given as the actions that lead to them from the start
+POSITIONS = {
+    "start": [],
+    #Player 2 to move, player 1 directly above: jump over it
+    "vertical_jump": [pawn(4, 1), pawn(4, 7), pawn(4, 2), pawn(4, 6), pawn(4, 3), pawn(4, 5), pawn(4, 4)],
+    #Player 1 to move, player 2 directly below with a fence behind it: the diagonal moves of is_vadjacent
+    "blocked_vertical_jump": [pawn(4, 1), pawn(4, 7), pawn(4, 2), pawn(4, 6), pawn(4, 3), pawn(3, 6), pawn(4, 4),
+                              pawn(3, 5), hfence(4, 6), pawn(4, 5)],
+    #Player 1 to move, player 2 directly to the right: jump over it
+    "horizontal_jump": [pawn(4, 1), pawn(4, 7), pawn(4, 2), pawn(5, 7), pawn(4, 3), pawn(5, 6), pawn(4, 4), pawn(5, 5),
+                        vfence(1, 1), pawn(5, 4)],
+    #Player 1 to move, player 2 directly to the right with a fence behind it: the diagonal moves of is_hadjacent
+    "blocked_horizontal_jump": [pawn(4, 1), pawn(4, 7), pawn(4, 2), pawn(5, 7), pawn(4, 3), pawn(5, 6), pawn(4, 4),
+                                pawn(5, 5), vfence(6, 4), pawn(5, 4)],
+    #Player 1 to move, player 2 below it on the edge of the board: the jump is blocked by the edge
+    "edge_jump": [action for y in range(1, 8) for action in (pawn(4, y), vfence(1, y))],
+    #Both players have used all their fences, so only pawn moves are left
+    "no_fences_left": [action for pair in zip([hfence(x, 2) for x in range(8)] + [vfence(1, 0), vfence(2, 0)],
+                                              [hfence(x, 6) for x in range(1, 9)] + [vfence(1, 8), vfence(2, 8)])
+                       for action in pair],
+}
+
+#Perft node counts of the positions by depth
+KNOWN_NODES = {
+    "start": {1: 147, 2: 21462, 3: 3112127},
+    "vertical_jump": {1: 148, 2: 21758},
+    "blocked_vertical_jump": {1: 148, 2: 21464, 3: 3132303},
+    "horizontal_jump": {1: 147, 2: 21464},
+    "blocked_horizontal_jump": {1: 148, 2: 21464},
+    "edge_jump": {1: 142, 2: 19462},
+    "no_fences_left": {1: 3, 2: 9, 3: 27, 4: 90, 5: 260, 6: 858, 7: 2574, 8: 8814},
+}
+
+
+def setup_position(name):
+    """Returns a QuoridorGame in one of the POSITIONS."""
+    game = q.QuoridorGame()
+    for action in POSITIONS[name]:
+        if not game.apply(action):
+            raise ValueError("position %s: action %s is illegal" % (name, action))
+    return game
+
+
+def perft(game, depth):
+    """
+    Returns the number of leaves of the tree of legal actions depth plies deep. A won game is a leaf only at depth 0.
+    The game is explored with apply/undo and is left unchanged.
+    p1: QuoridorGame object
+    p2: depth (0 or more)
+    """
+    if depth == 0:
+        return 1
+    moves = game.legal_moves(game.get_player_turn())
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for action in moves:
+        game.apply(action)
+        nodes += perft(game, depth - 1)
+        game.undo()
+    return nodes
+
+
+def divide(game, depth):
+    """
+    Returns a list of (action, leaves) for every legal action of the position: the perft of depth - 1 after it.
+    p1: QuoridorGame object
+    p2: depth (1 or more)
+    """
+    counts = []
+    for action in game.legal_moves(game.get_player_turn()):
+        game.apply(action)
+        counts.append((action, perft(game, depth - 1)))
+        game.undo()
+    return counts
+
+
+def format_action(action):
+    """Returns an action as text, for example "p 4,1" or "v 3,3"."""
+    return "%s %d,%d" % (action[0], action[1][0], action[1][1])
+
+
+def check(max_nodes=100000):
+    """
+    Runs every entry of KNOWN_NODES with at most max_nodes leaves, prints the result and the speed of each, and
+    returns the number of wrong counts.
+    """
+    wrong = 0
+    for name, depths in KNOWN_NODES.items():
+        for depth, expected in depths.items():
+            if expected > max_nodes:
+                continue
+            game = setup_position(name)
+            start = time.perf_counter()
+            nodes = perft(game, depth)
+            elapsed = time.perf_counter() - start
+            status = "ok" if nodes == expected else "WRONG, expected %d" % expected
+            wrong += nodes != expected
+            print("%-24s depth %d: %9d nodes %8.3fs %10.0f nodes/s  %s" % (
+                name, depth, nodes, elapsed, nodes / elapsed if elapsed > 0 else 0.0, status))
+    return wrong
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Count the leaves of the Quoridor move tree.")
+    parser.add_argument("--position", choices=sorted(POSITIONS), default="start")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--divide", action="store_true", help="print the count below every legal action")
+    parser.add_argument("--check", action="store_true", help="compare the positions with KNOWN_NODES")
+    parser.add_argument("--max-nodes", type=int, default=100000, help="--check: skip counts larger than this")
+    args = parser.parse_args(argv)
+    if args.check:
+        return 1 if check(args.max_nodes) else 0
+
+    game = setup_position(args.position)
+    start = time.perf_counter()
+    if args.divide and args.depth > 0:
+        counts = divide(game, args.depth)
+        for action, nodes in counts:
+            print("%s: %d" % (format_action(action), nodes))
+        nodes = sum(nodes for _, nodes in counts)
+        print("moves: %d" % len(counts))
+    else:
+        nodes = perft(game, args.depth)
+    elapsed = time.perf_counter() - start
+    print("nodes: %d" % nodes)
+    print("time: %.3fs, %.0f nodes/s" % (elapsed, nodes / elapsed if elapsed > 0 else 0.0))
+    expected = KNOWN_NODES[args.position].get(args.depth)
+    if expected is not None and expected != nodes:
+        print("WRONG, expected %d" % expected)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
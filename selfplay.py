@@ -0,0 +1,177 @@
+#Description: Headless self-play runner. Plays many games of Quoridor between computer players in worker processes and
+#writes every finished game to a JSON lines file, a binary record file (see gamerecord.py) or a dataset of feature
+#planes (see dataset.py, needs numpy) as soon as it is done. Does not need pygame.
+#Example: python selfplay.py --games 1000 --player1 greedy --player2 alphabeta:0.05 --output games.jsonl
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import Quoridor as q
+import ai
+import gamerecord
+import mcts
+
+
+def make_player(spec, seed):
+    """
+    Returns a computer player from a spec string "name" or "name:argument":
+    random, greedy, alphabeta[:seconds per move] or mcts[:playouts per move].
+    p1: spec string
+    p2: seed for the player's random choices
+    """
+    name, _, argument = spec.partition(":")
+    if name == "random":
+        return ai.RandomPlayer(seed)
+    elif name == "greedy":
+        return ai.GreedyPlayer(seed)
+    elif name == "alphabeta":
+        return ai.AlphaBetaPlayer(float(argument) if argument else 0.1)
+    elif name == "mcts":
+        return mcts.MCTSPlayer(iterations=int(argument) if argument else 200, time_budget=None, seed=seed)
+    raise ValueError("unknown player: " + spec)
+
+
+PLAYER_NAMES = ("random", "greedy", "alphabeta", "mcts")
+_players = {} #alpha-beta players of this worker process by (player number, spec), reused between games (see get_player)
+
+
+def get_player(number, spec, seed):
+    """
+    Returns the player for a game. Alpha-beta players are made once per worker process and reused with new_game, so
+    that every game doesn't allocate a 16 MB transposition table and solve its endgame tables again. The other players
+    are cheap to make and are made for every game, with the game's seed.
+    p1: number -- player number (1 or 2)
+    p2: spec string (see make_player)
+    p3: seed for the player's random choices
+    """
+    if spec.partition(":")[0] != "alphabeta":
+        return make_player(spec, seed)
+    player = _players.get((number, spec))
+    if player is None:
+        player = _players[number, spec] = make_player(spec, seed)
+    else:
+        player.new_game()
+    return player
+
+
+def play_game(game_number, player1_spec, player2_spec, seed, max_plies):
+    """
+    Plays one game and returns its record: the game number, the player specs, the winner (None for a game that was
+    stopped after max_plies), the number of plies and the list of actions as [kind, x, y].
+    """
+    players = {1: get_player(1, player1_spec, seed), 2: get_player(2, player2_spec, seed + 1)}
+    game = q.QuoridorGame()
+    actions = []
+    while not game.get_game_won() and len(actions) < max_plies:
+        player = game.get_player_turn()
+        action = players[player].choose_move(game)
+        if action is None or not game.apply(action):
+            break
+        actions.append([action[0], action[1][0], action[1][1]])
+    winner = 3 - game.get_player_turn() if game.get_game_won() else None
+    return {"game": game_number, "player1": player1_spec, "player2": player2_spec, "winner": winner,
+            "plies": len(actions), "actions": actions}
+
+
+def json_lines_writer(output):
+    """Returns a function that writes a game record to a text file as one JSON line."""
+    def write_record(record):
+        output.write(json.dumps(record, separators=(",", ":")) + "\n")
+        output.flush()
+    return write_record
+
+
+def binary_writer(writer):
+    """Returns a function that appends a game record to a gamerecord.GameRecordWriter."""
+    def write_record(record):
+        writer.write_game([(kind, (x, y)) for kind, x, y in record["actions"]], record["winner"])
+        writer.flush()
+    return write_record
+
+
+def dataset_writer(writer):
+    """Returns a function that writes the positions of a game record to a dataset.ShardWriter."""
+    def write_record(record):
+        writer.write_game([(kind, (x, y)) for kind, x, y in record["actions"]], record["winner"])
+    return write_record
+
+
+def run(games, player1_spec, player2_spec, write_record, workers=None, seed=0, max_plies=400):
+    """
+    Plays games in a pool of worker processes and passes each record to write_record as soon as it is finished (so
+    records are in order of completion, not of game number). Only a few games per worker are in flight at a time, so
+    memory does not grow with the number of games. Returns a summary dictionary.
+    p1: games -- number of games to play
+    p2: player1_spec -- spec of player 1 (see make_player)
+    p3: player2_spec -- spec of player 2
+    p4: write_record -- function called with every finished game record
+    p5: workers -- number of processes, all cores by default
+    p6: seed -- game i uses seeds seed + 2*i and seed + 2*i + 1
+    p7: max_plies -- games longer than this are stopped without a winner
+    """
+    workers = workers or os.cpu_count() or 1
+    wins = {1: 0, 2: 0, None: 0}
+    start = time.perf_counter()
+    next_game = 0
+    pending = set()
+    with ProcessPoolExecutor(workers) as executor:
+        while next_game < games or pending:
+            while next_game < games and len(pending) < 2 * workers:
+                pending.add(executor.submit(play_game, next_game, player1_spec, player2_spec,
+                                            seed + 2 * next_game, max_plies))
+                next_game += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                wins[record["winner"]] += 1
+                write_record(record)
+    elapsed = time.perf_counter() - start
+    return {"games": games, "player1_wins": wins[1], "player2_wins": wins[2], "unfinished": wins[None],
+            "seconds": elapsed, "games_per_second": games / elapsed if elapsed > 0 else 0.0}
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Play Quoridor games between computer players without a window.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--player1", default="greedy", help="player 1: random, greedy, alphabeta[:seconds], mcts[:playouts]")
+    parser.add_argument("--player2", default="random", help="player 2, same choices as --player1")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--max-plies", type=int, default=400, help="stop games that last longer than this")
+    parser.add_argument("--output", default="-", help="file to write the games to (default: standard output)")
+    parser.add_argument("--format", choices=("jsonl", "binary", "dataset"), default="jsonl",
+                        help="JSON lines, the binary format of gamerecord.py (appends to --output), or feature plane "
+                             "shards of dataset.py (--output is a directory)")
+    args = parser.parse_args(argv)
+    for spec in (args.player1, args.player2):
+        if spec.partition(":")[0] not in PLAYER_NAMES:
+            parser.error("unknown player: " + spec)
+    if args.format != "jsonl" and args.output == "-":
+        parser.error("--format %s needs an --output file or directory" % args.format)
+
+    if args.format == "dataset":
+        import dataset
+        output = dataset.ShardWriter(args.output)
+        write_record = dataset_writer(output)
+    elif args.format == "binary":
+        output = gamerecord.GameRecordWriter(args.output)
+        write_record = binary_writer(output)
+    else:
+        output = sys.stdout if args.output == "-" else open(args.output, "w")
+        write_record = json_lines_writer(output)
+    try:
+        summary = run(args.games, args.player1, args.player2, write_record, args.workers, args.seed, args.max_plies)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print("%(games)d games, player 1 won %(player1_wins)d, player 2 won %(player2_wins)d, unfinished %(unfinished)d, "
+          "%(games_per_second).2f games/s" % summary, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#Description: Asyncio server that hosts many games of Quoridor in one process over TCP or a Unix socket.
+#The protocol is one command per line, answered with one line:
+#   NEW [seat]          start a new game and join it                 -> OK GAME <id>
+#   JOIN <id> [seat]    join an existing game                        -> OK GAME <id>
+#   MOVE <x> <y>        move the pawn of the player to move          -> OK | ERR <reason>
+#   FENCE <v|h> <x> <y> place a fence for the player to move         -> OK | ERR <reason>
+#   STATE               describe the game                            -> STATE <state>
+#   SUB                 receive DELTA <id> <change> after every action -> OK SUB <state>
+#   QUIT                close the connection
+#A state is a full snapshot of the game and a change only what one action changed; both start with seq=<n>, the number
+#of the last change, so a subscriber rebuilds the game from the state of OK SUB and then applies every DELTA with a
+#higher seq (parse_state, parse_change, Quoridor.from_snapshot and QuoridorGame.apply_change). A subscriber that falls
+#MAX_SUBSCRIBER_BUFFER bytes behind is sent "RESYNC <id> seq=<n>" (n: the first change it missed) and disconnected;
+#it has to JOIN and SUB again for a fresh state.
+#A connection that joins with a seat (1 or 2) can only act on that player's turn. Games without any connection left are
+#removed. Run with "python server.py --port 7000" or "python server.py --unix /tmp/quoridor.sock".
+
+import argparse
+import asyncio
+import itertools
+
+import Quoridor as q
+
+
+MAX_LINE = 256 #longest command accepted, in bytes
+MAX_SUBSCRIBER_BUFFER = 64 * 1024 #subscribers that fall this many bytes behind are sent RESYNC and disconnected
+
+
+def format_state(game):
+    """
+    Returns the state of a game as a line of text, for example
+    "seq=7 turn=1 winner=0 p1=4,0 p2=4,8 fences=10,10 v=3,3;5,2 h=-" (winner 0 means the game is not won).
+    """
+    v_fences = ";".join("%d,%d" % fence for fence in game.get_vFences()) or "-"
+    h_fences = ";".join("%d,%d" % fence for fence in game.get_hFences()) or "-"
+    return "seq=%d turn=%d winner=%d p1=%d,%d p2=%d,%d fences=%d,%d v=%s h=%s" % (
+        game.get_change_seq(), game.get_player_turn(), game.get_winner() or 0, *game.get_position(1),
+        *game.get_position(2), game.get_fence_inventory(1), game.get_fence_inventory(2), v_fences, h_fences)
+
+
+def parse_state(text):
+    """Returns the snapshot (see QuoridorGame.get_snapshot) of a state made by format_state."""
+    fields = dict(word.split("=", 1) for word in text.split())
+    fence_lists = [[tuple(map(int, fence.split(","))) for fence in fields[kind].split(";")]
+                   if fields[kind] != "-" else [] for kind in ("v", "h")]
+    winner = int(fields["winner"])
+    return {"seq": int(fields["seq"]), "size": q.DEFAULT_SIZE, "players": 2, "fences": q.DEFAULT_FENCES[2],
+            "positions": [tuple(map(int, fields[player].split(","))) for player in ("p1", "p2")],
+            "v_fences": fence_lists[0], "h_fences": fence_lists[1],
+            "inventories": [int(count) for count in fields["fences"].split(",")], "turn": int(fields["turn"]),
+            "winner": winner or None}
+
+
+def format_change(change):
+    """
+    Returns a change event of QuoridorGame.subscribe as a line of text, for example "seq=8 move p=1 pawn=4,0>4,1
+    turn=2", "seq=9 fence p=2 fence=v3,3 fences=9 turn=1" or "seq=10 move p=1 pawn=4,7>4,8 turn=2 winner=1".
+    """
+    words = ["seq=%d" % change["seq"], change["action"], "p=%d" % change["player"]]
+    if "pawn" in change:
+        words.append("pawn=%d,%d>%d,%d" % (*change["pawn"][0], *change["pawn"][1]))
+    if "fence" in change:
+        words.append("fence=%s%d,%d" % (change["fence"][0], *change["fence"][1]))
+        words.append("fences=%d" % change["inventory"])
+    words.append("turn=%d" % change["turn"])
+    if "winner" in change:
+        words.append("winner=%d" % change["winner"])
+    return " ".join(words)
+
+
+def parse_change(text):
+    """Returns the change event of a line made by format_change, ready for QuoridorGame.apply_change."""
+    words = text.split()
+    fields = dict(word.split("=", 1) for word in words if "=" in word)
+    change = {"seq": int(fields["seq"]), "action": words[1], "player": int(fields["p"]), "turn": int(fields["turn"])}
+    if "pawn" in fields:
+        change["pawn"] = tuple(tuple(map(int, square.split(","))) for square in fields["pawn"].split(">"))
+    if "fence" in fields:
+        change["fence"] = (fields["fence"][0], tuple(map(int, fields["fence"][1:].split(","))))
+        change["inventory"] = int(fields["fences"])
+    if "winner" in fields:
+        change["winner"] = int(fields["winner"])
+    return change
+
+
+class GameSession:
+    """A game hosted by the server, with the connections attached to it and the ones subscribed to its changes."""
+    __slots__ = ("game_id", "game", "connections", "subscribers")
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.game = q.QuoridorGame()
+        self.connections = 0
+        self.subscribers = set()
+
+    def add_subscriber(self, writer):
+        """Starts sending the changes of the game to a connection. Returns the state it starts from."""
+        if not self.subscribers:
+            self.game.subscribe(self.publish_change)
+        self.subscribers.add(writer)
+        return format_state(self.game)
+
+    def remove_subscriber(self, writer):
+        """Stops sending changes to a connection."""
+        self.subscribers.discard(writer)
+        if not self.subscribers:
+            self.game.unsubscribe(self.publish_change)
+
+    def publish_change(self, change):
+        """
+        Called by the game after every action: sends the change, formatted once, to every subscriber. The ones that
+        can't keep up are sent RESYNC and disconnected, so that they know they missed changes.
+        """
+        line = ("DELTA %d %s\n" % (self.game_id, format_change(change))).encode()
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                self.remove_subscriber(writer)
+            elif writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                self.remove_subscriber(writer)
+                writer.write(("RESYNC %d seq=%d\n" % (self.game_id, change["seq"])).encode())
+                writer.close()
+            else:
+                writer.write(line)
+
+
+class GameServer:
+    """Keeps the hosted games and serves the line protocol described at the top of this file."""
+    def __init__(self):
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._actions = 0
+
+    def get_session_count(self):
+        """Returns the number of games being hosted."""
+        return len(self._sessions)
+
+    def get_action_count(self):
+        """Returns the number of actions that were accepted since the server started."""
+        return self._actions
+
+    async def handle_client(self, reader, writer):
+        """Serves one connection until it sends QUIT or closes."""
+        session = None
+        seat = None
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(b"ERR line too long\n")
+                    break
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                command = words[0].upper()
+                if command == "QUIT":
+                    break
+                elif command == "NEW" or command == "JOIN":
+                    reply, joined, joined_seat = self.join(command, words[1:])
+                    if joined is not None:
+                        #Joining the game the connection is already in only changes its seat
+                        if joined is not session:
+                            if session is not None:
+                                self.leave(session, writer)
+                            session = joined
+                            session.connections += 1
+                        seat = joined_seat
+                elif session is None:
+                    reply = "ERR no game, send NEW or JOIN first"
+                elif command == "MOVE" or command == "FENCE":
+                    reply = self.act(session, seat, command, words[1:])
+                elif command == "STATE":
+                    reply = "STATE " + format_state(session.game)
+                elif command == "SUB":
+                    reply = "OK SUB " + session.add_subscriber(writer)
+                else:
+                    reply = "ERR unknown command"
+                writer.write((reply + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if session is not None:
+                self.leave(session, writer)
+            writer.close()
+
+    def join(self, command, arguments):
+        """
+        Handles NEW and JOIN. Returns (reply, session or None, seat or None). NEW only makes a game once its seat is
+        known to be valid.
+        """
+        try:
+            if command == "NEW":
+                game_id = None
+                seat = int(arguments[0]) if arguments else None
+            else:
+                game_id = int(arguments[0])
+                seat = int(arguments[1]) if len(arguments) > 1 else None
+        except (ValueError, IndexError):
+            return "ERR usage: NEW [seat] or JOIN <id> [seat]", None, None
+        if seat not in (None, 1, 2):
+            return "ERR seat must be 1 or 2", None, None
+        if game_id is None:
+            session = GameSession(next(self._ids))
+            self._sessions[session.game_id] = session
+        else:
+            session = self._sessions.get(game_id)
+            if session is None:
+                return "ERR no such game", None, None
+        return "OK GAME %d" % session.game_id, session, seat
+
+    def leave(self, session, writer):
+        """Detaches a connection from a game and removes the game once no connection is left."""
+        session.remove_subscriber(writer)
+        session.connections -= 1
+        if session.connections <= 0:
+            self._sessions.pop(session.game_id, None)
+
+    def act(self, session, seat, command, arguments):
+        """Handles MOVE and FENCE for the player to move. Returns the reply."""
+        game = session.game
+        player = game.get_player_turn()
+        if seat is not None and seat != player:
+            return "ERR not your turn"
+        try:
+            if command == "MOVE":
+                made = game.move_pawn(player, (int(arguments[0]), int(arguments[1])))
+            else:
+                made = game.place_fence(player, arguments[0].lower(), (int(arguments[1]), int(arguments[2])))
+        except (ValueError, IndexError):
+            return "ERR usage: MOVE <x> <y> or FENCE <v|h> <x> <y>"
+        if not made:
+            return "ERR illegal"
+        self._actions += 1
+        return "OK"
+
+
+async def start_server(game_server, host="127.0.0.1", port=7000, unix_path=None):
+    """Starts serving game_server on a TCP port or a Unix socket and returns the asyncio server."""
+    if unix_path is not None:
+        return await asyncio.start_unix_server(game_server.handle_client, unix_path, limit=MAX_LINE)
+    return await asyncio.start_server(game_server.handle_client, host, port, limit=MAX_LINE)
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Host games of Quoridor over a line-based protocol.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = await start_server(GameServer(), args.host, args.port, args.unix)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import Quoridor as q
+import batch
+
+
+def test_cross_check_agrees_with_quoridor_game():
+    assert batch.cross_check(games=16, plies=100, seed=7) == 1600
+
+
+def test_start_position_has_the_legal_actions_of_quoridor_game():
+    games = batch.BatchQuoridorGame(4)
+    game = q.QuoridorGame()
+    expected = sorted(q.action_to_index(action) for action in game.legal_moves(1))
+    for mask in games.legal_mask():
+        assert sorted(np.flatnonzero(mask).tolist()) == expected
@@ -0,0 +1,27 @@
+import pickle
+
+import Quoridor as q
+import bitboard
+
+
+def test_cross_check_agrees_with_quoridor_game():
+    assert bitboard.cross_check(games=2, seed=1234, samples=12) > 0
+
+
+def test_copy_is_independent():
+    board = bitboard.BitboardQuoridorGame()
+    board_copy = board.copy()
+    assert board_copy.move_pawn(1, (4, 1))
+    assert board.get_position(1) == (4, 0)
+    assert board_copy.get_position(1) == (4, 1)
+
+
+def test_same_answers_as_quoridor_game_for_a_fixed_line():
+    game, board = q.QuoridorGame(), bitboard.BitboardQuoridorGame()
+    for method, arguments in (("move_pawn", (1, (4, 1))), ("place_fence", (2, "h", (4, 1))), ("move_pawn", (1, (4, 2))),
+                              ("place_fence", (2, "v", (4, 1))), ("move_pawn", (1, (3, 1))),
+                              ("place_fence", (2, "h", (4, 8)))):
+        assert getattr(game, method)(*arguments) == getattr(board, method)(*arguments), (method, arguments)
+        assert bitboard.game_summary(game) == bitboard.game_summary(board)
+    game_copy = pickle.loads(pickle.dumps(game, -1))
+    assert bitboard.game_summary(game_copy) == bitboard.game_summary(board)
@@ -0,0 +1,27 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import Quoridor as q
+import dataset
+
+ACTIONS = [("p", (4, 1)), ("p", (4, 7)), ("v", (3, 3)), ("h", (5, 5)), ("p", (4, 2))]
+
+
+def test_illegal_game_writes_nothing(tmp_path, monkeypatch):
+    directory = str(tmp_path / "data")
+    meta_writes = []
+    write_meta = dataset.ShardWriter.write_meta
+    monkeypatch.setattr(dataset.ShardWriter, "write_meta", lambda writer: meta_writes.append(write_meta(writer)))
+    with dataset.ShardWriter(directory, shard_size=4) as writer:
+        writer.write_game(ACTIONS, winner=1)
+        with pytest.raises(ValueError, match="action 3"):
+            writer.write_game(ACTIONS[:3] + [("p", (0, 0))], winner=2)
+        assert writer.get_position_count() == len(ACTIONS)
+    #Once for the full first shard and once when the second is finished by close
+    assert len(meta_writes) == 2
+    shards = dataset.load_shards(directory)
+    targets = np.concatenate([targets for _, targets, _ in shards])
+    assert targets.tolist() == [q.action_to_index(action) for action in ACTIONS]
+    outcomes = np.concatenate([outcomes for _, _, outcomes in shards])
+    assert outcomes.tolist() == [1, -1, 1, -1, 1]
@@ -0,0 +1,172 @@
+import functools
+import itertools
+import threading
+
+import pytest
+
+import Quoridor as q
+import endgame
+
+
+def fenced_endgame():
+    """Returns a 5x5 game in which both players have placed their only fence, so the fences shape the table."""
+    game = q.QuoridorGame(5, 2, 1)
+    assert game.apply(("v", (2, 1))) and game.apply(("h", (1, 3)))
+    return game
+
+
+def place_pawns(game, turn, p1_position, p2_position):
+    """Puts the pawns on the given squares without the rules and gives the move to turn."""
+    parking = next(coordinate for coordinate in game.get_topology().coordinates
+                   if coordinate not in (p1_position, p2_position, game.get_position(1), game.get_position(2)))
+    game.set_pawn_position(2, parking)
+    game.set_pawn_position(1, p1_position)
+    game.set_pawn_position(2, p2_position)
+    if game.get_player_turn() != turn:
+        game.set_player_turn(game.get_player_turn())
+
+
+def brute_force(game):
+    """
+    Returns the result of every (turn, p1 position, p2 position) with neither pawn on its goal, found by depth-limited
+    minimax over the moves of QuoridorGame.possible_pawn_moves, in the same terms as EndgameTablebase.probe.
+    """
+    coordinates = game.get_topology().coordinates
+    states = [(turn, p1, p2) for turn in (1, 2) for p1, p2 in itertools.permutations(coordinates, 2)
+              if p1 not in game.get_goal(1) and p2 not in game.get_goal(2)]
+    moves = {}
+    for turn, p1, p2 in states:
+        place_pawns(game, turn, p1, p2)
+        moves[turn, p1, p2] = game.possible_pawn_moves(turn)
+
+    def after(state, move):
+        turn, p1, p2 = state
+        return (2, move, p2) if turn == 1 else (1, p1, move)
+
+    @functools.lru_cache(maxsize=None)
+    def wins_within(state, plies):
+        if any(move in game.get_goal(state[0]) for move in moves[state]):
+            return True
+        return plies >= 3 and any(loses_within(after(state, move), plies - 1) for move in moves[state])
+
+    @functools.lru_cache(maxsize=None)
+    def loses_within(state, plies):
+        if plies < 2 or any(move in game.get_goal(state[0]) for move in moves[state]):
+            return False
+        return all(wins_within(after(state, move), plies - 1) for move in moves[state])
+
+    results = {}
+    for state in states:
+        results[state] = endgame.DRAW
+        for plies in range(1, 2 * len(states)):
+            if wins_within(state, plies):
+                results[state] = plies
+                break
+            if loses_within(state, plies):
+                results[state] = -plies
+                break
+    return results
+
+
+def endgame_position(fence_x):
+    """Returns a 5x5 game without fences left and a "v" fence at (fence_x, 1), so every fence_x has its own table."""
+    game = q.QuoridorGame(5, 2, 0)
+    game.add_fence("v", (fence_x, 1))
+    return game
+
+
+def run_threads(target, count):
+    """Runs target(thread number) in count threads at once and re-raises the first error."""
+    errors = []
+    start = threading.Barrier(count)
+
+    def run(number):
+        try:
+            start.wait()
+            target(number)
+        except Exception as error:
+            errors.append(error)
+    threads = [threading.Thread(target=run, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_solve_probe_and_best_move_match_brute_force():
+    game = fenced_endgame()
+    expected = brute_force(game)
+    tablebase = endgame.EndgameTablebase()
+    for (turn, p1, p2), result in expected.items():
+        place_pawns(game, turn, p1, p2)
+        assert tablebase.probe(game) == result, (turn, p1, p2)
+        action, best_result = tablebase.best_move(game)
+        assert best_result == result
+        move = action[1]
+        if result == 1:
+            assert move in game.get_goal(turn)
+        else:
+            reply = expected[(2, move, p2) if turn == 1 else (1, p1, move)]
+            assert reply == (-(result - 1) if result > 0 else -result - 1 if result < 0 else endgame.DRAW)
+    assert tablebase.get_stats()["solved"] == 1
+
+
+def test_saved_tables_load_back(tmp_path):
+    game = fenced_endgame()
+    tablebase = endgame.EndgameTablebase(str(tmp_path / "tables.qegt"))
+    solved = tablebase.probe(game)
+    tablebase.save()
+    loaded = endgame.EndgameTablebase(str(tmp_path / "tables.qegt"))
+    assert loaded.get_table_count() == 1
+    assert loaded.probe(game, solve_missing=False) == solved
+    assert loaded.get_table(game, solve_missing=False) == tablebase.get_table(game)
+
+
+@pytest.mark.parametrize("cut", [1, 2 * 25 * 25, 2 * 2 * 25 * 25 + 2, 2 * 2 * 25 * 25 + 3])
+def test_cut_off_file_raises_value_error(tmp_path, cut):
+    path = str(tmp_path / "tables.qegt")
+    tablebase = endgame.EndgameTablebase(path)
+    tablebase.probe(fenced_endgame())
+    tablebase.probe(endgame_position(1))
+    tablebase.save()
+    with open(path, "rb") as tablebase_file:
+        data = tablebase_file.read()
+    #The cuts end inside the values of the last table, right after its header and inside its header
+    with open(path, "wb") as tablebase_file:
+        tablebase_file.write(data[:-cut])
+    loaded = endgame.EndgameTablebase()
+    with pytest.raises(ValueError, match="truncated endgame tablebase"):
+        loaded.load(path)
+    assert loaded.get_table_count() == 0
+
+
+def test_table_is_solved_once_when_threads_probe_together():
+    tablebase = endgame.EndgameTablebase()
+    results = []
+    run_threads(lambda number: results.append(tablebase.probe(endgame_position(1))), 4)
+    assert len(set(results)) == 1 and results[0] is not None
+    assert tablebase.get_stats()["solved"] == 1
+
+
+def test_threads_can_evict_tables_while_others_add_them():
+    tablebase = endgame.EndgameTablebase(max_tables=2)
+
+    def probe_all(number):
+        for fence_x in range(1, 5):
+            assert tablebase.probe(endgame_position((fence_x + number) % 4 + 1)) is not None
+            tablebase.probe(endgame_position(fence_x), solve_missing=False)
+    run_threads(probe_all, 4)
+    assert tablebase.get_table_count() == 2
+
+
+def test_probe_without_solving_finds_table_solved_in_background():
+    tablebase = endgame.EndgameTablebase()
+    game = endgame_position(2)
+    assert tablebase.probe(game, solve_missing=False) is None
+    tablebase.solve_in_background(game)
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread():
+            thread.join()
+    assert tablebase.probe(game, solve_missing=False) == endgame.EndgameTablebase().probe(game)
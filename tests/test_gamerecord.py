@@ -0,0 +1,31 @@
+import pytest
+
+import gamerecord
+
+GAMES = [(1, [("p", (4, 1)), ("p", (4, 7)), ("v", (3, 3))]), (None, [("h", (5, 5))])]
+
+
+def write_record_file(path):
+    with gamerecord.GameRecordWriter(str(path)) as writer:
+        for winner, actions in GAMES:
+            writer.write_game(actions, winner)
+    return path.read_bytes()
+
+
+def test_games_read_back(tmp_path):
+    path = tmp_path / "games.qgr"
+    write_record_file(path)
+    assert list(gamerecord.read_games(str(path))) == GAMES
+    assert [bytes(actions) for _, actions in gamerecord.read_games(str(path), raw=True)] == [bytes([13, 67, 111]),
+                                                                                         bytes([212])]
+
+
+@pytest.mark.parametrize("cut", [1, 2, 3, 4])
+def test_cut_off_file_raises_value_error(tmp_path, cut):
+    path = tmp_path / "games.qgr"
+    data = write_record_file(path)
+    #cut 1 ends inside the last game's actions, 2 and 3 inside its header, and 4 inside the first game's actions
+    path.write_bytes(data[:-cut] if cut < 4 else data[:len(gamerecord.FILE_HEADER) + gamerecord.GAME_HEADER.size + 1])
+    games = gamerecord.read_games(str(path))
+    with pytest.raises(ValueError, match="truncated game record"):
+        list(games)
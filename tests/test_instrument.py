@@ -0,0 +1,31 @@
+import Quoridor as q
+import instrument
+
+
+def test_counts_calls_and_rejections_with_keyword_arguments():
+    with instrument.instrumented() as stats:
+        game = q.QuoridorGame()
+        assert game.move_pawn(1, move_to_position=(4, 1))
+        assert not game.place_fence(player=2, vertical_or_horizontal="h", position=(0, 9))
+        assert not game.move_pawn(player=2, move_to_position=(0, 0))
+    assert not instrument.is_enabled()
+    assert stats["calls"]["move_pawn"] == 2
+    assert stats["calls"]["place_fence"] == 1
+    assert stats["rejections"]["place_fence", "off the board"] == 1
+    assert stats["rejections"]["move_pawn", "not reachable"] == 1
+    assert q.QuoridorGame.move_pawn.__name__ == "move_pawn"
+
+
+def test_block_restores_instrumentation_that_was_already_on():
+    outer = instrument.enable()
+    try:
+        with instrument.instrumented() as inner:
+            q.QuoridorGame().move_pawn(1, (4, 1))
+        assert instrument.is_enabled()
+        assert instrument.get_stats() is outer
+        q.QuoridorGame().move_pawn(1, (4, 1))
+        assert inner["calls"]["move_pawn"] == 1
+        assert outer["calls"]["move_pawn"] == 1
+    finally:
+        instrument.disable()
+    assert not hasattr(q.QuoridorGame.move_pawn, "__wrapped__")
@@ -0,0 +1,31 @@
+import random
+
+import Quoridor as q
+import mcts
+
+
+def boxed_in_game():
+    """
+    Returns a game with player 1 to move at 4,7 and player 2 below it at 4,8, both boxed in by fences: the jump over
+    player 2 leaves the board and player 2 has no other square, so player 1 has no pawn move at all. The path rule
+    keeps this from happening in a two player game, so it is set up from a snapshot, which skips the rules.
+    """
+    return q.from_snapshot({"seq": 0, "size": 9, "players": 2, "fences": 10, "positions": [(4, 7), (4, 8)],
+                            "v_fences": [(4, 7), (5, 7), (4, 8), (5, 8)], "h_fences": [(4, 7)],
+                            "inventories": [0, 5], "turn": 1, "winner": None})
+
+
+def test_rollout_ends_when_the_pawn_has_no_move():
+    game = boxed_in_game()
+    assert game.possible_pawn_moves(1) == []
+    game_hash = game.get_zobrist_hash()
+    assert mcts.rollout(game, random.Random(0)) == 1
+    assert game.get_zobrist_hash() == game_hash
+
+
+def test_search_is_reproducible_with_a_seed():
+    game = q.QuoridorGame()
+    game.apply(("p", (4, 1)))
+    moves = [mcts.MCTSPlayer(iterations=60, time_budget=None, seed=5).choose_move(game) for _ in range(2)]
+    assert moves[0] == moves[1]
+    assert moves[0] in game.legal_moves(2)
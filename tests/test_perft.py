@@ -0,0 +1,32 @@
+import pytest
+
+import perft
+
+
+def test_start_position_counts():
+    game = perft.setup_position("start")
+    assert perft.perft(game, 1) == 147
+    assert perft.perft(game, 2) == 21462
+
+
+@pytest.mark.parametrize("name, depth, expected", [
+    (name, depth, expected) for name, depths in perft.KNOWN_NODES.items() for depth, expected in depths.items()
+    if expected <= 25000])
+def test_known_node_counts(name, depth, expected):
+    assert perft.perft(perft.setup_position(name), depth) == expected
+
+
+def test_perft_leaves_the_game_unchanged():
+    game = perft.setup_position("blocked_vertical_jump")
+    start_hash = game.get_zobrist_hash()
+    legal_moves = game.legal_moves(game.get_player_turn())
+    perft.perft(game, 2)
+    assert game.get_zobrist_hash() == start_hash == game.compute_hash()
+    assert game.legal_moves(game.get_player_turn()) == legal_moves
+
+
+def test_divide_adds_up_to_perft():
+    game = perft.setup_position("edge_jump")
+    counts = perft.divide(game, 2)
+    assert len(counts) == 142
+    assert sum(nodes for _, nodes in counts) == 19462
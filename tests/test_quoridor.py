@@ -0,0 +1,123 @@
+import copy
+import json
+import pickle
+import random
+
+import pytest
+
+import Quoridor as q
+
+
+def random_game(rng, plies, **configuration):
+    """Returns a game after up to plies random legal actions."""
+    game = q.QuoridorGame(**configuration)
+    for _ in range(plies):
+        if game.get_game_won():
+            break
+        game.apply(rng.choice(game.legal_moves(game.get_player_turn())))
+    return game
+
+
+def board(game):
+    """Returns the pawn and open moves of every square of a game."""
+    return [(square.get_pawn(), square.get_ortho_moves()) for square in game.get_squares()]
+
+
+def test_copies_share_untouched_squares_and_drop_history():
+    game = random_game(random.Random(1), 12)
+    empty_squares = game.get_topology().empty_squares
+    shared = sum(square is empty for square, empty in zip(game.get_squares(), empty_squares))
+    assert shared > 0
+    for game_copy in (copy.deepcopy(game), pickle.loads(pickle.dumps(game, -1))):
+        assert sum(square is empty for square, empty in zip(game_copy.get_squares(), empty_squares)) == shared
+        assert not any(square is other for square, other, empty in
+                       zip(game_copy.get_squares(), game.get_squares(), empty_squares) if square is not empty)
+        assert board(game_copy) == board(game)
+        assert game_copy.get_zobrist_hash() == game.get_zobrist_hash() == game_copy.compute_hash()
+        assert game_copy.undo() is None
+
+
+def test_copy_plays_on_like_the_original():
+    rng = random.Random(2)
+    for configuration in ({}, {"size": 7, "players": 4}):
+        game = random_game(rng, 30, **configuration)
+        for game_copy in (copy.deepcopy(game), pickle.loads(pickle.dumps(game, -1))):
+            start_hash = game.get_zobrist_hash()
+            made = 0
+            while made < 15 and not game_copy.get_game_won():
+                action = rng.choice(game_copy.legal_moves(game_copy.get_player_turn()))
+                assert game_copy.apply(action) and game.apply(action)
+                made += 1
+                assert game_copy.legal_moves(game_copy.get_player_turn()) == game.legal_moves(game.get_player_turn())
+                assert game_copy.get_zobrist_hash() == game.get_zobrist_hash()
+            for _ in range(made):
+                game.undo()
+                game_copy.undo()
+            assert game_copy.get_zobrist_hash() == game.get_zobrist_hash() == start_hash
+            assert board(game_copy) == board(game)
+
+
+def test_apply_undo_round_trip_keeps_incremental_hash():
+    rng = random.Random(3)
+    for configuration in ({}, {"size": 11}, {"size": 7, "players": 4}):
+        game = q.QuoridorGame(**configuration)
+        states = []
+        while not game.get_game_won() and len(states) < 80:
+            states.append((game.get_zobrist_hash(), board(game), game.legal_moves(game.get_player_turn())))
+            action = rng.choice(game.legal_moves(game.get_player_turn()))
+            assert game.apply(action)
+            assert game.get_zobrist_hash() == game.compute_hash()
+        while states:
+            game_hash, squares, legal_moves = states.pop()
+            assert game.undo() is not None
+            assert game.get_zobrist_hash() == game_hash == game.compute_hash()
+            assert board(game) == squares
+            assert game.legal_moves(game.get_player_turn()) == legal_moves
+        assert game.undo() is None
+
+
+def test_illegal_actions_change_nothing():
+    game = q.QuoridorGame()
+    game_hash = game.get_zobrist_hash()
+    assert not game.apply(("p", (4, 2)))
+    assert not game.apply(("v", (0, 3)))
+    assert not game.place_fence(2, "h", (3, 3))
+    assert game.get_zobrist_hash() == game_hash
+    assert game.get_player_turn() == 1
+
+
+def test_snapshot_and_deltas_rebuild_the_game():
+    rng = random.Random(4)
+    for configuration in ({}, {"size": 7, "players": 4}):
+        game = random_game(rng, 10, **configuration)
+        changes = []
+        game.subscribe(changes.append)
+        replica = q.from_snapshot(json.loads(json.dumps(game.get_snapshot())))
+        assert replica.get_zobrist_hash() == game.get_zobrist_hash()
+        for _ in range(150):
+            if game.get_game_won() or rng.random() < 0.2:
+                if game.undo() is None:
+                    break
+            else:
+                game.apply(rng.choice(game.legal_moves(game.get_player_turn())))
+            for change in changes:
+                replica.apply_change(json.loads(json.dumps(change)))
+            changes.clear()
+            assert replica.get_zobrist_hash() == game.get_zobrist_hash()
+            assert json.dumps(replica.get_snapshot()) == json.dumps(game.get_snapshot())
+            assert sorted(replica.legal_moves(replica.get_player_turn())) == \
+                sorted(game.legal_moves(game.get_player_turn()))
+
+
+def test_missed_change_is_rejected():
+    game = q.QuoridorGame()
+    changes = []
+    game.subscribe(changes.append)
+    replica = q.from_snapshot(game.get_snapshot())
+    game.apply(("p", (4, 1)))
+    game.apply(("p", (4, 7)))
+    with pytest.raises(ValueError):
+        replica.apply_change(changes[1])
+    game.unsubscribe(changes.append)
+    game.apply(("p", (4, 2)))
+    assert len(changes) == 2
@@ -0,0 +1,19 @@
+import Quoridor as q
+import selfplay
+
+
+def test_alphabeta_players_are_reused_between_games():
+    first = selfplay.get_player(1, "alphabeta:0.01", 0)
+    assert selfplay.get_player(1, "alphabeta:0.01", 2) is first
+    assert selfplay.get_player(2, "alphabeta:0.01", 1) is not first
+    assert selfplay.get_player(1, "greedy", 0) is not selfplay.get_player(1, "greedy", 0)
+
+
+def test_played_games_replay_legally():
+    for number in range(2):
+        record = selfplay.play_game(number, "alphabeta:0.005", "random", 10 + 2 * number, 400)
+        game = q.QuoridorGame()
+        for kind, x, y in record["actions"]:
+            assert game.apply((kind, (x, y)))
+        assert record["plies"] == len(record["actions"])
+        assert record["winner"] == game.get_winner()
@@ -0,0 +1,129 @@
+import asyncio
+import socket
+
+import Quoridor as q
+import server
+
+
+async def open_game(port):
+    """Connects, starts a new game and returns (reader, writer, game id)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"NEW\n")
+    reply = (await reader.readline()).decode().split()
+    assert reply[:2] == ["OK", "GAME"]
+    return reader, writer, int(reply[2])
+
+
+async def send(reader, writer, line):
+    """Sends a command and returns the reply line."""
+    writer.write(line.encode() + b"\n")
+    return (await reader.readline()).decode().strip()
+
+
+def run_with_server(test, game_server=None):
+    """Runs test(game_server, port) against a server on a free localhost port."""
+    game_server = game_server or server.GameServer()
+
+    async def main():
+        hosted = await server.start_server(game_server, "127.0.0.1", 0)
+        try:
+            await test(game_server, hosted.sockets[0].getsockname()[1])
+        finally:
+            hosted.close()
+            await hosted.wait_closed()
+    asyncio.run(main())
+
+
+def test_subscriber_rebuilds_game_from_state_and_deltas():
+    async def test(game_server, port):
+        reader, writer, game_id = await open_game(port)
+        assert await send(reader, writer, "MOVE 4 1") == "OK"
+        watcher_reader, watcher_writer = await asyncio.open_connection("127.0.0.1", port)
+        assert (await send(watcher_reader, watcher_writer, "JOIN %d" % game_id)).startswith("OK GAME")
+        reply = await send(watcher_reader, watcher_writer, "SUB")
+        assert reply.startswith("OK SUB seq=0 ")
+        replica = q.from_snapshot(server.parse_state(reply[len("OK SUB "):]))
+        for command in ("MOVE 4 7", "FENCE h 3 3", "FENCE v 6 6", "MOVE 4 2"):
+            assert await send(reader, writer, command) == "OK"
+        for seq in range(1, 5):
+            words = (await watcher_reader.readline()).decode().split(" ", 2)
+            assert words[:2] == ["DELTA", str(game_id)]
+            change = server.parse_change(words[2])
+            assert change["seq"] == seq
+            replica.apply_change(change)
+        origin = game_server._sessions[game_id].game
+        assert server.format_state(replica) == server.format_state(origin)
+        assert replica.get_zobrist_hash() == origin.get_zobrist_hash()
+        writer.close()
+        watcher_writer.close()
+    run_with_server(test)
+
+
+def test_seated_connection_only_acts_on_its_turn():
+    async def test(game_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        assert (await send(reader, writer, "NEW 2")).startswith("OK GAME")
+        assert await send(reader, writer, "MOVE 4 7") == "ERR not your turn"
+        assert await send(reader, writer, "JOIN 999") == "ERR no such game"
+        assert await send(reader, writer, "MOVE 4 7") == "ERR not your turn"
+        writer.close()
+    run_with_server(test)
+
+
+def test_bad_seat_makes_no_game_and_rejoining_keeps_the_game():
+    async def test(game_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        assert await send(reader, writer, "NEW 3") == "ERR seat must be 1 or 2"
+        assert game_server.get_session_count() == 0
+        reply = await send(reader, writer, "NEW 2")
+        game_id = int(reply.split()[2])
+        assert await send(reader, writer, "SUB") == "OK SUB " + server.format_state(game_server._sessions[game_id].game)
+        assert await send(reader, writer, "JOIN %d 1" % game_id) == reply
+        assert game_server.get_session_count() == 1
+        assert game_server._sessions[game_id].connections == 1
+        #The subscription survived the rejoin: the change comes before the reply
+        assert (await send(reader, writer, "MOVE 4 1")).startswith("DELTA %d seq=1 " % game_id)
+        assert (await reader.readline()).decode().strip() == "OK"
+        writer.close()
+    run_with_server(test)
+
+
+def test_slow_subscriber_gets_resync_and_is_disconnected(monkeypatch):
+    monkeypatch.setattr(server, "MAX_SUBSCRIBER_BUFFER", 2048)
+    game_server = server.GameServer()
+    handle_client = game_server.handle_client
+
+    async def small_send_buffer(reader, writer):
+        #Keeps the kernel from absorbing the backlog, so it builds up in the transport
+        writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        await handle_client(reader, writer)
+    game_server.handle_client = small_send_buffer
+
+    async def test(game_server, port):
+        reader, writer, game_id = await open_game(port)
+        slow_reader, slow_writer = await asyncio.open_connection("127.0.0.1", port)
+        slow_writer.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        assert (await send(slow_reader, slow_writer, "JOIN %d" % game_id)).startswith("OK GAME")
+        assert (await send(slow_reader, slow_writer, "SUB")).startswith("OK SUB")
+        session = game_server._sessions[game_id]
+        #The pawns step sideways and back for as long as it takes, while the slow reader reads nothing
+        moves = ["MOVE 5 0", "MOVE 5 8", "MOVE 4 0", "MOVE 4 8"]
+        actions = 0
+        while session.subscribers:
+            assert await send(reader, writer, moves[actions % 4]) == "OK"
+            actions += 1
+            assert actions < 20000, "the slow subscriber was never dropped"
+        lines = []
+        while True:
+            line = await asyncio.wait_for(slow_reader.readline(), 5)
+            if not line:
+                break
+            lines.append(line.decode().split())
+        #Every change up to the drop arrives in order, then RESYNC names the first one that was missed
+        deltas = [int(words[2][len("seq="):]) for words in lines if words[0] == "DELTA"]
+        assert deltas == list(range(1, len(deltas) + 1))
+        assert lines[-1] == ["RESYNC", str(game_id), "seq=%d" % (len(deltas) + 1)]
+        #The game goes on for the players
+        assert await send(reader, writer, moves[actions % 4]) == "OK"
+        writer.close()
+    run_with_server(test, game_server)
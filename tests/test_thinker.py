@@ -0,0 +1,62 @@
+import time
+
+import Quoridor as q
+import ai
+import thinker
+
+
+def wait_for_move(background_thinker, timeout=10.0):
+    """Polls the thinker like a frame loop until it hands back a move."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        action = background_thinker.poll()
+        if action is not None:
+            return action
+        time.sleep(0.01)
+    raise AssertionError("no move within %s seconds" % timeout)
+
+
+def test_request_move_hands_back_a_legal_move():
+    game = q.QuoridorGame()
+    background_thinker = thinker.BackgroundThinker(ai.AlphaBetaPlayer(0.1, max_depth=2), ponder=False)
+    try:
+        background_thinker.request_move(game)
+        assert background_thinker.is_thinking()
+        game_hash = game.get_zobrist_hash()
+        action = wait_for_move(background_thinker)
+        assert action in game.legal_moves(1)
+        assert game.get_zobrist_hash() == game_hash
+        assert not background_thinker.is_thinking()
+        assert background_thinker.get_stats()["moves"] == 1
+    finally:
+        background_thinker.close()
+
+
+def test_predicted_reply_is_a_ponder_hit():
+    player = ai.AlphaBetaPlayer(0.1, max_depth=2)
+    background_thinker = thinker.BackgroundThinker(player)
+    game = q.QuoridorGame()
+    try:
+        background_thinker.request_move(game)
+        game.apply(wait_for_move(background_thinker))
+        prediction = player.predict_move(game)
+        background_thinker.ponder(game)
+        game.apply(prediction)
+        background_thinker.request_move(game)
+        assert game.apply(wait_for_move(background_thinker))
+        stats = background_thinker.get_stats()
+        assert (stats["ponder_hits"], stats["ponder_misses"]) == (1, 0)
+    finally:
+        background_thinker.close()
+
+
+def test_cancel_stops_a_long_ponder():
+    player = ai.AlphaBetaPlayer(0.1)
+    background_thinker = thinker.BackgroundThinker(player, ponder_limit=60)
+    game = q.QuoridorGame()
+    game.apply(("p", (4, 1)))
+    background_thinker.ponder(game)
+    start = time.perf_counter()
+    background_thinker.close()
+    assert time.perf_counter() - start < 1.0
+    assert background_thinker.poll() is None
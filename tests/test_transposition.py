@@ -0,0 +1,21 @@
+import transposition
+
+
+def test_fill_counts_slots_in_use():
+    table = transposition.TranspositionTable(megabytes=0.001)
+    size = table.get_size()
+    table.store(5, 3, 10, transposition.EXACT, ("p", (4, 1)))
+    table.store(5, 4, 12, transposition.LOWER_BOUND)
+    assert table.probe(5) == (4, 12, transposition.LOWER_BOUND, None)
+    table.store(5 + size, 1, 0, transposition.EXACT)
+    assert table.get_stats()["rejected"] == 1
+    table.new_search()
+    table.store(5 + size, 1, 0, transposition.EXACT)
+    table.store(6, 2, -7, transposition.UPPER_BOUND, ("h", (3, 3)))
+    stats = table.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["fill"] == 2 / size == (size - table._depths.count(-1)) / size
+    assert table.probe(6) == (2, -7, transposition.UPPER_BOUND, ("h", (3, 3)))
+    table.clear()
+    assert table.get_stats()["fill"] == 0.0
+    assert table.probe(6) is None
@@ -0,0 +1,203 @@
+#Description: Runs the searches of a computer player in a background thread so that an event loop (the pygame window of
+#main.py) never waits for them. request_move starts a search on a copy of the game and poll hands the move back once
+#it is ready. After the computer has moved, ponder predicts the other player's reply and already searches the position
+#after it; if the prediction was right, the search that is running is kept and only has to finish its time budget
+#counted from when pondering started, so the move usually comes back at once.
+#Usage: python thinker.py [--moves 10] [--budget 1.0] [--human-delay 1.0] [--no-ponder]
+#       (plays a computer player against a simulated human and prints the response times)
+
+import argparse
+import copy
+import threading
+import time
+
+import Quoridor as q
+import ai
+
+
+PONDER_LIMIT = 600.0 #seconds a ponder search may run when the other player takes very long
+MOVE, PONDER = "move", "ponder" #kinds of search
+
+
+class SearchJob:
+    """A search running in the worker thread: what it searches and, once done, its result."""
+    __slots__ = ("kind", "key", "start", "deadline", "cancelled", "done", "result")
+
+    def __init__(self, kind, key):
+        """
+        p1: kind -- MOVE for a move that was asked for, PONDER for a predicted position
+        p2: key -- (Zobrist hash, number of fences placed) of the position that is searched
+        """
+        self.kind = kind
+        self.key = key
+        self.start = time.perf_counter()
+        self.deadline = None #deadline given to a ponder search that became a MOVE search, repeated by poll
+        self.cancelled = False
+        self.done = threading.Event()
+        self.result = None
+
+
+def position_key(game):
+    """Returns a key that tells positions apart: the Zobrist hash and the number of fences on the board."""
+    return game.get_zobrist_hash(), len(game.get_vFences()) + len(game.get_hFences())
+
+
+class BackgroundThinker:
+    """
+    Asynchronous interface to a computer player (such as ai.AlphaBetaPlayer, which needs choose_move with a time
+    budget, set_deadline, predict_move and get_time_budget). Only one search runs at a time, on a copy of the game, so
+    the caller can keep changing and drawing its own game. The player must not be used by anything else meanwhile.
+    """
+    def __init__(self, player, ponder=True, ponder_limit=PONDER_LIMIT):
+        """
+        p1: player -- computer player that does the searching
+        p2: ponder -- search the predicted reply while the other player thinks
+        p3: ponder_limit -- longest a ponder search may run, in seconds
+        """
+        self._player = player
+        self._ponder = ponder
+        self._ponder_limit = ponder_limit
+        self._job = None
+        self._thread = None
+        self._stats = {"moves": 0, "ponder_hits": 0, "ponder_misses": 0, "response_seconds": 0.0}
+        self._requested = None #time.perf_counter() of the last request_move, for the response time
+
+    def get_stats(self):
+        """
+        Returns the number of moves delivered, the ponder predictions that were right and wrong, and the mean time
+        from request_move to the move being ready in seconds.
+        """
+        stats = dict(self._stats)
+        stats["mean_response_seconds"] = stats["response_seconds"] / stats["moves"] if stats["moves"] else 0.0
+        return stats
+
+    def is_thinking(self):
+        """Returns True if a move was requested and has not been handed back by poll yet."""
+        return self._job is not None and self._job.kind == MOVE
+
+    def request_move(self, game):
+        """
+        Starts searching the move of the player to move. Returns at once; the move is handed back by poll. If the
+        position is the one being pondered, that search is kept and given the rest of its time budget.
+        p1: QuoridorGame object, which may be changed after the call
+        """
+        self._requested = time.perf_counter()
+        job = self._job
+        if job is not None and job.kind == PONDER and job.key == position_key(game):
+            self._stats["ponder_hits"] += 1
+            job.kind = MOVE
+            job.deadline = job.start + self._player.get_time_budget()
+            self._player.set_deadline(job.deadline)
+            return
+        if job is not None and job.kind == PONDER:
+            self._stats["ponder_misses"] += 1
+        self.cancel()
+        self.start(MOVE, game, None)
+
+    def ponder(self, game):
+        """
+        Starts searching the position after the predicted move of the player to move (the other player, once the
+        computer has moved). Does nothing if pondering is off or the game is over.
+        p1: QuoridorGame object, which may be changed after the call
+        """
+        if not self._ponder or game.get_game_won():
+            return
+        self.cancel()
+        prediction = self._player.predict_move(game)
+        if prediction is None:
+            return
+        self.start(PONDER, game, prediction)
+
+    def start(self, kind, game, prediction):
+        """Starts a search of a copy of the game, after the predicted action if one is given."""
+        snapshot = copy.deepcopy(game)
+        if prediction is not None:
+            snapshot.apply(prediction)
+        job = SearchJob(kind, position_key(snapshot))
+        time_budget = self._ponder_limit if kind == PONDER else None
+        self._job = job
+        self._thread = threading.Thread(target=self.search, args=(job, snapshot, time_budget), daemon=True)
+        self._thread.start()
+
+    def search(self, job, snapshot, time_budget):
+        """Runs in the worker thread: searches the snapshot and stores the result in the job."""
+        try:
+            if not job.cancelled:
+                job.result = self._player.choose_move(snapshot, time_budget)
+        finally:
+            job.done.set()
+
+    def poll(self):
+        """
+        Returns the move that was asked for with request_move once it is ready, and None until then. Meant to be
+        called once per frame.
+        """
+        job = self._job
+        if job is None or job.kind != MOVE:
+            return None
+        if not job.done.is_set():
+            #A ponder hit right after the search started may have set the deadline before choose_move did
+            if job.deadline is not None:
+                self._player.set_deadline(job.deadline)
+            return None
+        self._job = None
+        self._stats["moves"] += 1
+        self._stats["response_seconds"] += time.perf_counter() - self._requested
+        return job.result
+
+    def cancel(self):
+        """Stops the running search, if any, and waits for the worker thread (it stops within one node)."""
+        job, thread = self._job, self._thread
+        self._job = None
+        if job is None:
+            return
+        job.cancelled = True
+        while thread.is_alive():
+            self._player.set_deadline(0.0)
+            thread.join(0.005)
+
+    def close(self):
+        """Stops the running search. The thinker can still be used afterwards."""
+        self.cancel()
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Measure the response time of the background thinker.")
+    parser.add_argument("--moves", type=int, default=10, help="moves of the computer to measure")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds the computer thinks per move")
+    parser.add_argument("--human-delay", type=float, default=1.0, help="seconds the simulated human takes per move")
+    parser.add_argument("--no-ponder", action="store_true")
+    args = parser.parse_args(argv)
+
+    game = q.QuoridorGame()
+    thinker = BackgroundThinker(ai.AlphaBetaPlayer(args.budget), ponder=not args.no_ponder)
+    human = ai.AlphaBetaPlayer(0.2)
+    frames = 0
+    longest_frame = 0.0
+    while not game.get_game_won() and thinker.get_stats()["moves"] < args.moves:
+        #The simulated human thinks for a while, as a person would, while the computer ponders
+        human_move = human.choose_move(game)
+        time.sleep(max(0.0, args.human_delay - human.get_search_info()["time"]))
+        game.apply(human_move)
+        if game.get_game_won():
+            break
+        thinker.request_move(game)
+        action = None
+        while action is None:
+            frame_start = time.perf_counter()
+            action = thinker.poll()
+            time.sleep(1 / 30)
+            frames += 1
+            longest_frame = max(longest_frame, time.perf_counter() - frame_start)
+        game.apply(action)
+        thinker.ponder(game)
+    thinker.close()
+    stats = thinker.get_stats()
+    print("%(moves)d moves, ponder hits %(ponder_hits)d, misses %(ponder_misses)d, mean response %(mean_response_seconds).3fs"
+          % stats)
+    print("%d frames, longest frame %.1f ms" % (frames, longest_frame * 1000))
+
+
+if __name__ == '__main__':
+    main()
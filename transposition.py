@@ -0,0 +1,132 @@
+#Description: Transposition table for Quoridor searches. Results are stored by the Zobrist hash of a position
+#(QuoridorGame.get_zobrist_hash) in preallocated arrays, so the table never grows past the size it was created with.
+
+from array import array
+
+import Quoridor as q
+
+
+EXACT = 0 #the stored score is the exact score of the position
+LOWER_BOUND = 1 #the search failed high, the score is at least the stored score
+UPPER_BOUND = 2 #the search failed low, the score is at most the stored score
+NO_MOVE = -1 #stored instead of a packed action when there is no best move
+
+#Best moves are packed as kind * 4096 + y * 64 + x (kind 0 for "p", 1 for "v", 2 for "h"), which fits every board
+#size up to 64x64 in the 2 bytes of an entry, so one table can be used for games of any size.
+
+#Bytes used by one entry: key (8), score (4), best move (2), depth (1), bound (1) and generation (1)
+ENTRY_BYTES = 17
+
+
+def pack_action(action):
+    """Returns an action tuple packed into a number that fits an entry (see above)."""
+    kind, (x, y) = action
+    return q.ACTION_KINDS.index(kind) << 12 | y << 6 | x
+
+
+def unpack_action(move):
+    """Returns the action tuple of a number made by pack_action."""
+    return q.ACTION_KINDS[move >> 12], (move & 63, move >> 6 & 63)
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table from Zobrist hashes to search results (depth, score, bound and best move).
+    Each hash maps to a single slot. A new result replaces the one in its slot if the slot is empty, holds the same
+    position, was written during an older search, or was searched less deeply than the new result.
+    """
+    def __init__(self, megabytes=16):
+        """
+        Allocates the table.
+        p1: megabytes -- memory that the table may use. The number of slots is megabytes * 2**20 // ENTRY_BYTES.
+        """
+        size = max(1, int(megabytes * 2 ** 20) // ENTRY_BYTES)
+        self._size = size
+        self._keys = array("Q", bytes(8 * size))
+        self._scores = array("i", bytes(4 * size))
+        self._moves = array("h", [NO_MOVE]) * size
+        self._depths = array("b", [-1]) * size #-1 marks an empty slot
+        self._bounds = array("B", bytes(size))
+        self._generations = array("B", bytes(size))
+        self._generation = 0
+        self._used = 0 #slots that are not empty, so get_stats doesn't have to scan the table
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+        self._rejected = 0
+
+    def get_size(self):
+        """Returns the number of slots in the table."""
+        return self._size
+
+    def get_memory_bytes(self):
+        """Returns the number of bytes used by the table's arrays."""
+        return self._size * ENTRY_BYTES
+
+    def new_search(self):
+        """
+        Starts a new search. Entries written during earlier searches are kept for lookups but are replaced first.
+        """
+        self._generation = (self._generation + 1) % 256
+
+    def clear(self):
+        """Empties the table and resets the counters."""
+        self.__init__(self.get_memory_bytes() / 2 ** 20)
+
+    def probe(self, key):
+        """
+        Returns (depth, score, bound, action) stored for a position, or None if the position is not in the table.
+        action is None when no best move was stored.
+        p1: Zobrist hash of the position
+        """
+        slot = key % self._size
+        if self._depths[slot] >= 0 and self._keys[slot] == key:
+            self._hits += 1
+            move = self._moves[slot]
+            return (self._depths[slot], self._scores[slot], self._bounds[slot],
+                    unpack_action(move) if move != NO_MOVE else None)
+        self._misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, action=None):
+        """
+        Stores the result of a search unless its slot holds a deeper result from the current search.
+        p1: Zobrist hash of the position
+        p2: depth that the position was searched to
+        p3: score of the position
+        p4: EXACT, LOWER_BOUND or UPPER_BOUND
+        p5: best action found, or None
+        """
+        slot = key % self._size
+        stored_depth = self._depths[slot]
+        if stored_depth >= 0 and self._keys[slot] != key:
+            if self._generations[slot] == self._generation and stored_depth > depth:
+                self._rejected += 1
+                return
+            self._evictions += 1
+        elif stored_depth < 0:
+            self._used += 1
+        self._keys[slot] = key
+        self._depths[slot] = min(depth, 127)
+        self._scores[slot] = score
+        self._bounds[slot] = bound
+        self._moves[slot] = pack_action(action) if action is not None else NO_MOVE
+        self._generations[slot] = self._generation
+        self._stores += 1
+
+    def get_stats(self):
+        """
+        Returns the table's counters: hits and misses of probe, stores, evictions (a stored result replaced the result
+        of another position), rejected stores, the hit rate and the fraction of slots that are in use.
+        """
+        probes = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "stores": self._stores,
+            "evictions": self._evictions,
+            "rejected": self._rejected,
+            "hit_rate": self._hits / probes if probes else 0.0,
+            "fill": self._used / self._size,
+        }